@@ -0,0 +1,364 @@
+# app/cache.py
+
+"""In-process caches."""
+
+import hashlib
+import threading
+import time
+
+from collections import OrderedDict
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from app.config import (
+    AUTH_CACHE_SIZE,
+    AUTH_CACHE_TTL,
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_BACKEND,
+    RESPONSE_CACHE_REDIS_URL,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL,
+    FAST_RESPONSES
+    )
+from app import metrics
+from app.etag import etag_matches, not_modified
+from app.profiling import span
+from app.serializers import serialize
+from app import signals
+
+
+class TTLCache:
+    """
+    Bounded LRU cache where every entry also expires after a time to live.
+
+    Safe to share between the threadpool workers of the sync routes.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            for key in [key for key, (_, value) in self._data.items() if predicate(value)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class PrincipalCache:
+    """
+    Maps an access token (by its hash) to the authenticated user principal,
+    so protected routes do not decode the token and query Users on every call.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self._tokens = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        """Return the cached `(principal, jti)` pair of the token, or None."""
+        return self._tokens.get(self.token_key(token))
+
+    def set(self, token: str, principal, expires_at: float | None = None, jti: str | None = None):
+        # never keep a principal longer than its token is valid.
+        ttl = None if expires_at is None else expires_at - time.time()
+        self._tokens.set(self.token_key(token), (principal, jti), ttl=ttl)
+
+    def delete(self, token: str):
+        self._tokens.delete(self.token_key(token))
+
+    def invalidate(self, username: str):
+        self._tokens.delete_where(lambda entry: entry[0].username == username)
+
+    def clear(self):
+        self._tokens.clear()
+
+    def __len__(self):
+        return len(self._tokens)
+
+
+principal_cache = PrincipalCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
+
+class MemoryCacheBackend:
+    """
+    Response cache backend of one process, entries live in a bounded TTL LRU.
+
+    Generations are bumped by the commits of this process only: with several workers,
+    a write made through another worker is served stale until the entry expires, up to
+    `RESPONSE_CACHE_TTL` seconds.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        return self.entries.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.entries.set(key, value, ttl=ttl)
+
+    def generations(self, tags: tuple) -> list:
+        return [self._generations.get(tag, 0) for tag in tags]
+
+    def bump(self, tag: str):
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    @property
+    def evictions(self) -> int:
+        return self.entries.evictions
+
+
+class RedisCacheBackend:
+    """
+    Response cache backend shared by every worker. Any client with the redis-py
+    `get`, `set`, `mget` and `incr` methods works, so a local stand-in can replace
+    the server. Expired entries are evicted by the server itself.
+    """
+    evictions = 0
+
+    def __init__(self, url: str | None = None, client=None, prefix: str = "books-api:"):
+        if client is None:
+            # optional dependency, only needed for the shared backend.
+            import redis
+            client = redis.Redis.from_url(url)
+
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(self.prefix + key, value, ex=int(ttl))
+
+    def generations(self, tags: tuple) -> list:
+        values = self.client.mget([f"{self.prefix}generation:{tag}" for tag in tags])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tag: str):
+        self.client.incr(f"{self.prefix}generation:{tag}")
+
+
+# serializers kept by the response cache, one per response model.
+ADAPTER_CACHE_SIZE = 512
+
+
+class ResponseCache:
+    """
+    Read-through cache of serialized JSON responses, keyed by route path and query
+    parameters.
+
+    Every entry is tagged with the tables its response is built from, and the key
+    embeds the current generation of each tag. A commit that changes a table bumps
+    its generation, so exactly the entries built from that table stop matching and
+    age out of the backend, while the others keep being served. Only ORM commits
+    bump generations: writes made with raw SQL or `sql_tool` invalidate nothing, and
+    are served stale until the entries expire.
+    """
+    def __init__(self, backend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._adapters = {}
+        self._lock = threading.Lock()
+
+    def adapter(self, response_model) -> TypeAdapter:
+        adapter = self._adapters.get(response_model)
+
+        if adapter is None:
+            adapter = TypeAdapter(response_model)
+
+            # the trimmed models of the `fields` parameter come and go, drop the oldest.
+            with self._lock:
+                if len(self._adapters) >= ADAPTER_CACHE_SIZE:
+                    self._adapters.pop(next(iter(self._adapters)))
+
+                self._adapters[response_model] = adapter
+
+        return adapter
+
+    def serialize(self, response_model, content) -> bytes:
+        with span("serialize"):
+            if FAST_RESPONSES:
+                return serialize(response_model, content)
+
+            adapter = self.adapter(response_model)
+            return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+    def key(self, request: Request, tags: tuple) -> str:
+        query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+        generations = ".".join(str(generation) for generation in self.backend.generations(tags))
+        return f"{request.url.path}?{query}#{generations}"
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _response(self, request: Request, body: bytes, tag: str | None, status: str) -> Response:
+        if tag is None:
+            return Response(content=body, media_type="application/json", headers={"X-Cache": status})
+
+        if etag_matches(request.headers.get("if-none-match"), tag):
+            return not_modified(tag)
+
+        return Response(content=body, media_type="application/json", headers={"X-Cache": status, "ETag": tag})
+
+    # entries are stored as `<etag>\n<body>`, an empty etag when the route has none.
+    @staticmethod
+    def _pack(tag: str | None, body: bytes) -> bytes:
+        return (tag or "").encode() + b"\n" + body
+
+    @staticmethod
+    def _unpack(entry: bytes) -> tuple:
+        tag, body = entry.split(b"\n", 1)
+        return tag.decode() or None, body
+
+    def _lookup(self, request: Request, tags: tuple) -> tuple:
+        if not self.enabled:
+            return None, None
+
+        key = self.key(request, tags)
+        entry = self.backend.get(key)
+        self._count(hit=entry is not None)
+        return key, entry
+
+    def respond(self, request: Request, tags: tuple, response_model, producer, etag=None):
+        """
+        Serve the cached body, or call `producer()` and cache its serialized result.
+
+        `etag()` returns the ETag of the resource from a cheap version query. It is
+        only called on a miss, and a matching If-None-Match is answered with 304
+        before `producer()` loads the rows. A hit reuses the ETag stored with the
+        body, the entry key already changes with every commit to its tables.
+        """
+        key, entry = self._lookup(request, tags)
+
+        if entry is not None:
+            tag, body = self._unpack(entry)
+            return self._response(request, body, tag, "HIT")
+
+        tag = etag() if etag is not None else None
+
+        if tag is not None and etag_matches(request.headers.get("if-none-match"), tag):
+            return not_modified(tag)
+
+        body = self.serialize(response_model, producer())
+
+        if key is not None:
+            self.backend.set(key, self._pack(tag, body), self.ttl)
+
+        return self._response(request, body, tag, "MISS" if self.enabled else "BYPASS")
+
+    async def respond_async(self, request: Request, tags: tuple, response_model, producer, etag=None):
+        """Same as `respond`, for `producer()` and `etag()` that return awaitables."""
+        key, entry = self._lookup(request, tags)
+
+        if entry is not None:
+            tag, body = self._unpack(entry)
+            return self._response(request, body, tag, "HIT")
+
+        tag = await etag() if etag is not None else None
+
+        if tag is not None and etag_matches(request.headers.get("if-none-match"), tag):
+            return not_modified(tag)
+
+        body = self.serialize(response_model, await producer())
+
+        if key is not None:
+            self.backend.set(key, self._pack(tag, body), self.ttl)
+
+        return self._response(request, body, tag, "MISS" if self.enabled else "BYPASS")
+
+    def invalidate(self, tables: set):
+        for table in tables:
+            self.backend.bump(table)
+
+        with self._lock:
+            self.invalidations += len(tables)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.backend.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# tables each cached catalog response is built from.
+BOOK_CACHE_TAGS = ("Books", "Authors", "Genres", "BookGenres")
+AUTHOR_CACHE_TAGS = ("Authors", "Books")
+GENRE_CACHE_TAGS = ("Genres", "Books", "BookGenres")
+
+if RESPONSE_CACHE_BACKEND == "redis":
+    response_cache_backend = RedisCacheBackend(url=RESPONSE_CACHE_REDIS_URL)
+else:
+    response_cache_backend = MemoryCacheBackend(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+
+response_cache = ResponseCache(
+    backend=response_cache_backend,
+    ttl=RESPONSE_CACHE_TTL,
+    enabled=RESPONSE_CACHE_ENABLED
+    )
+signals.on_commit(response_cache.invalidate)
+metrics.register(metrics.Callback(
+    "response_cache_events_total", "counter", "Catalog responses cache lookups and removals, by event.", ("event",),
+    lambda: {(event,): count for event, count in response_cache.stats().items()}
+    ))
+metrics.register(metrics.Callback(
+    "auth_cache_entries", "gauge", "Authenticated users in the cache.", (),
+    lambda: {(): len(principal_cache)}
+    ))
@@ -2,35 +2,172 @@
 
 """App configuration place."""
 
+import logging
 import os
 
 from pathlib import Path
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
+from app.metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool
 
 
 # load all variable from env file.
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # define the databases.
 postgres_db = os.getenv("POSTGRES_DATABASE_URL")
-sqlite_db = os.path.join(Path.cwd(), "books.db")
+sqlite_db = os.environ.get("SQLITE_DATABASE_PATH", os.path.join(Path.cwd(), "books.db"))
+
+# choose the database backend, "sqlite" (default) or "postgres".
+DATABASE_BACKEND = os.environ.get("DATABASE_BACKEND", "sqlite").lower()
+# serve from SQLite when the PostgreSQL server can not be reached at startup.
+DATABASE_FALLBACK_TO_SQLITE = os.environ.get("DATABASE_FALLBACK_TO_SQLITE", "false").lower() in ("1", "true", "yes")
+
+# SQLite tuning profile, every pragma is applied on each new connection.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", 268435456)),
+    # negative value is in KiB, so the default is a 64 MiB page cache.
+    "cache_size": int(os.environ.get("SQLITE_CACHE_SIZE", -65536)),
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000)),
+    "temp_store": os.environ.get("SQLITE_TEMP_STORE", "MEMORY"),
+    "foreign_keys": os.environ.get("SQLITE_FOREIGN_KEYS", "ON"),
+}
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+
+    cursor.close()
+
+# connection pool sizing, in WAL mode readers do not wait for the writer
+# so the pool should be large enough to keep every worker thread busy.
+DATABASE_POOL_SIZE = int(os.environ.get("DATABASE_POOL_SIZE", 20))
+DATABASE_MAX_OVERFLOW = int(os.environ.get("DATABASE_MAX_OVERFLOW", 20))
+DATABASE_POOL_TIMEOUT = int(os.environ.get("DATABASE_POOL_TIMEOUT", 30))
+# PostgreSQL only, connections are shared by several workers and hosts.
+DATABASE_POOL_RECYCLE = int(os.environ.get("DATABASE_POOL_RECYCLE", 1800))
+DATABASE_STATEMENT_TIMEOUT = int(os.environ.get("DATABASE_STATEMENT_TIMEOUT", 30000))
+
+# async drivers for each supported backend.
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]).render_as_string(hide_password=False)
+
+def engine_options(url: str) -> dict:
+    url = make_url(url)
+    options = {
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+        "pool_timeout": DATABASE_POOL_TIMEOUT,
+    }
+
+    # the same pools as the defaults, which also time the checkouts for the metrics.
+    is_async = url.get_driver_name() in ("aiosqlite", "asyncpg")
+    options["poolclass"] = TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+
+    if url.get_backend_name() == "sqlite":
+        # aiosqlite defaults to NullPool, it is pooled like the sync engine.
+        options["connect_args"] = {"check_same_thread": False}
+        return options
+
+    options["pool_pre_ping"] = True
+    options["pool_recycle"] = DATABASE_POOL_RECYCLE
+
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(DATABASE_STATEMENT_TIMEOUT)}
+        }
+    else:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={DATABASE_STATEMENT_TIMEOUT}"
+        }
+
+    return options
+
+def create_database_engine(url: str):
+    database_engine = create_engine(url, **engine_options(url))
+
+    if database_engine.dialect.name == "sqlite":
+        event.listen(database_engine, "connect", set_sqlite_pragmas)
+
+    return database_engine
+
+def create_async_database_engine(url: str):
+    database_engine = create_async_engine(url, **engine_options(url))
+
+    if database_engine.dialect.name == "sqlite":
+        event.listen(database_engine.sync_engine, "connect", set_sqlite_pragmas)
+
+    return database_engine
+
+def select_database_url() -> str:
+    sqlite_url = f"sqlite:///{sqlite_db}"
+
+    if DATABASE_BACKEND not in ("postgres", "postgresql"):
+        return sqlite_url
+
+    if not postgres_db:
+        logger.warning("DATABASE_BACKEND is postgres but POSTGRES_DATABASE_URL is not set, using SQLite.")
+        return sqlite_url
+
+    if DATABASE_FALLBACK_TO_SQLITE:
+        probe = create_engine(postgres_db, poolclass=NullPool)
+
+        try:
+            with probe.connect():
+                pass
+        except OperationalError as error:
+            logger.warning("PostgreSQL is not reachable (%s), using SQLite.", error.orig)
+            return sqlite_url
+        finally:
+            probe.dispose()
+
+    return postgres_db
 
 # throw all your configuration variable in here!
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{sqlite_db}"
+SQLALCHEMY_DATABASE_URL = select_database_url()
+ASYNC_SQLALCHEMY_DATABASE_URL = async_database_url(SQLALCHEMY_DATABASE_URL)
 
 # create connection between app and database.
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-    )
+engine = create_database_engine(SQLALCHEMY_DATABASE_URL)
 
 # create session.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# switch between the sync and the async database stack (routes, controllers and session).
+DATABASE_ASYNC = os.environ.get("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# the async engine is only created when it is used, so its driver stays optional.
+async_engine = None
+AsyncSessionLocal = None
+
+if DATABASE_ASYNC:
+    async_engine = create_async_database_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, 
+        autoflush=False, 
+        expire_on_commit=False
+        )
+
 # define the base.
 Base = declarative_base()
 
@@ -39,9 +176,70 @@ SECRET_KEY = os.environ.get("SECRET_KEY")
 REFRESH_KEY = os.environ.get("REFRESH_KEY")
 ALGORITHM = os.environ.get("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES"))
+REFRESH_TOKEN_EXPIRE_MINUTES = int(os.environ.get("REFRESH_TOKEN_EXPIRE_MINUTES", 60 * 24 * 7))
+
+# revoked tokens (logout), optionally persisted in the RevokedTokens table.
+TOKEN_REVOCATION_PERSIST = os.environ.get("TOKEN_REVOCATION_PERSIST", "false").lower() in ("1", "true", "yes")
+TOKEN_REVOCATION_PURGE_INTERVAL = int(os.environ.get("TOKEN_REVOCATION_PURGE_INTERVAL", 60))
+
+# authenticated users cache, entries never outlive the access token.
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL = int(os.environ.get("AUTH_CACHE_TTL", 300))
+
+# catalog responses cache, "memory" (per process) or "redis" (shared by the workers).
+RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory").lower()
+# worker processes, as told to uvicorn and gunicorn.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+# a memory cache only sees the commits of its own worker, it is off by default with several.
+RESPONSE_CACHE_ENABLED = os.environ.get(
+    "RESPONSE_CACHE_ENABLED",
+    "true" if RESPONSE_CACHE_BACKEND == "redis" or WEB_CONCURRENCY <= 1 else "false"
+    ).lower() in ("1", "true", "yes")
+RESPONSE_CACHE_REDIS_URL = os.environ.get("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 1024))
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", 60))
+# serialize the list and detail responses straight from the rows, without pydantic models.
+FAST_RESPONSES = os.environ.get("FAST_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+# share of the requests profiled (0 disables it), with a Server-Timing header on their responses.
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 0))
+PROFILING_SERVER_TIMING = os.environ.get("PROFILING_SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+
+# request, SQL, pool and cache metrics served at GET /metrics.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# statements slower than this (milliseconds, 0 disables it) are logged with their plan.
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", 100))
+# rotating JSON lines file of the slow queries, opt-in: empty (default) only keeps them in memory.
+SLOW_QUERY_LOG_PATH = os.environ.get("SLOW_QUERY_LOG_PATH", "")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get("SLOW_QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024))
+SLOW_QUERY_LOG_BACKUP_COUNT = int(os.environ.get("SLOW_QUERY_LOG_BACKUP_COUNT", 5))
+# usernames allowed on the /api/admin routes, comma separated: empty (default) allows nobody.
+ADMIN_USERNAMES = frozenset(name.strip() for name in os.environ.get("ADMIN_USERNAMES", "").split(",") if name.strip())
+
+# bulk book creation, rows per executemany and items accepted per request.
+BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", 1000))
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", 100000))
+
+# rows fetched from the server-side cursor per chunk of the streamed exports.
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+
+# catalog dumps import, rows per transaction and validation processes.
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", 5000))
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", min(os.cpu_count() or 1, 4)))
+# uploaded dumps and their checkpoints are kept here, so a crashed import can be resumed.
+IMPORT_DIRECTORY = os.environ.get("IMPORT_DIRECTORY", os.path.join(Path.cwd(), "imports"))
+
+# suggestions index, loaded again from the database every interval (seconds).
+SUGGEST_REFRESH_INTERVAL = int(os.environ.get("SUGGEST_REFRESH_INTERVAL", 300))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt runs in a process pool, 0 workers runs it inline in the request.
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", min(os.cpu_count() or 1, 4)))
+# operations allowed to wait for a worker before requests are rejected with 429.
+PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get("PASSWORD_HASH_QUEUE_SIZE", 32))
+
 oauth2_schema = OAuth2PasswordBearer(tokenUrl="/api/token")
 
 # get host and port from env file.
@@ -56,6 +254,10 @@ def get_database():
         yield database
     finally:
         database.close()
+
+async def get_async_database():
+    async with AsyncSessionLocal() as database:
+        yield database
     
 # feature for API
 app_description = """
@@ -101,5 +303,21 @@ tags_metadata = [
     {
         "name": "authentications",
         "description": "Operations with authentications"
+    },
+    {
+        "name": "suggest",
+        "description": "Operations with autocomplete suggestions"
+    },
+    {
+        "name": "export",
+        "description": "Operations with catalog exports"
+    },
+    {
+        "name": "import",
+        "description": "Operations with catalog imports"
+    },
+    {
+        "name": "admin",
+        "description": "Operations with diagnostics"
     }
 ]
\ No newline at end of file
@@ -0,0 +1,138 @@
+# app/controllers/asynchronous/authentication_controller.py
+
+from app.config import (
+    SECRET_KEY, 
+    ALGORITHM, 
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    oauth2_schema
+    )
+from datetime import timedelta
+from fastapi import (
+    Depends, 
+    HTTPException, 
+    status,
+    )
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.controllers.authentication_controller import (
+    create_access_token,
+    create_refresh_token
+    )
+from app.controllers import authentication_controller
+from app.controllers.asynchronous.user_controller import get_user
+from app.config import get_async_database
+from app.cache import principal_cache
+from app.revocation import revocation_store
+from app.hashing import password_hasher
+from app import metrics, models, schemas
+
+
+async def verify_password(plain_password: str, hashed_password: str):
+    return await password_hasher.verify_async(plain_password, hashed_password)
+
+async def authenticate_user(username: str, password: str, session: AsyncSession):
+    database_user = await get_user(
+        username=username, 
+        session=session
+        )
+
+    if not await verify_password(password, database_user.password):
+        return False
+
+    return database_user
+
+@metrics.labelled("authentication_controller.get_current_user")
+async def get_current_user(
+        token: str = Depends(oauth2_schema), 
+        session: AsyncSession = Depends(get_async_database)
+        ):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials"
+        )
+    cached = principal_cache.get(token)
+
+    if cached is not None:
+        principal, jti = cached
+
+        if revocation_store.is_revoked(jti):
+            raise credentials_exception
+
+        return principal
+    
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        username: str = payload.get("sub")
+
+        if username is None or payload.get("type") != "access":
+            raise credentials_exception
+
+        if revocation_store.is_revoked(payload.get("jti")):
+            raise credentials_exception
+    except JWTError:
+        raise credentials_exception
+    
+    database_user = await get_user(
+        username=username, 
+        session=session
+        )
+    
+    if database_user is None:
+        raise credentials_exception
+    
+    principal = schemas.UserPrincipal.model_validate(database_user)
+    principal_cache.set(token, principal, expires_at=payload.get("exp"), jti=payload.get("jti"))
+    return principal
+
+async def get_current_admin(user: schemas.UserSchema = Depends(get_current_user)):
+    return authentication_controller.get_current_admin(user)
+
+@metrics.labelled("authentication_controller.get_access_token")
+async def get_access_token(
+        form_data: OAuth2PasswordRequestForm = Depends(), 
+        session: AsyncSession = Depends(get_async_database)
+        ):
+    database_user = await authenticate_user(
+        session=session, 
+        username=form_data.username, 
+        password=form_data.password
+        )
+
+    if not database_user:
+        raise HTTPException(
+            status_code=400, 
+            detail="Username or password incorrect."
+            )
+
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": database_user.username},
+        expires_delta=access_token_expires,
+        )
+    refresh_token = create_refresh_token(
+        data={"sub": database_user.username}
+        )
+
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer"
+    }
+
+@metrics.labelled("authentication_controller.refresh_access_token")
+async def refresh_access_token(refresh: schemas.RefreshTokenSchema, session: AsyncSession):
+    username = authentication_controller.refresh_token_username(refresh)
+    database_user = await session.scalar(select(models.User.uuid).where(models.User.username == username))
+
+    if database_user is None:
+        raise authentication_controller.refresh_exception()
+
+    return authentication_controller.refreshed_tokens(username, refresh)
+
+@metrics.labelled("authentication_controller.logout")
+async def logout(token: str, refresh: schemas.RefreshTokenSchema | None = None):
+    # the persisted revocation store writes through the sync engine.
+    return await run_in_threadpool(authentication_controller.logout, token=token, refresh=refresh)
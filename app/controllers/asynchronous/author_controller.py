@@ -0,0 +1,180 @@
+# app/controllers/asynchronous/author_controller.py
+
+"""Async CRUD Logic for Author"""
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.orm.attributes import set_committed_value
+from app import (
+    metrics,
+    models, 
+    schemas
+    )
+from app.controllers.author_controller import books_page_versions, books_pages_statement, set_books_pages
+from app.controllers.loader_options import author_options, fields_options
+from app.etag import make_etag, check_if_match, precondition_failed
+from app.fieldsets import Fieldset
+from app.pagination import paginate, make_page, make_pages
+
+
+"""
+Make sure all of this CRUD logic are used in async route.
+"""
+@metrics.labelled("author_controller.get_author")
+async def get_author(
+        name: str,
+        session: AsyncSession,
+        books_cursor: str | None = None,
+        books_limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    data = await session.scalar(
+        select(models.Author)
+        .options(*fields_options(models.Author, fieldset, paged=("books",)))
+        .where(models.Author.name == name)
+        )
+    if not data:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    if fieldset is not None and not fieldset.wants("books", "books_next_cursor"):
+        return data
+    
+    # only one bounded page of the books relationship is loaded.
+    books = await get_books_page(
+        author_id=data.uuid, 
+        session=session, 
+        cursor=books_cursor, 
+        limit=books_limit,
+        fieldset=fieldset.nested("books") if fieldset else None
+        )
+    set_committed_value(data, "books", books["data"])
+    data.books_next_cursor = books["next_cursor"]
+    return data
+
+@metrics.labelled("author_controller.get_author_books")
+async def get_author_books(
+        name: str,
+        session: AsyncSession,
+        cursor: str | None = None,
+        limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    author_id = await session.scalar(select(models.Author.uuid).where(models.Author.name == name))
+    if not author_id:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    return await get_books_page(
+        author_id=author_id, 
+        session=session, 
+        cursor=cursor, 
+        limit=limit,
+        fieldset=fieldset
+        )
+
+async def get_books_page(
+        author_id: str,
+        session: AsyncSession,
+        cursor: str | None = None,
+        limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    keys = (models.Book.uuid,)
+    statement = paginate(
+        select(models.Book).options(*fields_options(models.Book, fieldset)).where(models.Book.author_id == author_id), 
+        keys, 
+        cursor=cursor, 
+        limit=limit
+        )
+    return make_page((await session.scalars(statement)).all(), keys, limit=limit)
+
+@metrics.labelled("author_controller.get_author_etag")
+async def get_author_etag(
+        name: str,
+        session: AsyncSession,
+        books_cursor: str | None = None,
+        books_limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    author = (await session.execute(
+        select(models.Author.uuid, models.Author.version).where(models.Author.name == name)
+        )).first()
+    if not author:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    books = (await session.execute(books_page_versions(author.uuid, cursor=books_cursor, limit=books_limit))).all()
+    return make_etag([author, *books], version=author.version, variant=fieldset.variant if fieldset else None)
+
+@metrics.labelled("author_controller.get_all_authors")
+async def get_all_authors(
+        session: AsyncSession,
+        cursor: str | None = None,
+        limit: int = 100,
+        skip: int = 0,
+        books_limit: int = 10,
+        fieldset: Fieldset | None = None
+        ):
+    keys = (models.Author.uuid,)
+    statement = paginate(select(models.Author).options(*author_options(fieldset)), keys, cursor=cursor, limit=limit, skip=skip)
+    page = make_page((await session.scalars(statement)).all(), keys, limit=limit)
+
+    if not page["data"] or (fieldset is not None and not fieldset.wants("books", "books_next_cursor")):
+        return page
+
+    # one bounded page of books per author, all of them in one query.
+    author_ids = [author.uuid for author in page["data"]]
+    statement = books_pages_statement(author_ids, limit=books_limit, fieldset=fieldset.nested("books") if fieldset else None)
+    set_books_pages(page["data"], make_pages((await session.execute(statement)).all(), author_ids, (models.Book.uuid,), limit=books_limit))
+    return page
+
+@metrics.labelled("author_controller.create_author")
+async def create_author(author: schemas.AuthorSchemaCreate, session: AsyncSession):
+    database_author = models.Author(
+        uuid=author._uuid,
+        name=author.name,
+        birth_date=author.birth_date,
+        nationality=author.nationality,
+        biography=author.biography,
+        timestamp=author.timestamp
+        )
+    session.add(database_author)
+    await session.commit()
+    await session.refresh(database_author)
+    return database_author
+
+@metrics.labelled("author_controller.update_author")
+async def update_author(name: str, author: schemas.AuthorSchemaUpdate, session: AsyncSession, if_match: str | None = None):
+    database_author = await session.scalar(select(models.Author).where(models.Author.name == name))
+
+    if not database_author:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    check_if_match(if_match, database_author.version)
+    author_data = author.model_dump(exclude_unset=True)
+
+    for key, value in author_data.items():
+        setattr(database_author, key, value)
+    
+    try:
+        await session.commit()
+    except StaleDataError:
+        # another request updated the row after it was read.
+        await session.rollback()
+        raise precondition_failed()
+
+    await session.refresh(database_author)
+    return database_author
+
+@metrics.labelled("author_controller.delete_author")
+async def delete_author(name: str, session: AsyncSession):
+    database_author = await session.scalar(select(models.Author).where(models.Author.name == name))
+
+    if not database_author:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    await session.delete(database_author)
+    await session.commit()
+    return {
+        "message": f"Author '{name}' data deleted successfully!"
+    }
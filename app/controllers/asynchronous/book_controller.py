@@ -0,0 +1,159 @@
+# app/controllers/asynchronous/book_controller.py
+
+"""Async CRUD Logic for Book"""
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from app import (
+    metrics,
+    models, 
+    schemas
+    )
+from app.config import BULK_CHUNK_SIZE
+from app.controllers.book_controller import (
+    book_filters,
+    book_versions,
+    books_page_versions,
+    filtered_books,
+    page_keys,
+    parse_bulk_body
+    )
+from app.controllers import book_controller
+from app.controllers.loader_options import book_options
+from app.fieldsets import Fieldset
+from app.etag import make_etag, check_if_match, precondition_failed
+from app.pagination import paginate, make_page
+
+
+"""
+Make sure all of this CRUD logic are used in async route.
+"""
+@metrics.labelled("book_controller.get_book")
+async def get_book(title: str, session: AsyncSession, fieldset: Fieldset | None = None):
+    data = await session.scalar(
+        select(models.Book).options(*book_options(fieldset)).where(models.Book.title == title)
+        )
+    if not data:
+        raise HTTPException(status_code=404, detail=f"'{title}' not found.")
+
+    return data
+
+@metrics.labelled("book_controller.get_all_books")
+async def get_all_books(
+        session: AsyncSession,
+        cursor: str | None = None,
+        limit: int = 100,
+        skip: int = 0,
+        filters: schemas.BookFilterSchema | None = None,
+        fieldset: Fieldset | None = None
+        ):
+    statement, keys, descending = filtered_books(select(models.Book), filters)
+    statement = statement.options(*book_options(fieldset, required=page_keys(keys)))
+    statement = paginate(statement, keys, cursor=cursor, limit=limit, descending=descending, skip=skip)
+    return make_page((await session.scalars(statement)).all(), page_keys(keys), limit=limit)
+
+@metrics.labelled("book_controller.get_book_etag")
+async def get_book_etag(title: str, session: AsyncSession, fieldset: Fieldset | None = None):
+    rows = (await session.execute(book_versions(models.Book.title == title))).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"'{title}' not found.")
+
+    return make_etag(rows, version=rows[0][1], variant=fieldset.variant if fieldset else None)
+
+@metrics.labelled("book_controller.get_all_books_etag")
+async def get_all_books_etag(
+        session: AsyncSession,
+        cursor: str | None = None,
+        limit: int = 100,
+        skip: int = 0,
+        filters: schemas.BookFilterSchema | None = None,
+        fieldset: Fieldset | None = None
+        ):
+    return make_etag(
+        (await session.execute(books_page_versions(cursor=cursor, limit=limit, skip=skip, filters=filters))).all(),
+        variant=fieldset.variant if fieldset else None
+        )
+
+@metrics.labelled("book_controller.create_book")
+async def create_book(author_id: str, book: schemas.BookSchemaCreate, session: AsyncSession):
+    database_book = models.Book(
+        uuid=book._uuid,
+        isbn=book.isbn,
+        title=book.title,
+        author_id=author_id,
+        pages=book.pages,
+        synopsis=book.synopsis,
+        publisher=book.publisher,
+        published=book.published,
+        timestamp=book.timestamp,
+        )
+    session.add(database_book)
+    await session.commit()
+    await session.refresh(database_book)
+    return database_book
+
+@metrics.labelled("book_controller.create_books_bulk")
+async def create_books_bulk(items: list, session: AsyncSession, chunk_size: int = BULK_CHUNK_SIZE):
+    # the chunks are plain executemany batches, run the sync implementation on this session.
+    return await session.run_sync(
+        lambda sync_session: book_controller.create_books_bulk(
+            items=items,
+            session=sync_session,
+            chunk_size=chunk_size
+            )
+        )
+
+@metrics.labelled("book_controller.update_book")
+async def update_book(title: str, book: schemas.BookSchemaUpdate, session: AsyncSession, if_match: str | None = None):
+    database_book = await session.scalar(select(models.Book).where(models.Book.title == title))
+    
+    if not database_book:
+        raise HTTPException(status_code=404, detail=f"'{title}' not found.")
+    
+    check_if_match(if_match, database_book.version)
+    book_data = book.model_dump(exclude_unset=True)
+
+    for key, value in book_data.items():
+        setattr(database_book, key, value)
+    
+    try:
+        await session.commit()
+    except StaleDataError:
+        # another request updated the row after it was read.
+        await session.rollback()
+        raise precondition_failed()
+
+    await session.refresh(database_book)
+    return database_book
+
+@metrics.labelled("book_controller.delete_book")
+async def delete_book(title: str, session: AsyncSession):
+    database_book = await session.scalar(select(models.Book).where(models.Book.title == title))
+
+    if not database_book:
+        raise HTTPException(status_code=404, detail=f"'{title}' not found.")
+    
+    await session.delete(database_book)
+    await session.commit()
+    return {
+        "message": f"'{title}' book deleted successfully!"
+    }
+
+@metrics.labelled("book_controller.update_author_by_title")
+async def update_author_by_title(title: str, book: schemas.BookAuthorSchemaUpdate, session: AsyncSession):
+    database_book = await session.scalar(select(models.Book).where(models.Book.title == title))
+    
+    if not database_book:
+        raise HTTPException(status_code=404, detail=f"'{title}' not found.")
+    
+    data = book.model_dump(exclude_unset=False)
+
+    for key, value in data.items():
+        setattr(database_book, key, value)
+    
+    await session.commit()
+    # BookAuthorSchema serializes the author, load it before leaving the event loop.
+    await session.refresh(database_book, ["author"])
+    return database_book
@@ -0,0 +1,111 @@
+# app/controllers/asynchronous/book_genre_controller.py
+
+from fastapi import Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import (
+    metrics,
+    models, 
+    schemas
+    )
+from app.controllers.asynchronous.authentication_controller import get_current_user
+from app.controllers.loader_options import fields_options
+from app.fieldsets import Fieldset
+from app.pagination import paginate, make_page
+
+
+"""
+Make sure all of this CRUD logic are used in async route.
+"""
+@metrics.labelled("book_genre_controller.get_all_book_genres")
+async def get_all_book_genres(
+        session: AsyncSession, 
+        cursor: str | None = None, 
+        limit: int = 100,
+        skip: int = 0,
+        auth: schemas.UserSchema = Depends(get_current_user),
+        fieldset: Fieldset | None = None
+        ):
+    keys = (models.BookGenre.uuid,)
+    statement = paginate(
+        select(models.BookGenre).options(*fields_options(models.BookGenre, fieldset)),
+        keys,
+        cursor=cursor,
+        limit=limit,
+        skip=skip
+        )
+    if auth: return make_page((await session.scalars(statement)).all(), keys, limit=limit)
+
+@metrics.labelled("book_genre_controller.create_book_genres")
+async def create_book_genres(
+        book_genre: schemas.BookGenreSchema, 
+        session: AsyncSession,
+        auth: schemas.UserSchema = Depends(get_current_user)
+        ):
+    if auth:
+        database_book = await session.scalar(select(models.Book).where(models.Book.uuid == book_genre.book_id))
+        database_genre = await session.scalar(select(models.Genre).where(models.Genre.uuid == book_genre.genre_id))
+        database_book_genre = models.BookGenre(
+            uuid=book_genre._uuid,
+            book_id=database_book.uuid,
+            genre_id=database_genre.uuid
+            )
+
+        session.add(database_book_genre)
+
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(status_code=409, detail="The book already has this genre.")
+
+        await session.refresh(database_book_genre)
+        return database_book_genre
+
+@metrics.labelled("book_genre_controller.update_book_genre")
+async def update_book_genre(
+        book_genre_id: str,
+        book_genre: schemas.BookGenreUpdateSchema,
+        session: AsyncSession,
+        auth: schemas.UserSchema = Depends(get_current_user)
+        ):
+    if auth:
+        database_book_genre = await session.scalar(
+            select(models.BookGenre).where(models.BookGenre.uuid == book_genre_id)
+            )
+
+        if not database_book_genre:
+            raise HTTPException(status_code=404, detail=f"Book Genre with ID '{book_genre_id}' not found.")
+
+        data = book_genre.model_dump(exclude_unset=True)
+
+        for key, value in data.items():
+            setattr(database_book_genre, key, value)
+
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            raise HTTPException(status_code=409, detail="The book already has this genre.")
+
+        await session.refresh(database_book_genre)
+        return database_book_genre
+
+@metrics.labelled("book_genre_controller.delete_book_genre")
+async def delete_book_genre(
+        book_genre_id: str,
+        session: AsyncSession,
+        auth: schemas.UserSchema = Depends(get_current_user)
+        ):
+    if auth:
+        data = await session.scalar(select(models.BookGenre).where(models.BookGenre.uuid == book_genre_id))
+
+        if not data:
+            raise HTTPException(status_code=404, detail=f"Book Genre with id '{book_genre_id}' not found.")
+        
+        await session.delete(data)
+        await session.commit()
+        return {
+            "message": "BookGenre deleted successfully!"
+        }
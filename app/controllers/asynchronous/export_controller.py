@@ -0,0 +1,28 @@
+# app/controllers/asynchronous/export_controller.py
+
+"""Async streaming export of the catalog tables."""
+
+from app import config, metrics
+from app.controllers.export_controller import (
+    check_export,
+    export_statement,
+    format_batch,
+    EXPORT_FORMATS
+    )
+
+
+@metrics.labelled("export_controller.export_rows")
+async def export_rows(resource: str, format: str):
+    """Async generator of the export body, streamed from its own `AsyncSession`."""
+    async with config.AsyncSessionLocal() as session:
+        statement = export_statement(resource, session.bind.dialect.name)
+        result = await session.stream(statement)
+        columns = list(result.keys())
+        header = True
+
+        async for rows in result.partitions():
+            yield format_batch(columns, rows, format, header=header)
+            header = False
+
+        if header and format == "csv":
+            yield format_batch(columns, [], format, header=True)
@@ -0,0 +1,183 @@
+# app/controllers/asynchronous/genre_controller.py
+
+"""Async CRUD Logic for Genre"""
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.orm.attributes import set_committed_value
+from app import (
+    metrics,
+    models, 
+    schemas
+    )
+from app.controllers.genre_controller import books_page_versions, books_pages_statement, set_books_pages
+from app.controllers.loader_options import genre_options, fields_options
+from app.etag import make_etag, check_if_match, precondition_failed
+from app.fieldsets import Fieldset
+from app.pagination import paginate, make_page, make_pages
+
+
+"""
+Make sure all of this CRUD logic are used in async route.
+"""
+@metrics.labelled("genre_controller.get_genre")
+async def get_genre(
+        name: str,
+        session: AsyncSession,
+        books_cursor: str | None = None,
+        books_limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    data = await session.scalar(
+        select(models.Genre)
+        .options(*fields_options(models.Genre, fieldset, paged=("books",)))
+        .where(models.Genre.name == name)
+        )
+    if not data:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    if fieldset is not None and not fieldset.wants("books", "books_next_cursor"):
+        return data
+    
+    # only one bounded page of the books relationship is loaded.
+    books = await get_books_page(
+        genre_id=data.uuid, 
+        session=session, 
+        cursor=books_cursor, 
+        limit=books_limit,
+        fieldset=fieldset.nested("books") if fieldset else None
+        )
+    set_committed_value(data, "books", books["data"])
+    data.books_next_cursor = books["next_cursor"]
+    return data
+
+@metrics.labelled("genre_controller.get_genre_books")
+async def get_genre_books(
+        name: str,
+        session: AsyncSession,
+        cursor: str | None = None,
+        limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    genre_id = await session.scalar(select(models.Genre.uuid).where(models.Genre.name == name))
+    if not genre_id:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    return await get_books_page(
+        genre_id=genre_id, 
+        session=session, 
+        cursor=cursor, 
+        limit=limit,
+        fieldset=fieldset
+        )
+
+async def get_books_page(
+        genre_id: str,
+        session: AsyncSession,
+        cursor: str | None = None,
+        limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    # seek on BookGenres.book_id so the (genre_id, book_id) pairs are walked in order,
+    # the cursor value is the same as Book.uuid.
+    statement = paginate(
+        select(models.Book)
+        .options(*fields_options(models.Book, fieldset))
+        .join(models.BookGenre, models.BookGenre.book_id == models.Book.uuid)
+        .where(models.BookGenre.genre_id == genre_id), 
+        (models.BookGenre.book_id,), 
+        cursor=cursor, 
+        limit=limit
+        )
+    return make_page((await session.scalars(statement)).all(), (models.Book.uuid,), limit=limit)
+
+@metrics.labelled("genre_controller.get_genre_etag")
+async def get_genre_etag(
+        name: str,
+        session: AsyncSession,
+        books_cursor: str | None = None,
+        books_limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    genre = (await session.execute(
+        select(models.Genre.uuid, models.Genre.version).where(models.Genre.name == name)
+        )).first()
+    if not genre:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    books = (await session.execute(books_page_versions(genre.uuid, cursor=books_cursor, limit=books_limit))).all()
+    return make_etag([genre, *books], version=genre.version, variant=fieldset.variant if fieldset else None)
+
+@metrics.labelled("genre_controller.get_genres")
+async def get_genres(
+        session: AsyncSession,
+        cursor: str | None = None,
+        limit: int = 100,
+        skip: int = 0,
+        books_limit: int = 10,
+        fieldset: Fieldset | None = None
+        ):
+    keys = (models.Genre.uuid,)
+    statement = paginate(select(models.Genre).options(*genre_options(fieldset)), keys, cursor=cursor, limit=limit, skip=skip)
+    page = make_page((await session.scalars(statement)).all(), keys, limit=limit)
+
+    if not page["data"] or (fieldset is not None and not fieldset.wants("books", "books_next_cursor")):
+        return page
+
+    # one bounded page of books per genre, all of them in one query.
+    genre_ids = [genre.uuid for genre in page["data"]]
+    statement = books_pages_statement(genre_ids, limit=books_limit, fieldset=fieldset.nested("books") if fieldset else None)
+    set_books_pages(page["data"], make_pages((await session.execute(statement)).all(), genre_ids, (models.Book.uuid,), limit=books_limit))
+    return page
+
+@metrics.labelled("genre_controller.create_genre")
+async def create_genre(genre: schemas.GenreSchemaCreate, session: AsyncSession):
+    database_genre = models.Genre(
+        uuid=genre._uuid,
+        name=genre.name,
+        description=genre.description,
+        timestamp=genre.timestamp
+    )
+
+    session.add(database_genre)
+    await session.commit()
+    await session.refresh(database_genre)
+    return database_genre
+
+@metrics.labelled("genre_controller.update_genre")
+async def update_genre(name: str, genre: schemas.GenreSchemaUpdate, session: AsyncSession, if_match: str | None = None):
+    database_genre = await session.scalar(select(models.Genre).where(models.Genre.name == name))
+
+    if not database_genre:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+    
+    check_if_match(if_match, database_genre.version)
+    genre_data = genre.model_dump(exclude_unset=True)
+
+    for key, value in genre_data.items():
+        setattr(database_genre, key, value)
+
+    try:
+        await session.commit()
+    except StaleDataError:
+        # another request updated the row after it was read.
+        await session.rollback()
+        raise precondition_failed()
+
+    await session.refresh(database_genre)
+    return database_genre
+
+@metrics.labelled("genre_controller.delete_genre")
+async def delete_genre(name: str, session: AsyncSession):
+    database_genre = await session.scalar(select(models.Genre).where(models.Genre.name == name))
+
+    if not database_genre:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    await session.delete(database_genre)
+    await session.commit()
+    return {
+        "message": "Genre deleted successfully!"
+    }
@@ -0,0 +1,20 @@
+# app/controllers/asynchronous/import_controller.py
+
+"""Async import of uploaded catalog dumps."""
+
+from fastapi import BackgroundTasks, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from app.controllers import import_controller
+
+
+async def start_import(resource: str, dump: UploadFile, background_tasks: BackgroundTasks):
+    # copying the upload is blocking file I/O.
+    return await run_in_threadpool(
+        import_controller.start_import,
+        resource=resource,
+        dump=dump,
+        background_tasks=background_tasks
+        )
+
+async def get_import(job: str):
+    return await run_in_threadpool(import_controller.get_import, job=job)
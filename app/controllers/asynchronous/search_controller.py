@@ -0,0 +1,25 @@
+# app/controllers/asynchronous/search_controller.py
+
+"""Async full-text search of the books."""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import metrics
+from app.controllers.search_controller import ranked_page, books_statement, ranked_books
+from app.fieldsets import Fieldset
+from app.pagination import make_page
+
+
+"""
+Make sure all of this CRUD logic are used in async route.
+"""
+@metrics.labelled("search_controller.search_books")
+async def search_books(
+        q: str,
+        session: AsyncSession,
+        cursor: str | None = None,
+        limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    keys, statement = ranked_page(q, cursor=cursor, limit=limit)
+    page = make_page((await session.execute(statement)).all(), keys, limit=limit)
+    return ranked_books(page, (await session.execute(books_statement(page, fieldset))).all())
@@ -0,0 +1,87 @@
+# app/controllers/asynchronous/user_controller.py
+
+"""Async CRUD Logic for User"""
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import (
+    metrics,
+    models, 
+    schemas
+    )
+from app.cache import principal_cache
+from app.controllers.loader_options import fields_options
+from app.fieldsets import Fieldset
+from app.hashing import password_hasher
+from app.pagination import paginate, make_page
+
+# hash the password first, bcrypt runs in the password hashing process pool.
+async def password_hash(password: str):
+    return await password_hasher.hash_async(password)
+
+@metrics.labelled("user_controller.get_all_users")
+async def get_all_users(session: AsyncSession, cursor: str | None = None, limit: int = 100, skip: int = 0, fieldset: Fieldset | None = None):
+    keys = (models.User.uuid,)
+    statement = paginate(select(models.User).options(*fields_options(models.User, fieldset)), keys, cursor=cursor, limit=limit, skip=skip)
+    return make_page((await session.scalars(statement)).all(), keys, limit=limit)
+
+@metrics.labelled("user_controller.create_user")
+async def create_user(user: schemas.UserSchemaCreate, session: AsyncSession):
+    database_user = models.User(
+        uuid=user._uuid,
+        username=user.username,
+        password=await password_hash(user.password),
+        description=user.description,
+        timestamp=user.timestamp
+    )
+    session.add(database_user)
+    await session.commit()
+    await session.refresh(database_user)
+    return database_user
+
+@metrics.labelled("user_controller.get_user")
+async def get_user(username: str, session: AsyncSession, fieldset: Fieldset | None = None):
+    data = await session.scalar(
+        select(models.User)
+        .options(*fields_options(models.User, fieldset))
+        .where(models.User.username == username)
+        )
+    if not data:
+        raise HTTPException(status_code=404, detail=f"User '{username}' not found.")
+        
+    return data
+
+@metrics.labelled("user_controller.update_user")
+async def update_user(username: str, user: schemas.UserSchemaUpdate, session: AsyncSession):
+    database_user = await session.scalar(select(models.User).where(models.User.username == username))
+    if not database_user:
+        raise HTTPException(status_code=404, detail=f"User '{username}' not found.")
+
+    # for password only
+    hash_password = await password_hash(user.password)
+
+    # update user data
+    database_user.username = user.username
+    database_user.password = hash_password
+    database_user.description = user.description
+    database_user.timestamp = user._timestamp
+
+    await session.commit()
+    await session.refresh(database_user)
+    # cached principals of the old username must authenticate again.
+    principal_cache.invalidate(username)
+    return database_user
+
+@metrics.labelled("user_controller.delete_user")
+async def delete_user(username: str, session: AsyncSession):
+    database_user = await session.scalar(select(models.User).where(models.User.username == username))
+    if not database_user:
+        raise HTTPException(status_code=404, detail=f"User '{username}' not found.")
+
+    await session.delete(database_user)
+    await session.commit()
+    principal_cache.invalidate(username)
+    return {
+        "message": "User deleted successfully!"
+    }
@@ -2,8 +2,11 @@
 
 from app.config import (
     SECRET_KEY, 
+    REFRESH_KEY,
     ALGORITHM, 
     ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_TOKEN_EXPIRE_MINUTES,
+    ADMIN_USERNAMES,
     oauth2_schema
     )
 from datetime import (
@@ -11,6 +14,7 @@ from datetime import (
     timedelta
     )
 from typing import Annotated
+from uuid import uuid4
 from fastapi import (
     Depends, 
     HTTPException, 
@@ -21,12 +25,15 @@ from fastapi.security import OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from app.controllers.user_controller import get_user
-from app.config import pwd_context, get_database
-from app import schemas
+from app.config import get_database
+from app.cache import principal_cache
+from app.hashing import password_hasher
+from app.revocation import revocation_store
+from app import metrics, models, schemas
 
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
 
 def authenticate_user(username: str, password: str, session: Session):
     database_user = get_user(
@@ -35,7 +42,7 @@ def authenticate_user(username: str, password: str, session: Session):
         )
 
     if not verify_password(password, database_user.password):
-        return f"Not match! {password}, {database_user.password}"
+        return False
 
     return database_user
 
@@ -48,12 +55,32 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
         expire = datetime.utcnow() + timedelta(minutes=15)
 
     to_encode.update({
-        "exp": expire
+        "exp": expire,
+        "jti": uuid4().hex,
+        "type": "access"
     })
     encode_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
     return encode_jwt
 
+def create_refresh_token(data: dict, expires_delta: timedelta | None = None):
+    to_encode = data.copy()
+
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
+
+    to_encode.update({
+        "exp": expire,
+        "jti": uuid4().hex,
+        "type": "refresh"
+    })
+    encode_jwt = jwt.encode(to_encode, REFRESH_KEY, algorithm=ALGORITHM)
+
+    return encode_jwt
+
+@metrics.labelled("authentication_controller.get_current_user")
 def get_current_user(
         token: str = Depends(oauth2_schema), 
         session: Session = Depends(get_database)
@@ -62,12 +89,24 @@ def get_current_user(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials"
         )
+    cached = principal_cache.get(token)
+
+    if cached is not None:
+        principal, jti = cached
+
+        if revocation_store.is_revoked(jti):
+            raise credentials_exception
+
+        return principal
     
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
 
-        if username is None:
+        if username is None or payload.get("type") != "access":
+            raise credentials_exception
+
+        if revocation_store.is_revoked(payload.get("jti")):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
@@ -80,7 +119,19 @@ def get_current_user(
     if database_user is None:
         raise credentials_exception
     
-    return database_user
+    principal = schemas.UserPrincipal.model_validate(database_user)
+    principal_cache.set(token, principal, expires_at=payload.get("exp"), jti=payload.get("jti"))
+    return principal
+
+def get_current_admin(user: schemas.UserSchema = Depends(get_current_user)):
+    """The current user, when `ADMIN_USERNAMES` lists it; anyone can sign up, so a token is not enough."""
+    if user.username not in ADMIN_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only an administrator can use this route."
+            )
+
+    return user
 
 def get_current_active_user(
         user: Annotated[schemas.UserSchema, Security(
@@ -88,6 +139,7 @@ def get_current_active_user(
             )]):
     return user
 
+@metrics.labelled("authentication_controller.get_access_token")
 def get_access_token(
         form_data: OAuth2PasswordRequestForm = Depends(), 
         session: Session = Depends(get_database)
@@ -109,12 +161,90 @@ def get_access_token(
         data={"sub": database_user.username},
         expires_delta=access_token_expires,
         )
+    refresh_token = create_refresh_token(
+        data={"sub": database_user.username}
+        )
+
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer"
+    }
+
+def refresh_exception():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate refresh token"
+        )
+
+def refresh_token_username(refresh: schemas.RefreshTokenSchema) -> str:
+    """The `sub` of a refresh token, when it is valid and not revoked."""
+    try:
+        payload = jwt.decode(refresh.refresh_token, REFRESH_KEY, algorithms=[ALGORITHM])
+        username: str = payload.get("sub")
+
+        if username is None or payload.get("type") != "refresh":
+            raise refresh_exception()
+
+        if revocation_store.is_revoked(payload.get("jti")):
+            raise refresh_exception()
+    except JWTError:
+        raise refresh_exception()
+
+    return username
+
+def refreshed_tokens(username: str, refresh: schemas.RefreshTokenSchema):
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": username},
+        expires_delta=access_token_expires,
+        )
 
     return {
         "access_token": access_token,
+        "refresh_token": refresh.refresh_token,
         "token_type": "bearer"
     }
 
-def logout():
-    """TODO: logout implementation. delete the token or session"""
-    pass
\ No newline at end of file
+@metrics.labelled("authentication_controller.refresh_access_token")
+def refresh_access_token(refresh: schemas.RefreshTokenSchema, session: Session):
+    """
+    Issue a new access token from a refresh token, without bcrypt. The user is looked
+    up by username, a deleted or renamed user can not refresh anymore.
+    """
+    username = refresh_token_username(refresh)
+    database_user = session.query(models.User.uuid).filter(models.User.username == username).first()
+    session.close()
+
+    if database_user is None:
+        raise refresh_exception()
+
+    return refreshed_tokens(username, refresh)
+
+@metrics.labelled("authentication_controller.logout")
+def logout(token: str, refresh: schemas.RefreshTokenSchema | None = None):
+    """Revoke the access token and, when it is given, the refresh token."""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials"
+        )
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        refresh_payload = None
+
+        if refresh is not None:
+            refresh_payload = jwt.decode(refresh.refresh_token, REFRESH_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+
+    # tokens issued without a jti can not be revoked, they only expire.
+    for claims in (payload, refresh_payload):
+        if claims and claims.get("jti"):
+            revocation_store.revoke(claims["jti"], expires_at=claims["exp"])
+
+    principal_cache.delete(token)
+
+    return {
+        "message": "Logged out successfully!"
+    }
\ No newline at end of file
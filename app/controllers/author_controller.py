@@ -3,24 +3,166 @@
 """CRUD Logic for Author"""
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.orm.attributes import set_committed_value
 from app import (
+    metrics,
     models, 
     schemas
     )
+from app.controllers.loader_options import author_options, fields_options
+from app.etag import make_etag, check_if_match, precondition_failed
+from app.fieldsets import Fieldset
+from app.pagination import paginate, make_page, make_pages
 
 """
 Make sure all of this CRUD logic are used in route.
 """
-def get_author(name: str, session: Session):
-    if not session.query(models.Author).filter(models.Author.name == name).first():
+@metrics.labelled("author_controller.get_author")
+def get_author(
+        name: str,
+        session: Session,
+        books_cursor: str | None = None,
+        books_limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    data = (
+        session.query(models.Author)
+        .options(*fields_options(models.Author, fieldset, paged=("books",)))
+        .filter(models.Author.name == name)
+        .first()
+        )
+    if not data:
         raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    if fieldset is not None and not fieldset.wants("books", "books_next_cursor"):
+        return data
     
-    return session.query(models.Author).filter(models.Author.name == name).first()
+    # only one bounded page of the books relationship is loaded.
+    books = get_books_page(
+        author_id=data.uuid, 
+        session=session, 
+        cursor=books_cursor, 
+        limit=books_limit,
+        fieldset=fieldset.nested("books") if fieldset else None
+        )
+    set_committed_value(data, "books", books["data"])
+    data.books_next_cursor = books["next_cursor"]
+    return data
+
+@metrics.labelled("author_controller.get_author_books")
+def get_author_books(
+        name: str,
+        session: Session,
+        cursor: str | None = None,
+        limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    author_id = session.query(models.Author.uuid).filter(models.Author.name == name).scalar()
+    if not author_id:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    return get_books_page(
+        author_id=author_id, 
+        session=session, 
+        cursor=cursor, 
+        limit=limit,
+        fieldset=fieldset
+        )
+
+def get_books_page(
+        author_id: str,
+        session: Session,
+        cursor: str | None = None,
+        limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    keys = (models.Book.uuid,)
+    query = paginate(
+        session.query(models.Book).options(*fields_options(models.Book, fieldset)).filter(models.Book.author_id == author_id), 
+        keys, 
+        cursor=cursor, 
+        limit=limit
+        )
+    return make_page(query.all(), keys, limit=limit)
+
+def books_page_versions(author_id: str, cursor: str | None = None, limit: int = 100):
+    return paginate(
+        select(models.Book.uuid, models.Book.version).where(models.Book.author_id == author_id), 
+        (models.Book.uuid,), 
+        cursor=cursor, 
+        limit=limit
+        )
 
-def get_all_authors(session: Session, skip: int = 0, limit: int = 100):
-    return session.query(models.Author).options(joinedload(models.Author.books)).offset(skip).limit(limit).all()
+@metrics.labelled("author_controller.get_author_etag")
+def get_author_etag(
+        name: str,
+        session: Session,
+        books_cursor: str | None = None,
+        books_limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    author = session.execute(
+        select(models.Author.uuid, models.Author.version).where(models.Author.name == name)
+        ).first()
+    if not author:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    books = session.execute(books_page_versions(author.uuid, cursor=books_cursor, limit=books_limit)).all()
+    return make_etag([author, *books], version=author.version, variant=fieldset.variant if fieldset else None)
+
+def books_pages_statement(author_ids: list, limit: int = 100, fieldset: Fieldset | None = None):
+    """
+    The first page of books of each author, as `(book, author_id)` rows. The books
+    are numbered in the uuid order of the books cursor, on the author_id index.
+    """
+    ranked = (
+        select(
+            models.Book.uuid,
+            models.Book.author_id,
+            func.row_number().over(partition_by=models.Book.author_id, order_by=models.Book.uuid).label("position")
+            )
+        .where(models.Book.author_id.in_(author_ids))
+        .subquery()
+        )
+    return (
+        select(models.Book, ranked.c.author_id)
+        .options(*fields_options(models.Book, fieldset))
+        .join(ranked, ranked.c.uuid == models.Book.uuid)
+        .where(ranked.c.position <= limit + 1)
+        .order_by(ranked.c.author_id, ranked.c.position)
+        )
+
+def set_books_pages(authors: list, pages: dict):
+    for author in authors:
+        set_committed_value(author, "books", pages[author.uuid]["data"])
+        author.books_next_cursor = pages[author.uuid]["next_cursor"]
 
+@metrics.labelled("author_controller.get_all_authors")
+def get_all_authors(
+        session: Session,
+        cursor: str | None = None,
+        limit: int = 100,
+        skip: int = 0,
+        books_limit: int = 10,
+        fieldset: Fieldset | None = None
+        ):
+    keys = (models.Author.uuid,)
+    query = paginate(session.query(models.Author).options(*author_options(fieldset)), keys, cursor=cursor, limit=limit, skip=skip)
+    page = make_page(query.all(), keys, limit=limit)
+
+    if not page["data"] or (fieldset is not None and not fieldset.wants("books", "books_next_cursor")):
+        return page
+
+    # one bounded page of books per author, all of them in one query.
+    author_ids = [author.uuid for author in page["data"]]
+    statement = books_pages_statement(author_ids, limit=books_limit, fieldset=fieldset.nested("books") if fieldset else None)
+    set_books_pages(page["data"], make_pages(session.execute(statement).all(), author_ids, (models.Book.uuid,), limit=books_limit))
+    return page
+
+@metrics.labelled("author_controller.create_author")
 def create_author(author: schemas.AuthorSchemaCreate, session: Session):
     database_author = models.Author(
         uuid=author._uuid,
@@ -35,22 +177,31 @@ def create_author(author: schemas.AuthorSchemaCreate, session: Session):
     session.refresh(database_author)
     return database_author
 
-def update_author(name: str, author: schemas.AuthorSchemaUpdate, session: Session):
+@metrics.labelled("author_controller.update_author")
+def update_author(name: str, author: schemas.AuthorSchemaUpdate, session: Session, if_match: str | None = None):
     database_author = session.query(models.Author).filter(models.Author.name == name).first()
 
     if not database_author:
         raise HTTPException(status_code=404, detail=f"'{name}' not found.")
 
+    check_if_match(if_match, database_author.version)
     author_data = author.model_dump(exclude_unset=True)
 
     for key, value in author_data.items():
         setattr(database_author, key, value)
     
-    session.commit()
+    try:
+        session.commit()
+    except StaleDataError:
+        # another request updated the row after it was read.
+        session.rollback()
+        raise precondition_failed()
+
     session.refresh(database_author)
     session.close()
     return database_author
 
+@metrics.labelled("author_controller.delete_author")
 def delete_author(name: str, session: Session):
     database_author = session.query(models.Author).filter(models.Author.name == name).first()
 
@@ -2,27 +2,222 @@
 
 """CRUD Logic for Book"""
 
-from fastapi import HTTPException
+import json
+
+from datetime import date
+from fastapi import HTTPException, Query
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy import select, insert, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from app import (
+    metrics,
     models, 
     schemas
     )
+from app.config import BULK_CHUNK_SIZE, BULK_MAX_ITEMS
+from app.controllers.loader_options import book_options
+from app.etag import make_etag, check_if_match, precondition_failed
+from app.fieldsets import Fieldset
+from app.pagination import paginate, make_page
 
 
 """
 Make sure all of this CRUD logic are used in route.
 """
-def get_book(title: str, session: Session):
-    data = session.query(models.Book).filter(models.Book.title == title).first()
+@metrics.labelled("book_controller.get_book")
+def get_book(title: str, session: Session, fieldset: Fieldset | None = None):
+    data = session.query(models.Book).options(*book_options(fieldset)).filter(models.Book.title == title).first()
     if not data:
         raise HTTPException(status_code=404, detail=f"'{title}' not found.")
 
     return data
 
-def get_all_books(session: Session, skip: int = 0, limit: int = 100):
-    return session.query(models.Book).offset(skip).limit(limit).all()
+@metrics.labelled("book_controller.get_all_books")
+def get_all_books(
+        session: Session,
+        cursor: str | None = None,
+        limit: int = 100,
+        skip: int = 0,
+        filters: schemas.BookFilterSchema | None = None,
+        fieldset: Fieldset | None = None
+        ):
+    statement, keys, descending = filtered_books(select(models.Book), filters)
+    statement = statement.options(*book_options(fieldset, required=page_keys(keys)))
+    statement = paginate(statement, keys, cursor=cursor, limit=limit, descending=descending, skip=skip)
+    return make_page(session.scalars(statement).all(), page_keys(keys), limit=limit)
+
+# sort orders of the books list, each one walks an index of Books in (column, uuid) order.
+BOOK_SORTS = {
+    "uuid": models.Book.uuid,
+    "title": models.Book.title,
+    "published": models.Book.published,
+    "pages": models.Book.pages,
+}
+
+def book_filters(
+        genre: str | None = Query(default=None, title="Genre", description="Only the books of the genre with this name."),
+        author: str | None = Query(default=None, title="Author", description="Only the books of the author with this name."),
+        publisher: str | None = Query(default=None, title="Publisher", description="Only the books of this publisher."),
+        published_from: date | None = Query(default=None, title="Published from", description="Only the books published on or after this date."),
+        published_to: date | None = Query(default=None, title="Published to", description="Only the books published on or before this date."),
+        pages_min: int | None = Query(default=None, ge=0, title="Minimum pages", description="Only the books with at least this many pages."),
+        pages_max: int | None = Query(default=None, ge=0, title="Maximum pages", description="Only the books with at most this many pages."),
+        sort: str = Query(
+            default="uuid",
+            pattern=r"^-?(uuid|title|published|pages)$",
+            title="Sort",
+            description="`uuid`, `title`, `published` or `pages`, prefixed with `-` for descending order."
+            ),
+        ) -> schemas.BookFilterSchema:
+    """Route dependency, the query parameters of schemas.BookFilterSchema with the same constraints."""
+    try:
+        return schemas.BookFilterSchema(
+            genre=genre,
+            author=author,
+            publisher=publisher,
+            published_from=published_from,
+            published_to=published_to,
+            pages_min=pages_min,
+            pages_max=pages_max,
+            sort=sort
+            )
+    except ValidationError as error:
+        raise RequestValidationError(
+            [{**detail, "loc": ("query", *detail["loc"])} for detail in error.errors(include_url=False)]
+            )
+
+def check_book_filters(filters: schemas.BookFilterSchema):
+    """
+    Reject the combinations no index serves, they would read the whole Books table.
+
+    A genre, author or publisher filter walks its own index in uuid order, so the other
+    filters only narrow that walk and the sort must be `uuid`. Without one, the sort
+    column index is walked, so a range filter must be on that column.
+    """
+    column = filters.sort.lstrip("-")
+    equalities = [name for name in ("genre", "author", "publisher") if getattr(filters, name) is not None]
+    ranges = [
+        name for name, bounds in (
+            ("published", (filters.published_from, filters.published_to)),
+            ("pages", (filters.pages_min, filters.pages_max)),
+            )
+        if any(bound is not None for bound in bounds)
+        ]
+
+    if equalities and column != "uuid":
+        raise HTTPException(
+            status_code=400,
+            detail=f"The {', '.join(equalities)} filter can only be sorted by uuid, not by {column}."
+            )
+
+    for name in ranges:
+        if not equalities and name != column:
+            raise HTTPException(
+                status_code=400,
+                detail=f"The {name} filter needs sort={name} (or -{name}), or a genre, author or publisher filter."
+                )
+
+def filtered_books(statement, filters: schemas.BookFilterSchema | None = None) -> tuple:
+    """Apply `filters` to a select of Books, return it with its keyset columns and direction."""
+    filters = filters or schemas.BookFilterSchema()
+    check_book_filters(filters)
+    column = filters.sort.lstrip("-")
+    keys = (models.Book.uuid,) if column == "uuid" else (BOOK_SORTS[column], models.Book.uuid)
+
+    if filters.genre is not None:
+        genre_id = select(models.Genre.uuid).where(models.Genre.name == filters.genre).scalar_subquery()
+        statement = (
+            statement
+            .join(models.BookGenre, models.BookGenre.book_id == models.Book.uuid)
+            .where(models.BookGenre.genre_id == genre_id)
+            )
+        # seek on BookGenres.book_id, the (genre_id, book_id) index is walked in order.
+        keys = (models.BookGenre.book_id,)
+
+    if filters.author is not None:
+        author_id = select(models.Author.uuid).where(models.Author.name == filters.author).scalar_subquery()
+        statement = statement.where(models.Book.author_id == author_id)
+
+    if filters.publisher is not None:
+        statement = statement.where(models.Book.publisher == filters.publisher)
+
+    if filters.published_from is not None:
+        statement = statement.where(models.Book.published >= filters.published_from)
+
+    if filters.published_to is not None:
+        statement = statement.where(models.Book.published <= filters.published_to)
+
+    if filters.pages_min is not None:
+        statement = statement.where(models.Book.pages >= filters.pages_min)
+
+    if filters.pages_max is not None:
+        statement = statement.where(models.Book.pages <= filters.pages_max)
+
+    if column == "published":
+        # a NULL date has no place in the keyset order.
+        statement = statement.where(models.Book.published.is_not(None))
+
+    return statement, keys, filters.sort.startswith("-")
+
+def page_keys(keys: tuple) -> tuple:
+    # the cursor of a BookGenres.book_id seek is the uuid of the last book.
+    return tuple(models.Book.uuid if key is models.BookGenre.book_id else key for key in keys)
+
+def book_versions(*criteria):
+    # uuid and version of the books and of the author and genres they embed.
+    return (
+        select(
+            models.Book.uuid,
+            models.Book.version,
+            models.Author.uuid,
+            models.Author.version,
+            models.Genre.uuid,
+            models.Genre.version
+            )
+        .outerjoin(models.Author, models.Author.uuid == models.Book.author_id)
+        .outerjoin(models.BookGenre, models.BookGenre.book_id == models.Book.uuid)
+        .outerjoin(models.Genre, models.Genre.uuid == models.BookGenre.genre_id)
+        .where(*criteria)
+        .order_by(models.Book.uuid, models.Genre.uuid)
+        )
+
+def books_page_versions(
+        cursor: str | None = None,
+        limit: int = 100,
+        skip: int = 0,
+        filters: schemas.BookFilterSchema | None = None
+        ):
+    # the extra row fetched by paginate() is included, so next_cursor is covered too.
+    statement, keys, descending = filtered_books(select(models.Book.uuid), filters)
+    page = paginate(statement, keys, cursor=cursor, limit=limit, descending=descending, skip=skip)
+    return book_versions(models.Book.uuid.in_(page))
+
+@metrics.labelled("book_controller.get_book_etag")
+def get_book_etag(title: str, session: Session, fieldset: Fieldset | None = None):
+    rows = session.execute(book_versions(models.Book.title == title)).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"'{title}' not found.")
+
+    return make_etag(rows, version=rows[0][1], variant=fieldset.variant if fieldset else None)
+
+@metrics.labelled("book_controller.get_all_books_etag")
+def get_all_books_etag(
+        session: Session,
+        cursor: str | None = None,
+        limit: int = 100,
+        skip: int = 0,
+        filters: schemas.BookFilterSchema | None = None,
+        fieldset: Fieldset | None = None
+        ):
+    return make_etag(
+        session.execute(books_page_versions(cursor=cursor, limit=limit, skip=skip, filters=filters)).all(),
+        variant=fieldset.variant if fieldset else None
+        )
 
+@metrics.labelled("book_controller.create_book")
 def create_book(author_id: str, book: schemas.BookSchemaCreate, session: Session):
     database_book = models.Book(
         uuid=book._uuid,
@@ -41,22 +236,142 @@ def create_book(author_id: str, book: schemas.BookSchemaCreate, session: Session
     session.close()
     return database_book
 
-def update_book(title: str, book: schemas.BookSchemaUpdate, session: Session):
+def parse_bulk_body(body: bytes, content_type: str | None = None) -> list:
+    """Items of a JSON array body, or of a NDJSON body with one book per line."""
+    if content_type and "ndjson" in content_type:
+        items = []
+
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+
+            # a broken line only makes its own item invalid.
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)
+    else:
+        try:
+            items = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON body.")
+
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of books.")
+
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} books per request.")
+
+    return items
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors()
+        )
+
+def _check_chunk(session: Session, chunk: list, results: list, taken: dict, authors: set):
+    """Mark the rows of `chunk` that conflict with existing or earlier books, or miss their author."""
+    existing = session.execute(
+        select(models.Book.isbn, models.Book.title).where(or_(
+            models.Book.isbn.in_([row["isbn"] for _, row in chunk]),
+            models.Book.title.in_([row["title"] for _, row in chunk])
+            ))
+        ).all()
+    taken["isbn"].update(isbn for isbn, _ in existing)
+    taken["title"].update(title for _, title in existing)
+
+    unknown_authors = {row["author_id"] for _, row in chunk} - authors
+    if unknown_authors:
+        authors.update(session.scalars(select(models.Author.uuid).where(models.Author.uuid.in_(unknown_authors))))
+
+    for index, row in chunk:
+        if row["author_id"] not in authors:
+            results[index] = {"index": index, "status": "invalid", "detail": f"Author '{row['author_id']}' not found."}
+        elif row["isbn"] in taken["isbn"] or row["title"] in taken["title"]:
+            results[index] = {"index": index, "status": "conflict", "detail": "ISBN or title already exists."}
+        else:
+            # later items of the same request with this ISBN or title are conflicts too.
+            taken["isbn"].add(row["isbn"])
+            taken["title"].add(row["title"])
+
+@metrics.labelled("book_controller.create_books_bulk")
+def create_books_bulk(items: list, session: Session, chunk_size: int = BULK_CHUNK_SIZE):
+    """
+    Validate every item, then insert the books chunk by chunk with one executemany
+    per chunk, all in a single transaction.
+    """
+    results = [None] * len(items)
+    rows = []
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {"index": index, "status": "invalid", "detail": "Expected a JSON object."}
+            continue
+
+        try:
+            book = schemas.BookBulkCreateSchema.model_validate(item)
+        except ValidationError as error:
+            results[index] = {"index": index, "status": "invalid", "detail": _validation_detail(error)}
+            continue
+
+        rows.append((index, {"uuid": book._uuid, **book.model_dump()}))
+
+    taken = {"isbn": set(), "title": set()}
+    authors = set()
+
+    try:
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            _check_chunk(session, chunk, results, taken, authors)
+            created = [(index, row) for index, row in chunk if results[index] is None]
+
+            if created:
+                session.execute(insert(models.Book), [row for _, row in created])
+
+            for index, row in created:
+                results[index] = {"index": index, "status": "created", "uuid": row["uuid"]}
+
+        session.commit()
+    except IntegrityError:
+        # another request inserted one of the books between the check and the insert.
+        session.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Some of the books were created by another request meanwhile, send the request again."
+            )
+
+    return {
+        "created": sum(result["status"] == "created" for result in results),
+        "conflicts": sum(result["status"] == "conflict" for result in results),
+        "invalid": sum(result["status"] == "invalid" for result in results),
+        "results": results,
+    }
+
+@metrics.labelled("book_controller.update_book")
+def update_book(title: str, book: schemas.BookSchemaUpdate, session: Session, if_match: str | None = None):
     database_book = session.query(models.Book).filter(models.Book.title == title).first()
     
     if not database_book:
         raise HTTPException(status_code=404, detail=f"'{title}' not found.")
     
+    check_if_match(if_match, database_book.version)
     book_data = book.model_dump(exclude_unset=True)
 
     for key, value in book_data.items():
         setattr(database_book, key, value)
     
-    session.commit()
+    try:
+        session.commit()
+    except StaleDataError:
+        # another request updated the row after it was read.
+        session.rollback()
+        raise precondition_failed()
+
     session.refresh(database_book)
     session.close()
     return database_book
 
+@metrics.labelled("book_controller.delete_book")
 def delete_book(title: str, session: Session):
     database_book = session.query(models.Book).filter(models.Book.title == title).first()
 
@@ -70,6 +385,7 @@ def delete_book(title: str, session: Session):
         "message": f"'{title}' book deleted successfully!"
     }
 
+@metrics.labelled("book_controller.update_author_by_title")
 def update_author_by_title(title: str, book: schemas.BookAuthorSchemaUpdate, session: Session):
     database_book = session.query(models.Book).filter(models.Book.title == title).first()
     
@@ -83,6 +399,8 @@ def update_author_by_title(title: str, book: schemas.BookAuthorSchemaUpdate, ses
     
     session.commit()
     session.refresh(database_book)
+    # BookAuthorSchema serializes the author, load it before the session is closed.
+    session.refresh(database_book, ["author"])
     session.close()
     return database_book
 
@@ -1,26 +1,42 @@
 # app/controller/book_genre_controller.py
 
 from fastapi import Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app import (
+    metrics,
     models, 
     schemas
     )
 from app.controllers.authentication_controller import get_current_user
+from app.controllers.loader_options import fields_options
+from app.fieldsets import Fieldset
+from app.pagination import paginate, make_page
 
 
 """
 Make sure all of this CRUD logic are used in route.
 """
+@metrics.labelled("book_genre_controller.get_all_book_genres")
 def get_all_book_genres(
         session: Session, 
-        skip: int = 0, 
+        cursor: str | None = None, 
         limit: int = 100,
+        skip: int = 0,
         auth: schemas.UserSchema = Depends(get_current_user),
+        fieldset: Fieldset | None = None
         ):
-    data = session.query(models.BookGenre).offset(skip).limit(limit).all()
-    if auth: return data
+    keys = (models.BookGenre.uuid,)
+    query = paginate(
+        session.query(models.BookGenre).options(*fields_options(models.BookGenre, fieldset)),
+        keys,
+        cursor=cursor,
+        limit=limit,
+        skip=skip
+        )
+    if auth: return make_page(query.all(), keys, limit=limit)
 
+@metrics.labelled("book_genre_controller.create_book_genres")
 def create_book_genres(
         book_genre: schemas.BookGenreSchema, 
         session: Session,
@@ -36,11 +52,18 @@ def create_book_genres(
             )
 
         session.add(database_book_genre)
-        session.commit()
+
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            raise HTTPException(status_code=409, detail="The book already has this genre.")
+
         session.refresh(database_book_genre)
         session.close()
         return database_book_genre
 
+@metrics.labelled("book_genre_controller.update_book_genre")
 def update_book_genre(
         book_genre_id: str,
         book_genre: schemas.BookGenreUpdateSchema,
@@ -50,7 +73,7 @@ def update_book_genre(
     if auth:
         database_book_genre = session.query(models.BookGenre).filter(models.BookGenre.uuid == book_genre_id).first()
 
-        if not data:
+        if not database_book_genre:
             raise HTTPException(status_code=404, detail=f"Book Genre with ID '{book_genre_id}' not found.")
 
         data = book_genre.model_dump(exclude_unset=True)
@@ -58,11 +81,17 @@ def update_book_genre(
         for key, value in data.items():
             setattr(database_book_genre, key, value)
 
-        session.commit()
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            raise HTTPException(status_code=409, detail="The book already has this genre.")
+
         session.refresh(database_book_genre)
         session.close()
-        return data
+        return database_book_genre
 
+@metrics.labelled("book_genre_controller.delete_book_genre")
 def delete_book_genre(
         book_genre_id: str,
         session: Session,
@@ -0,0 +1,134 @@
+# app/controllers/export_controller.py
+
+"""Streaming export of the catalog tables."""
+
+import csv
+import io
+import json
+
+from datetime import date
+from fastapi import HTTPException
+from sqlalchemy import select, func, literal
+from app import metrics, models
+from app.config import SessionLocal, EXPORT_BATCH_SIZE
+
+
+# separates the aggregated genre names, can not appear in a name.
+NAMES_SEPARATOR = "\x1f"
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _aggregate_names(column, dialect: str):
+    if dialect == "postgresql":
+        return func.string_agg(column, literal(NAMES_SEPARATOR))
+
+    return func.group_concat(column, NAMES_SEPARATOR)
+
+def books_export_statement(dialect: str):
+    # the author name and genre names are joined by the database, one row per book.
+    return (
+        select(
+            models.Book.uuid,
+            models.Book.isbn,
+            models.Book.title,
+            models.Book.pages,
+            models.Book.synopsis,
+            models.Book.publisher,
+            models.Book.published,
+            models.Book.timestamp,
+            models.Author.name.label("author"),
+            _aggregate_names(models.Genre.name, dialect).label("genres")
+            )
+        .outerjoin(models.Author, models.Author.uuid == models.Book.author_id)
+        .outerjoin(models.BookGenre, models.BookGenre.book_id == models.Book.uuid)
+        .outerjoin(models.Genre, models.Genre.uuid == models.BookGenre.genre_id)
+        .group_by(models.Book.uuid, models.Author.name)
+        .order_by(models.Book.uuid)
+        )
+
+def authors_export_statement(dialect: str):
+    return select(
+        models.Author.uuid,
+        models.Author.name,
+        models.Author.birth_date,
+        models.Author.nationality,
+        models.Author.biography,
+        models.Author.timestamp
+        ).order_by(models.Author.uuid)
+
+def genres_export_statement(dialect: str):
+    return select(
+        models.Genre.uuid,
+        models.Genre.name,
+        models.Genre.description,
+        models.Genre.timestamp
+        ).order_by(models.Genre.uuid)
+
+EXPORT_STATEMENTS = {
+    "books": books_export_statement,
+    "authors": authors_export_statement,
+    "genres": genres_export_statement,
+}
+
+
+def check_export(resource: str, format: str):
+    # checked before the response starts, errors can not be sent once rows are streamed.
+    if resource not in EXPORT_STATEMENTS:
+        raise HTTPException(status_code=404, detail=f"'{resource}' can not be exported.")
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of {', '.join(EXPORT_FORMATS)}.")
+
+def export_statement(resource: str, dialect: str):
+    return EXPORT_STATEMENTS[resource](dialect).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+def _value(key: str, value, format: str):
+    if key == "genres":
+        names = value.split(NAMES_SEPARATOR) if value else []
+        return names if format == "ndjson" else "|".join(names)
+
+    if isinstance(value, date):
+        return value.isoformat()
+
+    return value
+
+def format_batch(columns: list, rows, format: str, header: bool = False) -> str:
+    """One chunk of the response body for a batch of rows."""
+    if format == "ndjson":
+        return "".join(
+            json.dumps({key: _value(key, value, format) for key, value in zip(columns, row)}, default=str) + "\n"
+            for row in rows
+            )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if header:
+        writer.writerow(columns)
+
+    writer.writerows([_value(key, value, format) for key, value in zip(columns, row)] for row in rows)
+    return buffer.getvalue()
+
+@metrics.labelled("export_controller.export_rows")
+def export_rows(resource: str, format: str):
+    """
+    Generator of the export body. It opens its own session, as it runs after the
+    route returned, and reads the rows from a server-side cursor one batch at a time,
+    so memory does not grow with the table.
+    """
+    with SessionLocal() as session:
+        statement = export_statement(resource, session.get_bind().dialect.name)
+        result = session.execute(statement)
+        columns = list(result.keys())
+        header = True
+
+        for rows in result.partitions():
+            yield format_batch(columns, rows, format, header=header)
+            header = False
+
+        if header and format == "csv":
+            yield format_batch(columns, [], format, header=True)
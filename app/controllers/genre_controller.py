@@ -3,25 +3,174 @@
 """CRUD Logic for Genre"""
 
 from fastapi import HTTPException
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.orm.attributes import set_committed_value
 from app import (
+    metrics,
     models, 
     schemas
     )
+from app.controllers.loader_options import genre_options, fields_options
+from app.etag import make_etag, check_if_match, precondition_failed
+from app.fieldsets import Fieldset
+from app.pagination import paginate, make_page, make_pages
 
 
 """
 Make sure all of this CRUD logic are used in route.
 """
-def get_genre(name: str, session: Session):
-    if not session.query(models.Genre).filter(models.Genre.name == name).first():
+@metrics.labelled("genre_controller.get_genre")
+def get_genre(
+        name: str,
+        session: Session,
+        books_cursor: str | None = None,
+        books_limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    data = (
+        session.query(models.Genre)
+        .options(*fields_options(models.Genre, fieldset, paged=("books",)))
+        .filter(models.Genre.name == name)
+        .first()
+        )
+    if not data:
         raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    if fieldset is not None and not fieldset.wants("books", "books_next_cursor"):
+        return data
     
-    return session.query(models.Genre).filter(models.Genre.name == name).first()
+    # only one bounded page of the books relationship is loaded.
+    books = get_books_page(
+        genre_id=data.uuid, 
+        session=session, 
+        cursor=books_cursor, 
+        limit=books_limit,
+        fieldset=fieldset.nested("books") if fieldset else None
+        )
+    set_committed_value(data, "books", books["data"])
+    data.books_next_cursor = books["next_cursor"]
+    return data
+
+@metrics.labelled("genre_controller.get_genre_books")
+def get_genre_books(
+        name: str,
+        session: Session,
+        cursor: str | None = None,
+        limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    genre_id = session.query(models.Genre.uuid).filter(models.Genre.name == name).scalar()
+    if not genre_id:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
+
+    return get_books_page(
+        genre_id=genre_id, 
+        session=session, 
+        cursor=cursor, 
+        limit=limit,
+        fieldset=fieldset
+        )
+
+def get_books_page(
+        genre_id: str,
+        session: Session,
+        cursor: str | None = None,
+        limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    # seek on BookGenres.book_id so the (genre_id, book_id) pairs are walked in order,
+    # the cursor value is the same as Book.uuid.
+    query = paginate(
+        session.query(models.Book)
+        .options(*fields_options(models.Book, fieldset))
+        .join(models.BookGenre, models.BookGenre.book_id == models.Book.uuid)
+        .filter(models.BookGenre.genre_id == genre_id), 
+        (models.BookGenre.book_id,), 
+        cursor=cursor, 
+        limit=limit
+        )
+    return make_page(query.all(), (models.Book.uuid,), limit=limit)
+
+def books_page_versions(genre_id: str, cursor: str | None = None, limit: int = 100):
+    return paginate(
+        select(models.Book.uuid, models.Book.version)
+        .join(models.BookGenre, models.BookGenre.book_id == models.Book.uuid)
+        .where(models.BookGenre.genre_id == genre_id), 
+        (models.BookGenre.book_id,), 
+        cursor=cursor, 
+        limit=limit
+        )
+
+@metrics.labelled("genre_controller.get_genre_etag")
+def get_genre_etag(
+        name: str,
+        session: Session,
+        books_cursor: str | None = None,
+        books_limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    genre = session.execute(
+        select(models.Genre.uuid, models.Genre.version).where(models.Genre.name == name)
+        ).first()
+    if not genre:
+        raise HTTPException(status_code=404, detail=f"'{name}' not found.")
 
-def get_genres(session: Session, skip: int = 0, limit: int = 100):
-    return session.query(models.Genre).offset(skip).limit(limit).all()
+    books = session.execute(books_page_versions(genre.uuid, cursor=books_cursor, limit=books_limit)).all()
+    return make_etag([genre, *books], version=genre.version, variant=fieldset.variant if fieldset else None)
 
+def books_pages_statement(genre_ids: list, limit: int = 100, fieldset: Fieldset | None = None):
+    """
+    The first page of books of each genre, as `(book, genre_id)` rows. The books
+    are numbered in the BookGenres.book_id order of the books cursor, on the
+    (genre_id, book_id) index.
+    """
+    ranked = (
+        select(
+            models.BookGenre.book_id,
+            models.BookGenre.genre_id,
+            func.row_number().over(partition_by=models.BookGenre.genre_id, order_by=models.BookGenre.book_id).label("position")
+            )
+        .where(models.BookGenre.genre_id.in_(genre_ids))
+        .subquery()
+        )
+    return (
+        select(models.Book, ranked.c.genre_id)
+        .options(*fields_options(models.Book, fieldset))
+        .join(ranked, ranked.c.book_id == models.Book.uuid)
+        .where(ranked.c.position <= limit + 1)
+        .order_by(ranked.c.genre_id, ranked.c.position)
+        )
+
+def set_books_pages(genres: list, pages: dict):
+    for genre in genres:
+        set_committed_value(genre, "books", pages[genre.uuid]["data"])
+        genre.books_next_cursor = pages[genre.uuid]["next_cursor"]
+
+@metrics.labelled("genre_controller.get_genres")
+def get_genres(
+        session: Session,
+        cursor: str | None = None,
+        limit: int = 100,
+        skip: int = 0,
+        books_limit: int = 10,
+        fieldset: Fieldset | None = None
+        ):
+    keys = (models.Genre.uuid,)
+    query = paginate(session.query(models.Genre).options(*genre_options(fieldset)), keys, cursor=cursor, limit=limit, skip=skip)
+    page = make_page(query.all(), keys, limit=limit)
+
+    if not page["data"] or (fieldset is not None and not fieldset.wants("books", "books_next_cursor")):
+        return page
+
+    # one bounded page of books per genre, all of them in one query.
+    genre_ids = [genre.uuid for genre in page["data"]]
+    statement = books_pages_statement(genre_ids, limit=books_limit, fieldset=fieldset.nested("books") if fieldset else None)
+    set_books_pages(page["data"], make_pages(session.execute(statement).all(), genre_ids, (models.Book.uuid,), limit=books_limit))
+    return page
+
+@metrics.labelled("genre_controller.create_genre")
 def create_genre(genre: schemas.GenreSchemaCreate, session: Session):
     database_genre = models.Genre(
         uuid=genre._uuid,
@@ -36,22 +185,31 @@ def create_genre(genre: schemas.GenreSchemaCreate, session: Session):
     session.close()
     return database_genre
 
-def update_genre(name: str, genre: schemas.GenreSchemaUpdate, session: Session):
+@metrics.labelled("genre_controller.update_genre")
+def update_genre(name: str, genre: schemas.GenreSchemaUpdate, session: Session, if_match: str | None = None):
     database_genre = session.query(models.Genre).filter(models.Genre.name == name).first()
 
     if not database_genre:
         raise HTTPException(status_code=404, detail=f"'{name}' not found.")
     
+    check_if_match(if_match, database_genre.version)
     genre_data = genre.model_dump(exclude_unset=True)
 
     for key, value in genre_data.items():
         setattr(database_genre, key, value)
 
-    session.commit()
+    try:
+        session.commit()
+    except StaleDataError:
+        # another request updated the row after it was read.
+        session.rollback()
+        raise precondition_failed()
+
     session.refresh(database_genre)
     session.close()
     return database_genre
 
+@metrics.labelled("genre_controller.delete_genre")
 def delete_genre(name: str, session: Session):
     database_genre = session.query(models.Genre).filter(models.Genre.name == name).first()
 
@@ -0,0 +1,62 @@
+# app/controllers/import_controller.py
+
+"""Import of uploaded catalog dumps."""
+
+import glob
+import logging
+import os
+import re
+import shutil
+
+from uuid import uuid4 as uuid_val
+from fastapi import BackgroundTasks, HTTPException, UploadFile
+from app.config import IMPORT_DIRECTORY
+from app.database.importer import (
+    Importer,
+    Checkpoint,
+    dump_format,
+    IMPORT_SCHEMAS
+    )
+
+logger = logging.getLogger(__name__)
+
+JOB_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+def run_import(importer: Importer):
+    try:
+        importer.run()
+    except Exception:
+        # the checkpoint stays behind, the import can be resumed with the CLI.
+        logger.exception("Import of '%s' failed.", importer.path)
+
+def start_import(resource: str, dump: UploadFile, background_tasks: BackgroundTasks):
+    """Save the uploaded dump next to its checkpoint and import it in the background."""
+    if resource not in IMPORT_SCHEMAS:
+        raise HTTPException(status_code=404, detail=f"'{resource}' can not be imported.")
+
+    if dump_format(dump.filename or "") is None:
+        raise HTTPException(status_code=400, detail="The dump must be a .jsonl, .ndjson or .csv file.")
+
+    job = uuid_val().hex
+    extension = os.path.splitext(dump.filename)[1].lower()
+    path = os.path.join(IMPORT_DIRECTORY, f"{job}{extension}")
+    os.makedirs(IMPORT_DIRECTORY, exist_ok=True)
+
+    with open(path, "wb") as target:
+        shutil.copyfileobj(dump.file, target, length=1024 * 1024)
+
+    importer = Importer(resource=resource, path=path)
+    state = importer.new_state()
+    importer.checkpoint.save(state)
+    background_tasks.add_task(run_import, importer)
+    return {"job": job, **state}
+
+def get_import(job: str):
+    # the job is part of a file name, never accept anything else than a uuid.
+    paths = glob.glob(os.path.join(IMPORT_DIRECTORY, f"{job}.*.checkpoint")) if JOB_PATTERN.match(job) else []
+
+    if not paths:
+        raise HTTPException(status_code=404, detail=f"Import '{job}' not found.")
+
+    return {"job": job, **Checkpoint(paths[0]).load()}
@@ -0,0 +1,51 @@
+# app/controllers/loader_options.py
+
+"""Relationship loader strategies shared by the controllers."""
+
+from sqlalchemy.orm import selectinload
+from app import models
+
+
+"""
+Every relationship serialized by a response schema is loaded with selectin batching,
+so a page of rows costs one query for the rows plus one query per relationship,
+no matter how many rows are on the page. The books of authors and genres are not
+bounded that way, the controllers load one page of them per row in a single query
+instead. A route called with `fields` loads only the requested columns and
+relationships (see app.fieldsets).
+"""
+def fields_options(entity, fieldset=None, default: tuple = (), required: tuple = (), paged: tuple = ()) -> tuple:
+    if fieldset is None or fieldset.tree is None:
+        return default
+
+    return fieldset.options(entity, required=required, paged=paged)
+
+def book_options(fieldset=None, required: tuple = ()):
+    # BookSchema -> author: AuthorSchema, genres: List[GenreBase].
+    return fields_options(
+        models.Book,
+        fieldset,
+        default=(
+            selectinload(models.Book.author),
+            selectinload(models.Book.genres),
+            ),
+        required=required
+        )
+
+def author_options(fieldset=None, required: tuple = ()):
+    # AuthorSchema -> books: List[BookBase], paged by the controller.
+    return fields_options(
+        models.Author,
+        fieldset,
+        required=required,
+        paged=("books",)
+        )
+
+def genre_options(fieldset=None, required: tuple = ()):
+    # GenreSchema -> books: List[BookBase], paged by the controller.
+    return fields_options(
+        models.Genre,
+        fieldset,
+        required=required,
+        paged=("books",)
+        )
@@ -0,0 +1,95 @@
+# app/controllers/search_controller.py
+
+"""Full-text search of the books."""
+
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import Float, select, case, and_, or_, type_coerce
+from sqlalchemy.orm import Session
+from app import metrics, models
+from app.controllers.loader_options import book_options
+from app.fieldsets import Fieldset
+from app.database.search_index import search_index, books_search, books_search_keys, match, rank
+from app.pagination import paginate, make_page
+
+
+SEARCH_TERM = re.compile(r"\w+")
+# terms after this one are ignored, each one is another index lookup.
+MAX_SEARCH_TERMS = 16
+
+
+def search_terms(q: str) -> list:
+    terms = SEARCH_TERM.findall(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query must contain at least one word.")
+
+    return terms[:MAX_SEARCH_TERMS]
+
+def fts_expression(terms: list) -> str:
+    """
+    Every term is quoted, so the FTS5 query syntax never reaches MATCH. The last term
+    is also a prefix, for search as you type: a word equal to it matches both phrases
+    and ranks above the words it is only a prefix of.
+    """
+    phrases = [f'"{term}"' for term in terms]
+    phrases[-1] = f'({phrases[-1]} OR {phrases[-1]}*)'
+    return " AND ".join(phrases)
+
+def fts_statement(terms: list):
+    # ranked on the FTS rowid, only the rows of the page are joined to their uuid.
+    return select(books_search.c.rowid.label("key"), rank().label("score")).where(match(fts_expression(terms)))
+
+def like_statement(terms: list):
+    # without the index every term must be in one of the columns, title matches rank first.
+    patterns = ["%" + term.replace("_", "\\_") + "%" for term in terms]
+    columns = (models.Book.title, models.Book.synopsis, models.Book.publisher, models.Author.name)
+    in_title = and_(*[models.Book.title.ilike(pattern, escape="\\") for pattern in patterns])
+    return (
+        select(models.Book.uuid.label("key"), type_coerce(case((in_title, 0.0), else_=1.0), Float).label("score"))
+        .outerjoin(models.Author, models.Author.uuid == models.Book.author_id)
+        .where(*[or_(*[column.ilike(pattern, escape="\\") for column in columns]) for pattern in patterns])
+        )
+
+def ranked_page(q: str, cursor: str | None = None, limit: int = 100) -> tuple:
+    """Keys and statement of one page of (key, score) rows, best score first."""
+    terms = search_terms(q)
+    ranked = (fts_statement(terms) if search_index.enabled else like_statement(terms)).subquery()
+    keys = (ranked.c.score, ranked.c.key)
+    return keys, paginate(select(ranked.c.key, ranked.c.score), keys, cursor=cursor, limit=limit)
+
+def books_statement(page: dict, fieldset: Fieldset | None = None):
+    """The books of the page with their key, in one query."""
+    keys = [row.key for row in page["data"]]
+
+    if not search_index.enabled:
+        return select(models.Book, models.Book.uuid).options(*book_options(fieldset)).where(models.Book.uuid.in_(keys))
+
+    return (
+        select(models.Book, books_search_keys.c.id)
+        .join(books_search_keys, books_search_keys.c.uuid == models.Book.uuid)
+        .options(*book_options(fieldset))
+        .where(books_search_keys.c.id.in_(keys))
+        )
+
+def ranked_books(page: dict, rows: list) -> dict:
+    # put the books back in rank order.
+    books = {key: book for book, key in rows}
+    page["data"] = [books[row.key] for row in page["data"] if row.key in books]
+    return page
+
+
+"""
+Make sure all of this CRUD logic are used in route.
+"""
+@metrics.labelled("search_controller.search_books")
+def search_books(
+        q: str,
+        session: Session,
+        cursor: str | None = None,
+        limit: int = 100,
+        fieldset: Fieldset | None = None
+        ):
+    keys, statement = ranked_page(q, cursor=cursor, limit=limit)
+    page = make_page(session.execute(statement).all(), keys, limit=limit)
+    return ranked_books(page, session.execute(books_statement(page, fieldset)).all())
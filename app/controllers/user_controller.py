@@ -10,18 +10,27 @@ because it's too hard to develop it. Maybe in future i will finish it.
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app import (
+    metrics,
     models, 
     schemas
     )
-from app.config import pwd_context
+from app.cache import principal_cache
+from app.controllers.loader_options import fields_options
+from app.fieldsets import Fieldset
+from app.hashing import password_hasher
+from app.pagination import paginate, make_page
 
 # hash the password first.
 def password_hash(password: str):
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
-def get_all_users(session: Session, skip: int = 0, limit: int = 100):
-    return session.query(models.User).offset(skip).limit(limit).all()
+@metrics.labelled("user_controller.get_all_users")
+def get_all_users(session: Session, cursor: str | None = None, limit: int = 100, skip: int = 0, fieldset: Fieldset | None = None):
+    keys = (models.User.uuid,)
+    query = paginate(session.query(models.User).options(*fields_options(models.User, fieldset)), keys, cursor=cursor, limit=limit, skip=skip)
+    return make_page(query.all(), keys, limit=limit)
 
+@metrics.labelled("user_controller.create_user")
 def create_user(user: schemas.UserSchemaCreate, session: Session):
     database_user = models.User(
         uuid=user._uuid,
@@ -36,13 +45,20 @@ def create_user(user: schemas.UserSchemaCreate, session: Session):
     session.close()
     return database_user
 
-def get_user(username: str, session: Session):
-    data = session.query(models.User).filter(models.User.username == username).first()
+@metrics.labelled("user_controller.get_user")
+def get_user(username: str, session: Session, fieldset: Fieldset | None = None):
+    data = (
+        session.query(models.User)
+        .options(*fields_options(models.User, fieldset))
+        .filter(models.User.username == username)
+        .first()
+        )
     if not data:
         raise HTTPException(status_code=404, detail=f"User '{username}' not found.")
         
     return data
 
+@metrics.labelled("user_controller.update_user")
 def update_user(username: str, user: schemas.UserSchemaUpdate, session: Session):
     database_user = session.query(models.User).filter(models.User.username == username).first()
     if not database_user:
@@ -60,8 +76,11 @@ def update_user(username: str, user: schemas.UserSchemaUpdate, session: Session)
     session.commit()
     session.refresh(database_user)
     session.close()
+    # cached principals of the old username must authenticate again.
+    principal_cache.invalidate(username)
     return database_user
 
+@metrics.labelled("user_controller.delete_user")
 def delete_user(username: str, session: Session):
     database_user = session.query(models.User).filter(models.User.username == username).first()
     if not database_user:
@@ -70,6 +89,7 @@ def delete_user(username: str, session: Session):
     session.delete(database_user)
     session.commit()
     session.close()
+    principal_cache.invalidate(username)
     return {
         "message": "User deleted successfully!"
     }
@@ -0,0 +1,398 @@
+# app/database/importer.py
+
+"""
+Streaming import of JSONL or CSV dumps of books, authors or genres, the same
+formats as `GET /api/export/{resource}`.
+
+Usage:
+    python -m app.database.importer books dump.jsonl [--batch-size N] [--workers N] [--checkpoint PATH] [--restart]
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from uuid import uuid4 as uuid_val
+
+import rich
+
+from pydantic import ValidationError
+from sqlalchemy import select, insert, or_
+from app import metrics, models, schemas
+from app.config import SessionLocal, IMPORT_BATCH_SIZE, IMPORT_WORKERS
+
+
+IMPORT_SCHEMAS = {
+    "books": schemas.BookImportSchema,
+    "authors": schemas.AuthorSchemaCreate,
+    "genres": schemas.GenreSchemaCreate,
+}
+
+IMPORT_FORMATS = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+}
+
+# validation errors kept in the checkpoint, the others are only counted.
+MAX_ERRORS = 100
+
+
+def dump_format(path: str) -> str | None:
+    return IMPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+
+def read_records(path: str, format: str):
+    """Raw records of the dump, JSONL lines are parsed later by the pool workers."""
+    with open(path, newline="", encoding="utf-8") as dump:
+        if format == "csv":
+            # empty CSV cells are missing values.
+            for record in csv.DictReader(dump):
+                yield {key: value for key, value in record.items() if value != ""}
+        else:
+            for line in dump:
+                if line.strip():
+                    yield line
+
+def batched(records, size: int):
+    iterator = iter(records)
+
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+# runs in the pool workers.
+def validate_batch(resource: str, start: int, records: list) -> tuple:
+    """Validate `records` against the resource schema, return the rows and the errors."""
+    schema = IMPORT_SCHEMAS[resource]
+    rows = []
+    errors = []
+
+    for number, record in enumerate(records, start=start + 1):
+        try:
+            if isinstance(record, str):
+                record = json.loads(record)
+
+            data = schema.model_validate(record)
+        except ValueError as error:
+            if isinstance(error, ValidationError):
+                message = "; ".join(
+                    f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors()
+                    )
+            else:
+                message = "invalid JSON"
+
+            errors.append(f"record {number}: {message}")
+            continue
+
+        # the dump uuid is kept, so an export imported elsewhere keeps its identifiers.
+        row = {"uuid": record.get("uuid") or data._uuid, **data.model_dump()}
+
+        if resource == "books":
+            # uuid of each BookGenres link, generated here to keep the writer lean.
+            row["genres"] = [(name, uuid_val().hex) for name in dict.fromkeys(row["genres"])]
+
+        rows.append(row)
+
+    return rows, errors
+
+
+class Checkpoint:
+    """Progress of one import, written after every committed batch."""
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> dict | None:
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path, encoding="utf-8") as checkpoint:
+            return json.load(checkpoint)
+
+    def save(self, state: dict):
+        # written next to the target and renamed, a crash never leaves half a file.
+        temporary = f"{self.path}.tmp"
+
+        with open(temporary, "w", encoding="utf-8") as checkpoint:
+            json.dump(state, checkpoint)
+
+        os.replace(temporary, self.path)
+
+
+class Importer:
+    """
+    Streaming import pipeline: the dump is read in batches, validated in a process
+    pool with a bounded number of batches in flight, and written in order, one
+    transaction per batch.
+
+    Authors and genres are de-duplicated with in-memory name to uuid maps loaded once
+    from the database, books by their ISBN and title, and every row by its uuid, so a
+    dump uuid that is already taken is skipped instead of aborting the import. A batch is committed before the
+    checkpoint moves past it, and a batch replayed after a crash is skipped by the
+    same de-duplication, so `run()` resumes where the previous run stopped.
+    """
+    def __init__(
+            self,
+            resource: str,
+            path: str,
+            format: str | None = None,
+            batch_size: int = IMPORT_BATCH_SIZE,
+            workers: int = IMPORT_WORKERS,
+            checkpoint: str | None = None,
+            session_factory=SessionLocal,
+            progress=None
+            ):
+        if resource not in IMPORT_SCHEMAS:
+            raise ValueError(f"'{resource}' can not be imported.")
+
+        self.resource = resource
+        self.path = path
+        self.format = format or dump_format(path)
+
+        if self.format not in IMPORT_FORMATS.values():
+            raise ValueError(f"Unknown dump format of '{path}', use .jsonl, .ndjson or .csv.")
+
+        self.batch_size = batch_size
+        self.workers = workers
+        self.checkpoint = Checkpoint(checkpoint or f"{path}.checkpoint")
+        self.session_factory = session_factory
+        self.progress = progress
+        self.authors = {}
+        self.genres = {}
+
+    def new_state(self) -> dict:
+        return {
+            "resource": self.resource,
+            "source": os.path.abspath(self.path),
+            "size": os.path.getsize(self.path),
+            "records": 0,
+            "inserted": 0,
+            "skipped": 0,
+            "invalid": 0,
+            "elapsed": 0.0,
+            "rows_per_second": 0.0,
+            "done": False,
+            "errors": [],
+        }
+
+    def _load_state(self, restart: bool) -> dict:
+        state = None if restart else self.checkpoint.load()
+
+        if state is None:
+            return self.new_state()
+
+        if state["resource"] != self.resource or state["size"] != os.path.getsize(self.path):
+            raise ValueError(f"Checkpoint '{self.checkpoint.path}' belongs to another dump, run with restart.")
+
+        return state
+
+    def _load_names(self, session):
+        self.authors = dict(session.execute(select(models.Author.name, models.Author.uuid)).all())
+        self.genres = dict(session.execute(select(models.Genre.name, models.Genre.uuid)).all())
+
+    def _validated(self, records, offset: int):
+        """Validated batches in dump order, at most two batches per worker in flight."""
+        batches = batched(records, self.batch_size)
+
+        if self.workers <= 0:
+            for index, batch in enumerate(batches):
+                yield len(batch), validate_batch(self.resource, offset + index * self.batch_size, batch)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+
+            for index, batch in enumerate(batches):
+                start = offset + index * self.batch_size
+                pending.append((len(batch), executor.submit(validate_batch, self.resource, start, batch)))
+
+                if len(pending) >= self.workers * 2:
+                    size, future = pending.popleft()
+                    yield size, future.result()
+
+            while pending:
+                size, future = pending.popleft()
+                yield size, future.result()
+
+    def _insert_names(self, session, model, names: dict, rows: list) -> tuple:
+        """Insert the rows whose name and uuid are not known yet, return (inserted, new names)."""
+        uuids = set(session.scalars(select(model.uuid).where(model.uuid.in_([row["uuid"] for row in rows]))))
+        created = {}
+        values = []
+
+        for row in rows:
+            if row["name"] in names or row["name"] in created or row["uuid"] in uuids:
+                continue
+
+            uuids.add(row["uuid"])
+            created[row["name"]] = row["uuid"]
+            values.append(row)
+
+        if values:
+            session.execute(insert(model.__table__), values)
+
+        return len(values), created
+
+    def _insert_books(self, session, rows: list) -> tuple:
+        existing = session.execute(
+            select(models.Book.uuid, models.Book.isbn, models.Book.title).where(or_(
+                models.Book.uuid.in_([row["uuid"] for row in rows]),
+                models.Book.isbn.in_([row["isbn"] for row in rows]),
+                models.Book.title.in_([row["title"] for row in rows])
+                ))
+            ).all()
+        uuids = {uuid for uuid, _, _ in existing}
+        isbns = {isbn for _, isbn, _ in existing}
+        titles = {title for _, _, title in existing}
+        authors = {}
+        genres = {}
+        books = []
+        links = []
+
+        for row in rows:
+            author = row.pop("author")
+            genre_names = row.pop("genres")
+
+            if row["uuid"] in uuids or row["isbn"] in isbns or row["title"] in titles:
+                continue
+
+            uuids.add(row["uuid"])
+            isbns.add(row["isbn"])
+            titles.add(row["title"])
+
+            # every row of one executemany needs the same keys, NULL without an author.
+            row["author_id"] = None
+
+            if author is not None:
+                if author not in self.authors and author not in authors:
+                    authors[author] = uuid_val().hex
+
+                row["author_id"] = self.authors.get(author) or authors[author]
+
+            for name, link_uuid in genre_names:
+                if name not in self.genres and name not in genres:
+                    genres[name] = uuid_val().hex
+
+                links.append({
+                    "uuid": link_uuid,
+                    "book_id": row["uuid"],
+                    "genre_id": self.genres.get(name) or genres[name],
+                    })
+
+            books.append(row)
+
+        # referenced rows first, the foreign keys are enforced. The texts are empty
+        # instead of NULL, the response schemas require them.
+        if authors:
+            session.execute(
+                insert(models.Author.__table__),
+                [{"uuid": uuid, "name": name, "nationality": "", "biography": ""} for name, uuid in authors.items()]
+                )
+
+        if genres:
+            session.execute(
+                insert(models.Genre.__table__),
+                [{"uuid": uuid, "name": name, "description": ""} for name, uuid in genres.items()]
+                )
+
+        if books:
+            session.execute(insert(models.Book.__table__), books)
+
+        if links:
+            session.execute(insert(models.BookGenre.__table__), links)
+
+        return len(books), authors, genres
+
+    # the writes are Core executemany on the tables, the ORM bulk path costs more than SQLite itself.
+    def _write(self, session, rows: list) -> int:
+        authors = {}
+        genres = {}
+
+        if self.resource == "books":
+            inserted, authors, genres = self._insert_books(session, rows)
+        elif self.resource == "authors":
+            inserted, authors = self._insert_names(session, models.Author, self.authors, rows)
+        else:
+            inserted, genres = self._insert_names(session, models.Genre, self.genres, rows)
+
+        session.commit()
+        # the maps only learn names that are committed.
+        self.authors.update(authors)
+        self.genres.update(genres)
+        return inserted
+
+    @metrics.labelled("importer.run")
+    def run(self, restart: bool = False) -> dict:
+        state = self._load_state(restart)
+
+        if state["done"]:
+            return state
+
+        started = time.perf_counter() - state["elapsed"]
+        # resume after the last committed record.
+        records = itertools.islice(read_records(self.path, self.format), state["records"], None)
+
+        with self.session_factory() as session:
+            self._load_names(session)
+
+            for size, (rows, errors) in self._validated(records, state["records"]):
+                inserted = self._write(session, rows) if rows else 0
+                state["records"] += size
+                state["inserted"] += inserted
+                state["skipped"] += len(rows) - inserted
+                state["invalid"] += len(errors)
+                state["errors"] = (state["errors"] + errors)[:MAX_ERRORS]
+                state["elapsed"] = time.perf_counter() - started
+                state["rows_per_second"] = round(state["records"] / state["elapsed"], 1) if state["elapsed"] else 0.0
+                self.checkpoint.save(state)
+
+                if self.progress is not None:
+                    self.progress(state)
+
+        state["done"] = True
+        self.checkpoint.save(state)
+        return state
+
+
+def print_progress(state: dict):
+    rich.print(
+        f"[bold yellow]{state['resource']}[/bold yellow]: {state['records']} records, "
+        f"{state['inserted']} inserted, {state['skipped']} skipped, {state['invalid']} invalid "
+        f"[bold green]{state['rows_per_second']:.0f} rows/s[/bold green]"
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a JSONL or CSV dump of books, authors or genres.")
+    parser.add_argument("resource", choices=list(IMPORT_SCHEMAS))
+    parser.add_argument("path", help="Dump file, .jsonl, .ndjson or .csv.")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None, help="Overrides the file extension.")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=IMPORT_WORKERS, help="Validation processes, 0 validates inline.")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file. Default is <path>.checkpoint.")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first record.")
+    arguments = parser.parse_args(argv)
+
+    importer = Importer(
+        resource=arguments.resource,
+        path=arguments.path,
+        format=arguments.format,
+        batch_size=arguments.batch_size,
+        workers=arguments.workers,
+        checkpoint=arguments.checkpoint,
+        progress=print_progress
+        )
+    state = importer.run(restart=arguments.restart)
+
+    for error in state["errors"]:
+        rich.print(f":red_circle: [bold red]Invalid[/bold red] {error}")
+
+    rich.print(f"[bold green]Imported[/bold green] :white_check_mark: in {state['elapsed']:.1f}s")
+    print_progress(state)
+
+
+if __name__ == "__main__":
+    main()
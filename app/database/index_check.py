@@ -0,0 +1,245 @@
+# app/database/index_check.py
+
+"""
+Checks the indexes declared on the models against the database, and shows the
+query plan of the hot controller queries before and after the missing ones exist.
+
+Usage:
+    python -m app.database.index_check [--create]
+"""
+
+import argparse
+import logging
+
+import rich
+
+from sqlalchemy import inspect, select, UniqueConstraint
+from sqlalchemy.exc import IntegrityError
+from app import metrics, models, schemas
+from app.config import Base, engine
+from app.controllers import author_controller, book_controller, genre_controller
+from app.pagination import paginate
+
+logger = logging.getLogger(__name__)
+
+
+# any value works, the plans do not depend on it.
+SAMPLE = "00000000000000000000000000000000"
+
+"""
+The statements the controllers run on every request, built with the controllers'
+own builders where they have one.
+"""
+HOT_QUERIES = {
+    "books page": lambda: paginate(select(models.Book), (models.Book.uuid,)),
+    "books by publisher": lambda: _filtered_page(publisher=SAMPLE),
+    "books by genre name": lambda: _filtered_page(genre=SAMPLE, pages_min=100),
+    "books sorted by title": lambda: _filtered_page(sort="-title"),
+    "books published between": lambda: _filtered_page(sort="published", published_from="2000-01-01"),
+    "books sorted by pages": lambda: _filtered_page(sort="pages", pages_max=100),
+    "book by title": lambda: select(models.Book).where(models.Book.title == SAMPLE),
+    "book versions": lambda: book_controller.book_versions(models.Book.title == SAMPLE),
+    "book genres (selectin)": lambda: (
+        select(models.Genre)
+        .join(models.BookGenre, models.BookGenre.genre_id == models.Genre.uuid)
+        .where(models.BookGenre.book_id.in_([SAMPLE]))
+        ),
+    "author books page": lambda: paginate(
+        select(models.Book).where(models.Book.author_id == SAMPLE), (models.Book.uuid,)
+        ),
+    "author books versions": lambda: author_controller.books_page_versions(SAMPLE),
+    "author books (selectin)": lambda: select(models.Book).where(models.Book.author_id.in_([SAMPLE])),
+    "genre books page": lambda: paginate(
+        select(models.Book)
+        .join(models.BookGenre, models.BookGenre.book_id == models.Book.uuid)
+        .where(models.BookGenre.genre_id == SAMPLE),
+        (models.BookGenre.book_id,)
+        ),
+    "genre books versions": lambda: genre_controller.books_page_versions(SAMPLE),
+    "book delete cascade": lambda: select(models.BookGenre).where(models.BookGenre.book_id == SAMPLE),
+    "genre delete cascade": lambda: select(models.BookGenre).where(models.BookGenre.genre_id == SAMPLE),
+}
+
+
+def _filtered_page(**filters):
+    statement, keys, descending = book_controller.filtered_books(
+        select(models.Book), schemas.BookFilterSchema(**filters)
+        )
+    return paginate(statement, keys, descending=descending)
+
+
+def declared_indexes(metadata=Base.metadata) -> list:
+    """`(table, name, columns, unique)` of the indexes and composite unique constraints of the models."""
+    declared = []
+
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            declared.append((table, index.name, tuple(column.name for column in index.columns), index.unique))
+
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint) and len(constraint.columns) > 1:
+                declared.append((table, constraint.name, tuple(column.name for column in constraint.columns), True))
+
+    return declared
+
+def existing_indexes(connection, table: str) -> list:
+    """Column tuples of every index of `table`, including the primary key and unique constraints."""
+    inspector = inspect(connection)
+    existing = [tuple(inspector.get_pk_constraint(table)["constrained_columns"])]
+    existing += [tuple(index["column_names"]) for index in inspector.get_indexes(table)]
+    existing += [tuple(constraint["column_names"]) for constraint in inspector.get_unique_constraints(table)]
+    return existing
+
+def _covered(columns: tuple, existing: list) -> bool:
+    # an index also serves every leading part of its columns.
+    return any(index[:len(columns)] == columns for index in existing)
+
+def missing_indexes(connection, metadata=Base.metadata) -> list:
+    inspector = inspect(connection)
+    tables = {table.name: existing_indexes(connection, table.name) for table in metadata.sorted_tables if inspector.has_table(table.name)}
+    return [
+        (table, name, columns, unique) for table, name, columns, unique in declared_indexes(metadata)
+        if table.name in tables and not _covered(columns, tables[table.name])
+        ]
+
+def unindexed_foreign_keys(connection, metadata=Base.metadata) -> list:
+    """`(table, columns)` of the foreign keys no index starts with, a join or cascade on them scans the table."""
+    inspector = inspect(connection)
+    unindexed = []
+
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = existing_indexes(connection, table.name)
+
+        for key in table.foreign_key_constraints:
+            columns = tuple(column.name for column in key.columns)
+
+            if not _covered(columns, existing):
+                unindexed.append((table.name, columns))
+
+    return unindexed
+
+def create_index_statement(dialect, table, name: str, columns: tuple, unique: bool) -> str:
+    # a unique constraint can not be added to an existing SQLite table, a unique index is the same.
+    preparer = dialect.identifier_preparer
+    return "CREATE {}INDEX {} ON {} ({})".format(
+        "UNIQUE " if unique else "",
+        preparer.quote(name),
+        preparer.format_table(table),
+        ", ".join(preparer.quote(column) for column in columns)
+        )
+
+def query_plan(connection, statement) -> list:
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+        return [row[3] for row in rows]
+
+    return [row[0] for row in connection.exec_driver_sql(f"EXPLAIN {compiled}").all()]
+
+def query_plans(connection) -> dict:
+    return {name: query_plan(connection, build()) for name, build in HOT_QUERIES.items()}
+
+def full_scans(plans: dict) -> dict:
+    """The queries whose plan reads a whole table."""
+    return {
+        name: [step for step in plan if _is_full_scan(step)]
+        for name, plan in plans.items() if any(_is_full_scan(step) for step in plan)
+        }
+
+def _is_full_scan(step: str) -> bool:
+    # SQLite "SCAN Books" without an index, PostgreSQL "Seq Scan on Books".
+    return (step.startswith("SCAN ") and " USING " not in step) or "Seq Scan" in step
+
+
+def compare(engine=engine, create: bool = False) -> dict:
+    """
+    Query plans before and after the missing indexes are created, in one transaction
+    that is rolled back unless `create` is set, so the database is only read.
+    """
+    # the transaction is spelled out, pysqlite would commit the DDL by itself otherwise.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("BEGIN")
+        missing = missing_indexes(connection)
+        before = query_plans(connection)
+        failed = []
+
+        for table, name, columns, unique in missing:
+            connection.exec_driver_sql("SAVEPOINT index_check")
+
+            try:
+                connection.exec_driver_sql(create_index_statement(connection.dialect, table, name, columns, unique))
+            except IntegrityError as error:
+                # duplicated rows, the unique index can not exist until they are removed.
+                connection.exec_driver_sql("ROLLBACK TO SAVEPOINT index_check")
+                failed.append((name, str(error.orig)))
+
+            connection.exec_driver_sql("RELEASE SAVEPOINT index_check")
+
+        after = query_plans(connection)
+        connection.exec_driver_sql("COMMIT" if create else "ROLLBACK")
+
+    return {"missing": missing, "failed": failed, "before": before, "after": after}
+
+@metrics.labelled("index_check.report")
+def report(engine=engine):
+    """Startup check, logs the missing indexes and the hot queries that scan a whole table."""
+    with engine.connect() as connection:
+        missing = missing_indexes(connection)
+        unindexed = unindexed_foreign_keys(connection)
+        scans = full_scans(query_plans(connection))
+
+    for table, name, columns, unique in missing:
+        logger.warning(
+            "Index %s on %s (%s) is missing, run `python -m app.database.index_check --create`.",
+            name, table.name, ", ".join(columns)
+            )
+
+    for table, columns in unindexed:
+        logger.warning("Foreign key %s (%s) has no index.", table, ", ".join(columns))
+
+    for name, steps in scans.items():
+        logger.warning("Query %r scans a whole table: %s.", name, "; ".join(steps))
+
+    return {"missing": missing, "unindexed": unindexed, "full_scans": scans}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the declared indexes and the plans of the hot queries.")
+    parser.add_argument("--create", action="store_true", help="Create the missing indexes, otherwise only show their effect.")
+    arguments = parser.parse_args(argv)
+
+    result = compare(create=arguments.create)
+
+    for table, name, columns, unique in result["missing"]:
+        rich.print(f":red_circle: [bold red]Missing[/bold red] {name} on {table.name} ({', '.join(columns)})")
+
+    for name, error in result["failed"]:
+        rich.print(f":red_circle: [bold red]Failed[/bold red] {name}: {error}")
+
+    for name in HOT_QUERIES:
+        before, after = result["before"][name], result["after"][name]
+        rich.print(f"[bold yellow]{name}[/bold yellow]")
+
+        if before == after:
+            for step in before:
+                rich.print(f"    {step}")
+            continue
+
+        for step in before:
+            rich.print(f"  [red]- {step}[/red]")
+
+        for step in after:
+            rich.print(f"  [green]+ {step}[/green]")
+
+    if not result["missing"]:
+        rich.print("[bold green]Every declared index exists[/bold green] :white_check_mark:")
+    elif arguments.create:
+        rich.print(f"[bold green]Created[/bold green] :white_check_mark: {len(result['missing']) - len(result['failed'])} indexes")
+
+
+if __name__ == "__main__":
+    main()
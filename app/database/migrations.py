@@ -0,0 +1,51 @@
+# app/database/migrations.py
+
+"""
+Columns added to the tables after their first release, created at startup on the
+databases that do not have them yet.
+"""
+
+import logging
+
+from sqlalchemy import inspect
+from app import metrics
+from app.config import engine
+from app.database import query
+
+logger = logging.getLogger(__name__)
+
+
+# table, column, and the statement that adds the column.
+COLUMNS = (
+    ("Books", "version", query.add_books_version_column_query),
+    ("Genres", "version", query.add_genres_version_column_query),
+    ("Authors", "version", query.add_authors_version_column_query),
+)
+
+
+def missing_columns(connection) -> list:
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    missing = []
+
+    for table, column, statement in COLUMNS:
+        # a table that does not exist yet is created with every column.
+        if table not in tables:
+            continue
+
+        if column not in {existing["name"] for existing in inspector.get_columns(table)}:
+            missing.append((table, column, statement))
+
+    return missing
+
+@metrics.labelled("migrations.upgrade")
+def upgrade(engine=engine) -> list:
+    """Startup step, adds the missing columns and returns them; does nothing the second time."""
+    with engine.begin() as connection:
+        missing = missing_columns(connection)
+
+        for table, column, statement in missing:
+            connection.exec_driver_sql(statement)
+            logger.warning("Column %s.%s was missing, it has been added.", table, column)
+
+    return [(table, column) for table, column, statement in missing]
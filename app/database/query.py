@@ -18,6 +18,7 @@ CREATE TABLE IF NOT EXISTS Books (
     publisher VARCHAR(255) NULL,
     published DATE DEFAULT '1970-01-01',
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1,
     PRIMARY KEY (uuid),
     CONSTRAINT FK_AuthorBook FOREIGN KEY (author_id) REFERENCES Authors(uuid)
 )
@@ -29,6 +30,7 @@ CREATE TABLE IF NOT EXISTS Genres (
     name VARCHAR(255) NOT NULL UNIQUE,
     description TEXT NULL,
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1,
     PRIMARY KEY (uuid)
 )
 """
@@ -41,6 +43,7 @@ CREATE TABLE IF NOT EXISTS Authors (
     nationality VARCHAR(255) NULL,
     biography TEXT NULL,
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1,
     PRIMARY KEY (uuid)
 )
 """
@@ -53,7 +56,8 @@ CREATE TABLE IF NOT EXISTS BookGenres (
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY (uuid),
     CONSTRAINT FK_BookGenre FOREIGN KEY (book_id) REFERENCES Books(uuid) ON DELETE CASCADE,
-    CONSTRAINT FK_GenreBook FOREIGN KEY (genre_id) REFERENCES Genres(uuid) ON DELETE CASCADE
+    CONSTRAINT FK_GenreBook FOREIGN KEY (genre_id) REFERENCES Genres(uuid) ON DELETE CASCADE,
+    CONSTRAINT uq_BookGenres_book_id_genre_id UNIQUE (book_id, genre_id)
 )
 """
 
@@ -67,6 +71,158 @@ CREATE TABLE IF NOT EXISTS Users (
     PRIMARY KEY (uuid)
 )
 """
+
+create_revoked_tokens_table_query = """
+CREATE TABLE IF NOT EXISTS RevokedTokens (
+    jti VARCHAR(36) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    revoked_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (jti)
+)
+"""
+
+create_revoked_tokens_index_query = """
+CREATE INDEX IF NOT EXISTS ix_RevokedTokens_expires_at ON RevokedTokens (expires_at)
+"""
+
+# for databases created before the version columns, run once by app.database.migrations.
+add_books_version_column_query = """
+ALTER TABLE Books ADD COLUMN version INTEGER NOT NULL DEFAULT 1
+"""
+
+add_genres_version_column_query = """
+ALTER TABLE Genres ADD COLUMN version INTEGER NOT NULL DEFAULT 1
+"""
+
+add_authors_version_column_query = """
+ALTER TABLE Authors ADD COLUMN version INTEGER NOT NULL DEFAULT 1
+"""
+
+# secondary indexes of the foreign keys, also checked by app/database/index_check.py.
+create_books_author_index_query = """
+CREATE INDEX IF NOT EXISTS ix_Books_author_id_uuid ON Books (author_id, uuid)
+"""
+
+create_books_publisher_index_query = """
+CREATE INDEX IF NOT EXISTS ix_Books_publisher_uuid ON Books (publisher, uuid)
+"""
+
+create_books_published_index_query = """
+CREATE INDEX IF NOT EXISTS ix_Books_published_uuid ON Books (published, uuid)
+"""
+
+create_books_pages_index_query = """
+CREATE INDEX IF NOT EXISTS ix_Books_pages_uuid ON Books (pages, uuid)
+"""
+
+create_book_genres_genre_index_query = """
+CREATE INDEX IF NOT EXISTS ix_BookGenres_genre_id_book_id ON BookGenres (genre_id, book_id)
+"""
+
+# for databases created before the constraint, fails while duplicated pairs exist.
+create_book_genres_unique_index_query = """
+CREATE UNIQUE INDEX IF NOT EXISTS uq_BookGenres_book_id_genre_id ON BookGenres (book_id, genre_id)
+"""
+
+# full-text search of books, SQLite only (app/database/search_index.py).
+# BooksSearchKeys gives every book a stable INTEGER PRIMARY KEY used as the FTS
+# rowid, the implicit rowid of Books may change on VACUUM.
+create_books_search_keys_table_query = """
+CREATE TABLE IF NOT EXISTS BooksSearchKeys (
+    id INTEGER PRIMARY KEY,
+    uuid VARCHAR(36) NOT NULL UNIQUE
+)
+"""
+
+create_books_search_table_query = """
+CREATE VIRTUAL TABLE IF NOT EXISTS BooksSearch USING fts5(
+    title,
+    synopsis,
+    publisher,
+    author,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+create_books_search_insert_trigger_query = """
+CREATE TRIGGER IF NOT EXISTS BooksSearch_insert AFTER INSERT ON Books BEGIN
+    INSERT INTO BooksSearchKeys (uuid) VALUES (new.uuid);
+    INSERT INTO BooksSearch (rowid, title, synopsis, publisher, author)
+    VALUES (
+        (SELECT id FROM BooksSearchKeys WHERE uuid = new.uuid),
+        new.title,
+        new.synopsis,
+        new.publisher,
+        (SELECT name FROM Authors WHERE uuid = new.author_id)
+    );
+END
+"""
+
+create_books_search_update_trigger_query = """
+CREATE TRIGGER IF NOT EXISTS BooksSearch_update AFTER UPDATE OF uuid, title, synopsis, publisher, author_id ON Books BEGIN
+    UPDATE BooksSearchKeys SET uuid = new.uuid WHERE uuid = old.uuid;
+    UPDATE BooksSearch SET
+        title = new.title,
+        synopsis = new.synopsis,
+        publisher = new.publisher,
+        author = (SELECT name FROM Authors WHERE uuid = new.author_id)
+    WHERE rowid = (SELECT id FROM BooksSearchKeys WHERE uuid = new.uuid);
+END
+"""
+
+create_books_search_delete_trigger_query = """
+CREATE TRIGGER IF NOT EXISTS BooksSearch_delete AFTER DELETE ON Books BEGIN
+    DELETE FROM BooksSearch WHERE rowid = (SELECT id FROM BooksSearchKeys WHERE uuid = old.uuid);
+    DELETE FROM BooksSearchKeys WHERE uuid = old.uuid;
+END
+"""
+
+create_books_search_author_update_trigger_query = """
+CREATE TRIGGER IF NOT EXISTS BooksSearch_author_update AFTER UPDATE OF name ON Authors BEGIN
+    UPDATE BooksSearch SET author = new.name
+    WHERE rowid IN (
+        SELECT BooksSearchKeys.id FROM BooksSearchKeys
+        JOIN Books ON Books.uuid = BooksSearchKeys.uuid
+        WHERE Books.author_id = new.uuid
+    );
+END
+"""
+
+create_books_search_author_delete_trigger_query = """
+CREATE TRIGGER IF NOT EXISTS BooksSearch_author_delete AFTER DELETE ON Authors BEGIN
+    UPDATE BooksSearch SET author = NULL
+    WHERE rowid IN (
+        SELECT BooksSearchKeys.id FROM BooksSearchKeys
+        JOIN Books ON Books.uuid = BooksSearchKeys.uuid
+        WHERE Books.author_id = old.uuid
+    );
+END
+"""
+
+drop_books_search_table_query = """
+DROP TABLE IF EXISTS BooksSearch
+"""
+
+drop_books_search_keys_table_query = """
+DROP TABLE IF EXISTS BooksSearchKeys
+"""
+
+fill_books_search_keys_query = """
+INSERT INTO BooksSearchKeys (uuid) SELECT uuid FROM Books
+"""
+
+fill_books_search_query = """
+INSERT INTO BooksSearch (rowid, title, synopsis, publisher, author)
+SELECT BooksSearchKeys.id, Books.title, Books.synopsis, Books.publisher, Authors.name
+FROM BooksSearchKeys
+JOIN Books ON Books.uuid = BooksSearchKeys.uuid
+LEFT JOIN Authors ON Authors.uuid = Books.author_id
+"""
+
+optimize_books_search_query = """
+INSERT INTO BooksSearch (BooksSearch) VALUES ('optimize')
+"""
 # END OF CREATE STATEMENT AREA!
 
 # INSERT STATEMENT AREA!
@@ -0,0 +1,137 @@
+# app/database/search_index.py
+
+"""
+Full-text index of the books, an SQLite FTS5 table kept in sync by triggers.
+
+Usage:
+    python -m app.database.search_index rebuild
+"""
+
+import argparse
+import logging
+import time
+
+import rich
+
+from sqlalchemy import Float, Integer, String, func, inspect, literal_column, table, column
+from sqlalchemy.exc import OperationalError
+from app import metrics
+from app.config import engine
+from app.database import query
+
+logger = logging.getLogger(__name__)
+
+
+# the index tables are not mapped, they only exist on SQLite.
+books_search = table(
+    "BooksSearch",
+    column("rowid", Integer),
+    column("title", String),
+    column("synopsis", String),
+    column("publisher", String),
+    column("author", String),
+    )
+books_search_keys = table(
+    "BooksSearchKeys",
+    column("id", Integer),
+    column("uuid", String),
+    )
+
+# bm25 weight of each indexed column, in the table order: a title match ranks first.
+SEARCH_WEIGHTS = (10.0, 1.0, 2.0, 5.0)
+
+CREATE_QUERIES = (
+    query.create_books_search_keys_table_query,
+    query.create_books_search_table_query,
+    query.create_books_search_insert_trigger_query,
+    query.create_books_search_update_trigger_query,
+    query.create_books_search_delete_trigger_query,
+    query.create_books_search_author_update_trigger_query,
+    query.create_books_search_author_delete_trigger_query,
+)
+
+REBUILD_QUERIES = (
+    query.drop_books_search_table_query,
+    query.drop_books_search_keys_table_query,
+    query.create_books_search_keys_table_query,
+    query.create_books_search_table_query,
+    query.fill_books_search_keys_query,
+    query.fill_books_search_query,
+    query.optimize_books_search_query,
+)
+
+
+def match(expression: str):
+    return literal_column('"BooksSearch"').op("MATCH")(expression)
+
+def rank():
+    # lower is better, bm25() returns negative scores.
+    return func.bm25(literal_column('"BooksSearch"'), *SEARCH_WEIGHTS, type_=Float)
+
+
+class SearchIndex:
+    """
+    Owns the FTS5 index of the books.
+
+    Inserts, updates and deletes of Books, and author renames, are mirrored by
+    triggers in the same transaction, so the write controllers need no change and
+    the index is never behind a commit. `enabled` is only set once the index exists,
+    the search controller falls back to LIKE filters otherwise (PostgreSQL, or an
+    SQLite built without FTS5).
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self.enabled = False
+
+    @metrics.labelled("search_index.create")
+    def create(self) -> bool:
+        if self.engine.dialect.name != "sqlite":
+            return False
+
+        try:
+            with self.engine.begin() as connection:
+                fresh = not inspect(connection).has_table("BooksSearchKeys")
+
+                for statement in CREATE_QUERIES:
+                    connection.exec_driver_sql(statement)
+
+            # a new index over existing rows is filled once, later writes go through the triggers.
+            if fresh:
+                self.rebuild()
+        except OperationalError as error:
+            logger.warning("Full-text search is not available (%s), using LIKE filters.", error.orig)
+            return False
+
+        self.enabled = True
+        return True
+
+    def rebuild(self) -> int:
+        """Fill the index again from Books and Authors, return the number of indexed books."""
+        with self.engine.begin() as connection:
+            for statement in REBUILD_QUERIES:
+                connection.exec_driver_sql(statement)
+
+            return connection.exec_driver_sql("SELECT count(*) FROM BooksSearchKeys").scalar()
+
+
+search_index = SearchIndex(engine)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the full-text index of the books.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+
+    if engine.dialect.name != "sqlite":
+        rich.print(":red_circle: [bold red]Error[/bold red]: the full-text index needs SQLite.")
+        return
+
+    started = time.perf_counter()
+    books = search_index.rebuild()
+    # the triggers are created too, if the index never existed.
+    search_index.create()
+    rich.print(f"[bold green]Rebuilt[/bold green] :white_check_mark: {books} books in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
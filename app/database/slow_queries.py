@@ -0,0 +1,223 @@
+# app/database/slow_queries.py
+
+"""
+Slow-query log: the statements slower than `SLOW_QUERY_THRESHOLD_MS`, with their
+query plan and the controller function or background job that ran them, written to
+a rotating file and aggregated in memory for `GET /api/admin/slow_queries`.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from sqlalchemy import event
+from app import metrics
+from app.config import (
+    SLOW_QUERY_THRESHOLD_MS,
+    SLOW_QUERY_LOG_PATH,
+    SLOW_QUERY_LOG_MAX_BYTES,
+    SLOW_QUERY_LOG_BACKUP_COUNT
+    )
+
+logger = logging.getLogger(__name__)
+
+
+# distinct statements kept in the aggregates, and plans kept in the cache.
+MAX_STATEMENTS = 1000
+# statements EXPLAIN accepts, the others (PRAGMA, BEGIN, ...) are logged without a plan.
+EXPLAINED_STATEMENTS = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+# an expanded IN list, the same statement whatever the number of its values.
+IN_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|\$\d+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|\$\d+)\s*\)")
+
+
+def fingerprint(statement: str) -> str:
+    return IN_LIST.sub("(...)", " ".join(statement.split()))
+
+def redact(parameters, executemany: bool = False):
+    """The type names of the bound parameters, their values never leave the process."""
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+
+    return [type(value).__name__ for value in parameters or ()]
+
+
+class SlowQueryLog:
+    """
+    Times every statement of the engines it is installed on. A slow one is written
+    to the log file as one JSON line, and added to the aggregate of its statement.
+    Its plan is read with `EXPLAIN QUERY PLAN` (SQLite) or `EXPLAIN` (PostgreSQL) on
+    the same connection and parameters, once per distinct statement.
+    """
+    def __init__(self, threshold_ms: float, path: str | None, max_bytes: int, backup_count: int):
+        self.threshold = threshold_ms / 1000
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._plans = {}
+        self._writer = logging.getLogger(f"{__name__}.file")
+        self._writer.propagate = False
+        self._handler = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def install(self, engine, async_engine=None):
+        if not self.enabled:
+            return
+
+        if self.path and self._handler is None:
+            self._handler = RotatingFileHandler(
+                self.path,
+                maxBytes=self.max_bytes,
+                backupCount=self.backup_count,
+                encoding="utf-8",
+                delay=True
+                )
+            self._writer.addHandler(self._handler)
+            self._writer.setLevel(logging.INFO)
+
+        engines = [engine] if async_engine is None else [engine, async_engine.sync_engine]
+
+        for database_engine in engines:
+            if not event.contains(database_engine, "before_cursor_execute", self._before_cursor_execute):
+                event.listen(database_engine, "before_cursor_execute", self._before_cursor_execute)
+                event.listen(database_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def close(self):
+        if self._handler is not None:
+            self._writer.removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+
+        if started is None:
+            return
+
+        elapsed = time.perf_counter() - started
+
+        if elapsed >= self.threshold:
+            self.record(conn, statement, parameters, executemany, elapsed)
+
+    def record(self, conn, statement: str, parameters, executemany: bool, elapsed: float):
+        key = fingerprint(statement)
+        controller = metrics.issuing_controller()
+        plan = self.plan(conn, key, statement, parameters, executemany)
+        now = datetime.now(timezone.utc)
+        redacted = redact(parameters, executemany)
+
+        with self._lock:
+            entry = self._statements.get(key)
+
+            if entry is None:
+                if len(self._statements) >= MAX_STATEMENTS:
+                    # the statement that cost the least so far makes room.
+                    del self._statements[min(self._statements, key=lambda name: self._statements[name]["total"])]
+
+                entry = self._statements[key] = {
+                    "statement": key, "count": 0, "total": 0.0, "max": 0.0, "controllers": set()
+                    }
+
+            entry["count"] += 1
+            entry["total"] += elapsed
+            entry["max"] = max(entry["max"], elapsed)
+            entry["controllers"].add(controller)
+            entry["parameters"] = redacted
+            entry["plan"] = plan
+            entry["last_seen"] = now
+
+        self._writer.info(json.dumps({
+            "time": now.isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "controller": controller,
+            "statement": key,
+            "parameters": redacted,
+            "plan": plan,
+            }))
+
+    def plan(self, conn, key: str, statement: str, parameters, executemany: bool) -> list:
+        with self._lock:
+            plan = self._plans.get(key)
+
+        if plan is not None:
+            return plan
+
+        if executemany or not statement.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+            return []
+
+        sqlite = conn.dialect.name == "sqlite"
+        # a failed statement aborts a PostgreSQL transaction, the savepoint keeps the caller's.
+        savepoint = not sqlite and conn.in_transaction()
+        cursor = conn.connection.cursor()
+
+        try:
+            if savepoint:
+                cursor.execute("SAVEPOINT slow_query_plan")
+
+            cursor.execute(("EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN ") + statement, parameters)
+            plan = [row[3] if sqlite else row[0] for row in cursor.fetchall()]
+
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT slow_query_plan")
+        except Exception as error:
+            logger.warning("Could not explain a slow query: %s.", error)
+            plan = []
+
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_plan")
+        finally:
+            cursor.close()
+
+        with self._lock:
+            if len(self._plans) >= MAX_STATEMENTS:
+                self._plans.pop(next(iter(self._plans)))
+
+            self._plans[key] = plan
+
+        return plan
+
+    def top(self, limit: int = 20, order: str = "total") -> list:
+        """The `limit` slowest statements by total, max or mean time, or by count."""
+        with self._lock:
+            entries = [{**entry, "controllers": sorted(entry["controllers"])} for entry in self._statements.values()]
+
+        for entry in entries:
+            entry["mean"] = entry["total"] / entry["count"]
+
+        entries.sort(key=lambda entry: entry[order], reverse=True)
+        return [
+            {
+                **entry,
+                "total_ms": entry["total"] * 1000,
+                "max_ms": entry["max"] * 1000,
+                "mean_ms": entry["mean"] * 1000,
+            }
+            for entry in entries[:limit]
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._statements.clear()
+            self._plans.clear()
+
+
+slow_queries = SlowQueryLog(
+    threshold_ms=SLOW_QUERY_THRESHOLD_MS,
+    path=SLOW_QUERY_LOG_PATH,
+    max_bytes=SLOW_QUERY_LOG_MAX_BYTES,
+    backup_count=SLOW_QUERY_LOG_BACKUP_COUNT
+    )
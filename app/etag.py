@@ -0,0 +1,63 @@
+# app/etag.py
+
+"""Strong ETags and conditional request helpers."""
+
+import hashlib
+
+from fastapi import HTTPException, Response, status
+
+
+"""
+An ETag is a digest of the rows a response is built from: the uuid and version of
+the resource and of every related row it embeds. Detail resources prefix it with
+their own version (`"<version>-<digest>"`), so `If-Match` on PATCH can be checked
+against the loaded row without any extra query. A sparse fieldset is another
+representation of the same rows, its `variant` is appended to the digest.
+"""
+def make_etag(rows, version: int | None = None, variant: str | None = None) -> str:
+    digest = hashlib.blake2b(repr([tuple(row) for row in rows]).encode(), digest_size=12).hexdigest()
+
+    if variant is not None:
+        digest = f"{digest}-{variant}"
+
+    if version is None:
+        return f'"{digest}"'
+
+    return f'"{version}-{digest}"'
+
+def _parse(header: str) -> list:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match uses the weak comparison.
+    if not if_none_match:
+        return False
+
+    tags = _parse(if_none_match)
+    return "*" in tags or etag in [tag.removeprefix("W/") for tag in tags]
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="The resource was changed since it was read, read it again."
+        )
+
+def check_if_match(if_match: str | None, version: int):
+    """Raise 412 unless the `If-Match` header matches the current version of the row."""
+    if not if_match:
+        return
+
+    tags = _parse(if_match)
+
+    if "*" in tags:
+        return
+
+    # If-Match uses the strong comparison, weak tags never match.
+    for tag in tags:
+        if tag.startswith('"') and tag.split("-", 1)[0].strip('"') == str(version):
+            return
+
+    raise precondition_failed()
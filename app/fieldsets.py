@@ -0,0 +1,227 @@
+# app/fieldsets.py
+
+"""Sparse fieldsets, the `fields` query parameter of the read routes."""
+
+import copy
+import hashlib
+
+from functools import lru_cache
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, raiseload, selectinload
+from typing import List
+from app import schemas
+from app.config import FAST_RESPONSES
+from app.profiling import span
+from app.serializers import nested_schema, serialize
+
+
+"""
+`fields=title,author.name,genres` lists the schema fields to return, a dotted name
+selects the fields of a nested schema and a plain one the whole field. The response
+model is trimmed to those fields and the query only loads their columns, so a list
+that only shows titles neither reads nor encodes the Text columns (synopsis,
+biography, description) and the relationships nobody asked for.
+"""
+# paths accepted in one `fields` parameter.
+MAX_FIELDS = 64
+# trimmed models kept, each distinct fieldset of a schema is one model.
+MODEL_CACHE_SIZE = 256
+
+
+def parse_fields(schema, fields: str) -> dict | None:
+    """
+    Tree of the requested fields of `schema`: each name maps to the tree of its
+    nested fields, or None for the whole field. None when no field is given.
+    """
+    paths = [path.strip() for path in fields.split(",") if path.strip()]
+
+    if not paths:
+        return None
+
+    if len(paths) > MAX_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_FIELDS} fields can be requested."
+            )
+
+    tree = {}
+
+    for path in paths:
+        node, current = tree, schema
+        names = path.split(".")
+
+        for depth, name in enumerate(names):
+            if current is None or name not in current.model_fields:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unknown field '{path}'."
+                    )
+
+            if depth == len(names) - 1:
+                # a whole field wins over some of its nested fields.
+                node[name] = None
+                break
+
+            if name in node and node[name] is None:
+                break
+
+            node = node.setdefault(name, {})
+            current = nested_schema(current.model_fields[name].annotation)[0]
+
+    return tree
+
+def freeze(tree: dict) -> tuple:
+    return tuple(sorted((name, None if node is None else freeze(node)) for name, node in tree.items()))
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def trimmed_model(schema, frozen: tuple) -> type[BaseModel]:
+    """`schema` with only the fields of the frozen tree, the same class for the same tree."""
+    definitions = {}
+    nodes = dict(frozen)
+
+    # the frozen tree is sorted, the fields keep the order of the schema.
+    for name, info in schema.model_fields.items():
+        if name not in nodes:
+            continue
+
+        node = nodes[name]
+        # create_model() takes ownership of the FieldInfo, keep the schema's own intact.
+        info = copy.deepcopy(info)
+        annotation = info.annotation
+
+        if node is not None:
+            nested, many = nested_schema(annotation)
+            annotation = List[trimmed_model(nested, node)] if many else trimmed_model(nested, node)
+
+        definitions[name] = (annotation, info)
+
+    return create_model(schema.__name__, __config__=ConfigDict(from_attributes=True), **definitions)
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+class Fieldset:
+    """
+    The requested fields of a read route, for one response schema.
+
+    `tree` is None when the route was called without `fields`, every method then
+    keeps the route's own behaviour: the full schema and the default loader options.
+    """
+    def __init__(self, schema, tree: dict | None = None):
+        self.schema = schema
+        self.tree = tree
+
+    @classmethod
+    def parse(cls, schema, fields: str | None = None) -> "Fieldset":
+        return cls(schema, parse_fields(schema, fields) if fields else None)
+
+    @property
+    def variant(self) -> str | None:
+        """Short digest of the fieldset, ETags of different fieldsets must differ."""
+        if self.tree is None:
+            return None
+
+        return hashlib.blake2b(repr(freeze(self.tree)).encode(), digest_size=4).hexdigest()
+
+    def wants(self, *names: str) -> bool:
+        return self.tree is None or any(name in self.tree for name in names)
+
+    def nested(self, name: str) -> "Fieldset":
+        """The fieldset of a nested schema field: all of its fields, the picked ones, or none."""
+        nested = nested_schema(self.schema.model_fields[name].annotation)[0]
+        return Fieldset(nested, None if self.tree is None else self.tree.get(name, {}))
+
+    def model(self, page=None) -> type[BaseModel]:
+        """The trimmed schema, or the trimmed `page` schema whose `data` are items of it."""
+        if self.tree is None:
+            return page or self.schema
+
+        if page is None:
+            return trimmed_model(self.schema, freeze(self.tree))
+
+        tree = {name: None for name in page.model_fields}
+        tree["data"] = self.tree
+        return trimmed_model(page, freeze(tree))
+
+    def options(self, entity, required: tuple = (), paged: tuple = ()) -> tuple:
+        """
+        `load_only` of the requested columns of `entity`, selectin batching of the
+        requested relationships and `raiseload` of the others, so an unrequested
+        column or relationship is never read. `required` are columns the controller
+        itself reads, such as the keyset columns, and the relationships in `paged`
+        are loaded by the controller.
+        """
+        return _load_options(entity, self.tree, required, paged)
+
+    def response(self, content, page=None):
+        """
+        The serialized `content` for the routes that return rows, FastAPI would validate
+        them against the full `response_model` otherwise. Without `fields` the rows are
+        returned as they are, unless `FAST_RESPONSES` serializes every response here.
+        """
+        if self.tree is None and not FAST_RESPONSES:
+            return content
+
+        with span("serialize"):
+            if FAST_RESPONSES:
+                body = serialize(self.model(page), content)
+            else:
+                adapter = _adapter(self.model(page))
+                body = adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+        return Response(content=body, media_type="application/json")
+
+
+def _load_options(entity, tree: dict, required: tuple = (), paged: tuple = ()) -> tuple:
+    mapper = inspect(entity)
+    columns = [mapper.get_property_by_column(column).class_attribute for column in mapper.primary_key]
+    columns += required
+    options = []
+
+    for relationship in mapper.relationships:
+        attribute = getattr(entity, relationship.key)
+
+        if relationship.key in paged:
+            continue
+
+        if relationship.key not in tree:
+            options.append(raiseload(attribute))
+            continue
+
+        # the foreign key of a many-to-one, the selectin query is keyed on it.
+        columns += [mapper.get_property_by_column(column).class_attribute for column in relationship.local_columns]
+        loader = selectinload(attribute)
+
+        if tree[relationship.key] is not None:
+            loader = loader.options(*_load_options(relationship.mapper.class_, tree[relationship.key]))
+
+        options.append(loader)
+
+    columns += [getattr(entity, name) for name in tree if name in mapper.column_attrs]
+    return (load_only(*columns), *options)
+
+
+def fields_query(schema):
+    """Route dependency of the `fields` query parameter, for the fields of `schema`."""
+    def dependency(
+            fields: str | None = Query(
+                default=None,
+                max_length=1000,
+                description="Comma separated fields to return, dotted for the fields of a nested object."
+                ),
+            ) -> Fieldset:
+        return Fieldset.parse(schema, fields)
+
+    return dependency
+
+
+book_fields = fields_query(schemas.BookSchema)
+book_base_fields = fields_query(schemas.BookBase)
+author_fields = fields_query(schemas.AuthorSchema)
+genre_fields = fields_query(schemas.GenreSchema)
+book_genre_fields = fields_query(schemas.BookGenreSchema)
+user_fields = fields_query(schemas.UserSchema)
@@ -0,0 +1,156 @@
+# app/hashing.py
+
+"""Password hashing and verification offloaded to a process pool."""
+
+import asyncio
+import threading
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from app import metrics
+from app.config import (
+    pwd_context,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_QUEUE_SIZE
+    )
+
+
+# time of a hash or verify, queueing for a pool worker included.
+password_hash_duration = metrics.register(metrics.Histogram(
+    "password_hash_duration_seconds", "Time of the bcrypt password operations.", ("operation",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+    ))
+
+# the pool workers only run these two functions.
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so the CPU time is not spent holding
+    the GIL of the API worker. At most `workers + queue_size` operations may be
+    pending, past that the request is rejected with 429 instead of queueing.
+    """
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(workers + queue_size, 1))
+        self._stats_lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+        self._latency = {
+            "hash": {"count": 0, "sum": 0.0, "max": 0.0},
+            "verify": {"count": 0, "sum": 0.0, "max": 0.0},
+        }
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        return self._executor
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._rejected += 1
+
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many password operations in progress, try again later.",
+                headers={"Retry-After": "1"}
+                )
+
+        with self._stats_lock:
+            self._pending += 1
+
+        return time.perf_counter()
+
+    def _release(self, operation: str, started: float):
+        elapsed = time.perf_counter() - started
+        password_hash_duration.observe((operation,), elapsed)
+
+        with self._stats_lock:
+            self._pending -= 1
+            latency = self._latency[operation]
+            latency["count"] += 1
+            latency["sum"] += elapsed
+            latency["max"] = max(latency["max"], elapsed)
+
+        self._slots.release()
+
+    def _run(self, operation: str, function, *args):
+        started = self._acquire()
+
+        try:
+            if self.workers <= 0:
+                return function(*args)
+
+            return self._get_executor().submit(function, *args).result()
+        finally:
+            self._release(operation, started)
+
+    async def _run_async(self, operation: str, function, *args):
+        started = self._acquire()
+
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(function, *args)
+
+            return await asyncio.wrap_future(self._get_executor().submit(function, *args))
+        finally:
+            self._release(operation, started)
+
+    def hash(self, password: str) -> str:
+        return self._run("hash", _hash, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._run("verify", _verify, plain_password, hashed_password)
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run_async("hash", _hash, password)
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run_async("verify", _verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "pending": self._pending,
+                "queue_depth": max(self._pending - self.workers, 0),
+                "rejected": self._rejected,
+                "latency": {
+                    operation: dict(latency) for operation, latency in self._latency.items()
+                },
+            }
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=PASSWORD_HASH_WORKERS,
+    queue_size=PASSWORD_HASH_QUEUE_SIZE
+    )
+metrics.register(metrics.Callback(
+    "password_hash_pending", "gauge", "Password operations running or queued.", (),
+    lambda: {(): password_hasher.stats()["pending"]}
+    ))
+metrics.register(metrics.Callback(
+    "password_hash_rejected_total", "counter", "Password operations rejected with 429.", (),
+    lambda: {(): password_hasher.stats()["rejected"]}
+    ))
@@ -0,0 +1,390 @@
+# app/metrics.py
+
+"""Prometheus metrics, served in the text exposition format at `GET /metrics`."""
+
+import bisect
+import functools
+import inspect
+import time
+
+from contextvars import ContextVar
+from threading import get_ident
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+"""
+The counters and histograms are written on every request, so they take no lock:
+each thread only writes its own shard (a dict of the label values), and a scrape
+copies and adds up the shards. A scrape can see a histogram sum one observation
+ahead of its buckets, never a lost update. The other values, such as the pool
+gauges or the caches hits, are read from their owners when scraped.
+"""
+# the response adds "; charset=utf-8".
+CONTENT_TYPE = "text/plain; version=0.0.4"
+# Prometheus' default buckets, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._shards = {}
+
+    def _shard(self) -> dict:
+        shard = self._shards.get(get_ident())
+
+        if shard is None:
+            shard = self._shards.setdefault(get_ident(), {})
+
+        return shard
+
+    def inc(self, labels: tuple = (), value: float = 1.0):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + value
+
+    def values(self) -> dict:
+        totals = {}
+
+        for shard in list(self._shards.values()):
+            for labels, value in dict(shard).items():
+                totals[labels] = totals.get(labels, 0.0) + value
+
+        return totals
+
+    def samples(self):
+        for labels, value in sorted(self.values().items()):
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), value: float = 1.0):
+        self.inc(labels, -value)
+
+
+class Histogram(Counter):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: tuple, value: float):
+        shard = self._shard()
+        # one count per bucket, then the +Inf count and the sum.
+        counts = shard.get(labels)
+
+        if counts is None:
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def values(self) -> dict:
+        totals = {}
+
+        for shard in list(self._shards.values()):
+            for labels, counts in dict(shard).items():
+                total = totals.get(labels, [0] * len(counts))
+                totals[labels] = [left + right for left, right in zip(total, list(counts))]
+
+        return totals
+
+    def samples(self):
+        for labels, counts in sorted(self.values().items()):
+            labels = dict(zip(self.labelnames, labels))
+            cumulative = 0
+
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format(bound)}, cumulative
+
+            yield f"{self.name}_count", labels, cumulative
+            yield f"{self.name}_sum", labels, counts[-1]
+
+
+class Callback:
+    """A metric read from its owner when scraped, `function()` returns `{labels: value}`."""
+    def __init__(self, name: str, kind: str, documentation: str, labelnames: tuple, function):
+        self.name = name
+        self.kind = kind
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.function = function
+
+    def samples(self):
+        for labels, value in sorted(self.function().items()):
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+def _format(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def render() -> str:
+    lines = []
+
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+        for name, labels, value in metric.samples():
+            if labels:
+                name += "{" + ",".join(f'{label}="{_escape(text)}"' for label, text in labels.items()) + "}"
+
+            lines.append(f"{name} {_format(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+"""
+HTTP requests, keyed by the path template of the route that served them, so
+`/api/book/{title}` is one series whatever the title. Requests no route matched
+are counted under `unmatched`.
+"""
+http_requests = register(Counter(
+    "http_requests_total", "HTTP requests served.", ("method", "route", "status")
+    ))
+http_request_duration = register(Histogram(
+    "http_request_duration_seconds", "Time to serve an HTTP request, body included.", ("method", "route")
+    ))
+http_requests_in_flight = register(Gauge(
+    "http_requests_in_flight", "HTTP requests being served."
+    ))
+
+
+class MetricsMiddleware:
+    """ASGI middleware that counts and times the HTTP requests."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+            await send(message)
+
+        http_requests_in_flight.inc()
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            # the router stores the matched route in the scope.
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            http_requests.inc((scope["method"], path, str(status_code)))
+            http_request_duration.observe((scope["method"], path), time.perf_counter() - started)
+
+
+"""
+SQL statements, keyed by what issued them: the controller function, such as
+`genre_controller.get_genre`, the startup step or background job, such as
+`suggestions.load`, or else the route handler of the request, such as
+`routes.read_genre`. The label is set in a context variable, by `labelled` on the
+controller functions and jobs or by a dependency of the router, and read by the
+cursor listener; the threadpool and the greenlets of the async engine run with the
+context of the request.
+"""
+sql_statements = register(Counter(
+    "db_statements_total", "SQL statements executed, by controller function or background job.", ("controller",)
+    ))
+sql_statement_seconds = register(Counter(
+    "db_statement_seconds_total", "Time spent executing SQL statements, by controller function or background job.", ("controller",)
+    ))
+
+_statement_label = ContextVar("statement_label", default="other")
+
+
+def endpoint_label(endpoint) -> str:
+    return f"{endpoint.__module__.rsplit('.', 1)[-1]}.{endpoint.__name__}"
+
+async def label_request(request: Request):
+    """Router dependency, the statements of the request outside a labelled controller are counted under its route handler."""
+    # async, a sync dependency would set it in a copy of the context, in the threadpool.
+    _statement_label.set(endpoint_label(request.scope["route"].endpoint))
+
+def labelled(label: str):
+    """
+    Decorator, the statements of the function are counted under `label`. It takes
+    plain and async functions, and generators, whose body runs one step at a time,
+    possibly each in another copy of the context (StreamingResponse).
+    """
+    def decorator(function):
+        if inspect.isasyncgenfunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                iterator = function(*args, **kwargs)
+
+                try:
+                    while True:
+                        token = _statement_label.set(label)
+
+                        try:
+                            item = await iterator.__anext__()
+                        except StopAsyncIteration:
+                            return
+                        finally:
+                            _statement_label.reset(token)
+
+                        yield item
+                finally:
+                    # a response cut short closes the body, and its session, early.
+                    await iterator.aclose()
+        elif inspect.isgeneratorfunction(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                iterator = function(*args, **kwargs)
+
+                try:
+                    while True:
+                        token = _statement_label.set(label)
+
+                        try:
+                            item = next(iterator)
+                        except StopIteration:
+                            return
+                        finally:
+                            _statement_label.reset(token)
+
+                        yield item
+                finally:
+                    # a response cut short closes the body, and its session, early.
+                    iterator.close()
+        elif inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                token = _statement_label.set(label)
+
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    _statement_label.reset(token)
+        else:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                token = _statement_label.set(label)
+
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    _statement_label.reset(token)
+
+        return wrapper
+
+    return decorator
+
+def issuing_controller() -> str:
+    """The label of the current SQL statement, `other` outside of a request or a labelled function."""
+    return _statement_label.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+
+    if started is not None:
+        labels = (issuing_controller(),)
+        sql_statements.inc(labels)
+        sql_statement_seconds.inc(labels, time.perf_counter() - started)
+
+
+"""
+Connection pool. The engines are built with the pools below, which time how long a
+checkout waits for a free connection; the sizes are read from the pools themselves.
+"""
+pool_wait = register(Histogram(
+    "db_pool_wait_seconds", "Time a connection checkout waited for the pool.", ("engine",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+    ))
+pool_timeouts = register(Counter(
+    "db_pool_timeouts_total", "Connection checkouts that gave up waiting for the pool.", ("engine",)
+    ))
+
+
+class TimedPool:
+    engine_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_timeouts.inc((self.engine_label,))
+            raise
+        finally:
+            pool_wait.observe((self.engine_label,), time.perf_counter() - started)
+
+
+class TimedQueuePool(TimedPool, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(TimedPool, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+def _pool_stats(engines: dict) -> dict:
+    stats = {}
+
+    for label, engine in engines.items():
+        pool = engine.pool
+
+        if not isinstance(pool, QueuePool):
+            continue
+
+        stats[(label, "size")] = pool.size()
+        stats[(label, "checked_out")] = pool.checkedout()
+        stats[(label, "checked_in")] = pool.checkedin()
+        stats[(label, "overflow")] = max(pool.overflow(), 0)
+
+    return stats
+
+
+def install(engine, async_engine=None):
+    """Counts the statements of the engines and exposes their pools."""
+    engines = {"sync": engine}
+
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+
+    for database_engine in engines.values():
+        if not event.contains(database_engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(database_engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(database_engine, "after_cursor_execute", _after_cursor_execute)
+
+    register(Callback(
+        "db_pool_connections", "gauge", "Connections of the pool, by state.", ("engine", "state"),
+        lambda: _pool_stats(engines)
+        ))
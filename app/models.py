@@ -10,7 +10,9 @@ from sqlalchemy import (
     Date, 
     DateTime,
     ForeignKey,
-    Text
+    Index,
+    Text,
+    UniqueConstraint
     )
 from sqlalchemy.orm import relationship
 from app.config import Base
@@ -25,6 +27,13 @@ class BookGenre(Base):
     genre_id = Column("genre_id", ForeignKey("Genres.uuid"))
     timestamp = Column(DateTime, default=datetime.utcnow())
 
+    # a book has a genre once. The unique index serves book -> genres and the
+    # cascades on book_id, the second one walks genre -> books in book order.
+    __table_args__ = (
+        UniqueConstraint("book_id", "genre_id", name="uq_BookGenres_book_id_genre_id"),
+        Index("ix_BookGenres_genre_id_book_id", "genre_id", "book_id"),
+    )
+
 # create your model in here!
 class Book(Base):
     __tablename__ = "Books"
@@ -38,6 +47,18 @@ class Book(Base):
     publisher = Column(String(255), nullable=True)
     published = Column(Date, default=datetime(2017, 12, 4))
     timestamp = Column(DateTime, default=datetime.utcnow())
+    version = Column(Integer, nullable=False, default=1)
+
+    # every UPDATE checks and bumps the version, used for the ETag.
+    __mapper_args__ = {"version_id_col": version}
+    # author -> books, in the uuid order of the books page cursor, and the
+    # filters and sort orders of the books list (see book_controller.BOOK_SORTS).
+    __table_args__ = (
+        Index("ix_Books_author_id_uuid", "author_id", "uuid"),
+        Index("ix_Books_publisher_uuid", "publisher", "uuid"),
+        Index("ix_Books_published_uuid", "published", "uuid"),
+        Index("ix_Books_pages_uuid", "pages", "uuid"),
+    )
 
     # create relationship.
     author = relationship("Author", back_populates="books")
@@ -52,6 +73,9 @@ class Author(Base):
     nationality = Column(String(255), nullable=True)
     biography = Column(Text, nullable=True)
     timestamp = Column(DateTime, default=datetime.utcnow())
+    version = Column(Integer, nullable=False, default=1)
+
+    __mapper_args__ = {"version_id_col": version}
 
     # create relationship.
     books = relationship("Book", back_populates="author")
@@ -63,6 +87,9 @@ class Genre(Base):
     name = Column(String(255), unique=True, nullable=False)
     description = Column(Text, nullable=True)
     timestamp = Column(DateTime, default=datetime.utcnow())
+    version = Column(Integer, nullable=False, default=1)
+
+    __mapper_args__ = {"version_id_col": version}
 
     # create relationship.
     books = relationship("Book", secondary="BookGenres", back_populates="genres")
@@ -75,3 +102,10 @@ class User(Base):
     password = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     timestamp = Column(DateTime, default=datetime.utcnow())
+
+class RevokedToken(Base):
+    __tablename__ = "RevokedTokens"
+
+    jti = Column(String(36), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False, default=datetime.utcnow)
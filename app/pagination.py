@@ -0,0 +1,108 @@
+# app/pagination.py
+
+"""Keyset (cursor) pagination helpers."""
+
+import base64
+import binascii
+import json
+
+from datetime import date, datetime
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+
+"""
+Every list endpoint is ordered on an indexed, unique key (the uuid primary key by
+default). The cursor is an opaque, url-safe token holding the key values of the
+last row of the previous page, so the next page is a plain index seek instead of
+an OFFSET that makes the database scan and throw away every earlier row.
+"""
+def encode_cursor(values: tuple) -> str:
+    raw = json.dumps(
+        [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values],
+        separators=(",", ":")
+        )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns: tuple) -> tuple:
+    invalid_cursor = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor."
+        )
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise invalid_cursor
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise invalid_cursor
+
+    try:
+        return tuple(
+            _coerce(column, value) for column, value in zip(columns, values)
+            )
+    except (TypeError, ValueError):
+        raise invalid_cursor
+
+def _coerce(column, value):
+    python_type = column.type.python_type
+
+    if value is None:
+        return None
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+
+    return python_type(value)
+
+def paginate(query, columns: tuple, cursor: str | None = None, limit: int = 100, descending: bool = False, skip: int = 0):
+    """
+    Apply the keyset condition, ordering and limit to a Query or a Select.
+
+    One extra row is fetched so `make_page` knows whether there is a next page.
+    `skip` is the deprecated offset of the list routes, applied after the cursor.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+
+        if len(columns) == 1:
+            key, bound = columns[0], values[0]
+        else:
+            key, bound = tuple_(*columns), tuple_(*values)
+
+        query = query.where(key < bound if descending else key > bound)
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+
+    query = query.order_by(*ordering).limit(limit + 1)
+
+    return query.offset(skip) if skip else query
+
+def make_page(rows: list, columns: tuple, limit: int = 100) -> dict:
+    next_cursor = None
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(
+            tuple(getattr(rows[-1], column.key) for column in columns)
+            )
+
+    return {
+        "data": rows,
+        "next_cursor": next_cursor
+    }
+
+def make_pages(rows: list, parents: list, columns: tuple, limit: int = 100) -> dict:
+    """
+    `make_page` of the items of each parent, from `(item, parent)` rows fetched
+    `limit + 1` per parent. A parent without any row gets an empty page.
+    """
+    grouped = {parent: [] for parent in parents}
+
+    for item, parent in rows:
+        grouped[parent].append(item)
+
+    return {parent: make_page(items, columns, limit=limit) for parent, items in grouped.items()}
@@ -0,0 +1,195 @@
+# app/profiling.py
+
+"""Per-request profiling of a sample of the requests."""
+
+import inspect
+import logging
+import random
+import time
+
+import fastapi
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi import routing
+from sqlalchemy import event
+from app import config
+
+logger = logging.getLogger(__name__)
+
+
+"""
+A sampled request carries a `Profile` in a context variable, which the threadpool
+copies into the worker thread of a sync controller, so the SQLAlchemy cursor events,
+the serializers and the threadpool of that request all add their time to it.
+The other requests only pay one context variable lookup at each of these points.
+"""
+_profile = ContextVar("profile", default=None)
+
+# Server-Timing metric names, in the order of the header.
+TIMINGS = ("sql", "serialize", "threadpool")
+
+
+class Profile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.timings = dict.fromkeys(TIMINGS, 0.0)
+
+    def add(self, name: str, seconds: float):
+        self.timings[name] += seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total: float) -> str:
+        metrics = [f"total;dur={total * 1000:.2f}"]
+
+        for name, seconds in self.timings.items():
+            metric = f"{name};dur={seconds * 1000:.2f}"
+            metrics.append(f'{metric};desc="{self.queries} queries"' if name == "sql" else metric)
+
+        return ", ".join(metrics)
+
+
+def current() -> Profile | None:
+    return _profile.get()
+
+@contextmanager
+def span(name: str):
+    """Adds the time of the block to `name` of the current profile, when the request is sampled."""
+    profile = _profile.get()
+
+    if profile is None:
+        yield
+        return
+
+    started = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _profile.get() is not None:
+        context._profile_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile.get()
+    started = getattr(context, "_profile_started", None)
+
+    if profile is not None and started is not None:
+        profile.queries += 1
+        profile.add("sql", time.perf_counter() - started)
+
+def listen(engine):
+    """Counts the statements of `engine` (a sync engine, or the sync_engine of an async one)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+_serialize_response = routing.serialize_response
+
+def queued(function):
+    """`function`, adding the time it waits for a free threadpool worker to the current profile."""
+    profile = _profile.get()
+
+    if profile is None:
+        return function
+
+    submitted = time.perf_counter()
+
+    def call(*args, **kwargs):
+        profile.add("threadpool", time.perf_counter() - submitted)
+        return function(*args, **kwargs)
+
+    return call
+
+async def serialize_response(**kwargs):
+    # the response_model validation of the routes that return rows.
+    with span("serialize"):
+        return await _serialize_response(**kwargs)
+
+def _wraps_serialize_response() -> bool:
+    """
+    Whether FastAPI still calls the global `fastapi.routing.serialize_response`, as a
+    coroutine with keyword arguments only, from its request handler. `serialize_response`
+    relies on all three.
+    """
+    handlers = [
+        code for code in routing.get_request_handler.__code__.co_consts
+        if inspect.iscode(code)
+        ]
+    parameters = inspect.signature(_serialize_response).parameters.values()
+
+    return (
+        any("serialize_response" in code.co_names for code in handlers)
+        and inspect.iscoroutinefunction(_serialize_response)
+        and all(parameter.kind is inspect.Parameter.KEYWORD_ONLY for parameter in parameters)
+        )
+
+def install():
+    """
+    Hooks the engines and FastAPI's response serializer. FastAPI looks it up in
+    `fastapi.routing` on every request, it is kept apart there for profiling. A
+    FastAPI version that calls it otherwise is left alone, with a warning.
+    """
+    listen(config.engine)
+
+    if config.async_engine is not None:
+        listen(config.async_engine.sync_engine)
+
+    if not _wraps_serialize_response():
+        logger.warning(
+            "fastapi %s does not call routing.serialize_response as expected, the serialize time is not profiled.",
+            fastapi.__version__
+            )
+        return
+
+    routing.serialize_response = serialize_response
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles `sample_rate` of the HTTP requests, adds the
+    `Server-Timing` header to their response and logs one line for each of them
+    on the `app.profiling` logger.
+    """
+    def __init__(self, app, sample_rate: float = 1.0, server_timing: bool = True):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            return await self.app(scope, receive, send)
+
+        profile = Profile()
+        token = _profile.set(profile)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", profile.server_timing(profile.elapsed()).encode()))
+                    message = {**message, "headers": headers}
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _profile.reset(token)
+            logger.info(
+                "request method=%s path=%s status=%d total_ms=%.2f sql_count=%d sql_ms=%.2f serialize_ms=%.2f threadpool_ms=%.2f",
+                scope["method"], scope["path"], status_code, profile.elapsed() * 1000, profile.queries,
+                *(profile.timings[name] * 1000 for name in TIMINGS)
+                )
@@ -0,0 +1,120 @@
+# app/revocation.py
+
+"""Revoked tokens store, checked on every protected request."""
+
+import logging
+import threading
+import time
+
+from datetime import datetime
+from sqlalchemy import select, delete
+from app import metrics, models
+from app.config import (
+    engine,
+    SessionLocal,
+    TOKEN_REVOCATION_PERSIST,
+    TOKEN_REVOCATION_PURGE_INTERVAL
+    )
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationStore:
+    """
+    In-memory set of revoked token ids (`jti` claim) with their expiry time.
+
+    `is_revoked` is a single dict lookup. Entries are only needed until the token
+    expires by itself, a background thread purges them after that so memory stays
+    bounded. When `persist` is on every revocation is also written to the
+    RevokedTokens table, which is reloaded on each purge so all workers see it.
+    """
+    def __init__(self, persist: bool = False, purge_interval: float = 60):
+        self.persist = persist
+        self.purge_interval = purge_interval
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._synced_at = datetime.min
+
+    def is_revoked(self, jti: str | None) -> bool:
+        return jti is not None and jti in self._revoked
+
+    def revoke(self, jti: str, expires_at: float):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+        if self.persist:
+            with SessionLocal() as session:
+                session.merge(models.RevokedToken(
+                    jti=jti,
+                    expires_at=datetime.utcfromtimestamp(expires_at),
+                    revoked_at=datetime.utcnow()
+                    ))
+                session.commit()
+
+    @metrics.labelled("revocation.purge")
+    def purge(self):
+        now = time.time()
+
+        with self._lock:
+            for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+                del self._revoked[jti]
+
+        if self.persist:
+            with SessionLocal() as session:
+                session.execute(
+                    delete(models.RevokedToken).where(models.RevokedToken.expires_at <= datetime.utcnow())
+                    )
+                session.commit()
+
+            self.load()
+
+    @metrics.labelled("revocation.load")
+    def load(self):
+        # pick up revocations written by the other workers since the last load.
+        with SessionLocal() as session:
+            rows = session.execute(
+                select(models.RevokedToken.jti, models.RevokedToken.expires_at, models.RevokedToken.revoked_at)
+                .where(models.RevokedToken.revoked_at >= self._synced_at)
+                .where(models.RevokedToken.expires_at > datetime.utcnow())
+                ).all()
+
+        with self._lock:
+            for jti, expires_at, revoked_at in rows:
+                # stored as naive UTC datetimes.
+                self._revoked[jti] = (expires_at - datetime(1970, 1, 1)).total_seconds()
+                self._synced_at = max(self._synced_at, revoked_at)
+
+    def _run(self):
+        while not self._stop.wait(self.purge_interval):
+            try:
+                self.purge()
+            except Exception:
+                logger.exception("Could not purge the revoked tokens.")
+
+    def start(self):
+        if self.persist:
+            models.RevokedToken.__table__.create(engine, checkfirst=True)
+            self.load()
+
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="token-revocation-purge", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+revocation_store = RevocationStore(
+    persist=TOKEN_REVOCATION_PERSIST,
+    purge_interval=TOKEN_REVOCATION_PURGE_INTERVAL
+    )
@@ -1,54 +1,217 @@
 # app/routes.py
 
-"""App routes place."""
+"""
+App routes place. The routes are defined once for both database stacks, they run
+the controllers of the stack picked by `DATABASE_ASYNC` through `call` and `respond`.
+"""
 
 from fastapi import (
+    BackgroundTasks,
     Depends, 
     APIRouter,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
     status,
     )
-from sqlalchemy.orm import Session
-from app import schemas
-from app.config import get_database
-from app.controllers import (
-    author_controller,
-    book_controller, 
-    genre_controller,
-    book_genre_controller,
-    user_controller,
-    authentication_controller
+from app import metrics, profiling, schemas
+from app.cache import (
+    response_cache,
+    BOOK_CACHE_TAGS,
+    AUTHOR_CACHE_TAGS,
+    GENRE_CACHE_TAGS
+    )
+from app.config import (
+    get_async_database,
+    get_database,
+    oauth2_schema,
+    DATABASE_ASYNC,
+    METRICS_ENABLED
+    )
+from app.fieldsets import (
+    Fieldset,
+    book_fields,
+    book_base_fields,
+    author_fields,
+    genre_fields,
+    book_genre_fields,
+    user_fields
     )
+from app.database.slow_queries import slow_queries
+from app.suggest import suggestions
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from typing import Annotated
-from app.controllers.authentication_controller import get_current_user
+from typing import Annotated, Literal
+
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession as DatabaseSession
+    from app.controllers.asynchronous import (
+        author_controller,
+        book_controller, 
+        genre_controller,
+        book_genre_controller,
+        export_controller,
+        import_controller,
+        search_controller,
+        user_controller,
+        authentication_controller
+        )
+    from app.controllers.asynchronous.authentication_controller import get_current_user, get_current_admin
+
+    get_session = get_async_database
+else:
+    from sqlalchemy.orm import Session as DatabaseSession
+    from app.controllers import (
+        author_controller,
+        book_controller, 
+        genre_controller,
+        book_genre_controller,
+        export_controller,
+        import_controller,
+        search_controller,
+        user_controller,
+        authentication_controller
+        )
+    from app.controllers.authentication_controller import get_current_user, get_current_admin
+
+    get_session = get_database
+
+
+async def call(function, **kwargs):
+    """Runs a controller function: awaited on the async stack, in the threadpool on the sync one."""
+    if DATABASE_ASYNC:
+        return await function(**kwargs)
+
+    return await run_in_threadpool(profiling.queued(function), **kwargs)
+
+async def respond(request: Request, **options):
+    """`response_cache.respond` of the stack, its producer and etag run the controllers."""
+    if DATABASE_ASYNC:
+        return await response_cache.respond_async(request, **options)
+
+    return await run_in_threadpool(profiling.queued(response_cache.respond), request, **options)
 
 
-# define route.
-router = APIRouter()
+# define route, the statements outside a labelled controller are counted under the route handler.
+router = APIRouter(dependencies=[Depends(metrics.label_request)])
+
+# the bulk body is read by hand to accept NDJSON, document it for OpenAPI.
+BULK_BOOKS_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {"type": "array", "items": schemas.BookBulkCreateSchema.model_json_schema()},
+            },
+            "application/x-ndjson": {
+                "schema": schemas.BookBulkCreateSchema.model_json_schema(),
+            },
+        },
+    },
+}
 
 """
 BOOKS ROUTES!
 """
 # NOTE: for response_model argument, use schemas!
 @router.get("/api/books", 
-         response_model=list[schemas.BookSchema], 
+         response_model=schemas.BookPageSchema, 
          tags=["books"],
          deprecated=False,
          summary="Read or get all books data.",
          status_code=status.HTTP_200_OK
          )
-def read_books(session: Session = Depends(get_database), skip: int = 0, limit: int = 100,):
+async def read_books(
+    request: Request,
+    session: DatabaseSession = Depends(get_session), 
+    cursor: str | None = None, 
+    limit: int = Query(default=100, ge=1, le=1000),
+    skip: int = Query(default=0, ge=0, deprecated=True),
+    filters: schemas.BookFilterSchema = Depends(book_controller.book_filters),
+    fieldset: Fieldset = Depends(book_fields),
+    ):
     """
-    Read or get all books data and paginate the data's with skip and limit query.
+    Read or get all books data and paginate the data's with cursor and limit query.
 
     **Parameters**:
-    - **skip**: Skip certain number of item before returning the items. Default = 0.
+    - **cursor**: Opaque cursor from the previous page `next_cursor`. Default = None (first page).
     - **limit**: Maximum number of items to be returned. Default = 100.
+    - **skip**: Deprecated, number of items skipped before the page, use **cursor** instead. Default = 0.
+    - **genre**: Only the books of the genre with this name. Default = None.
+    - **author**: Only the books of the author with this name. Default = None.
+    - **publisher**: Only the books of this publisher. Default = None.
+    - **published_from**, **published_to**: Inclusive range of publication dates. Default = None.
+    - **pages_min**, **pages_max**: Inclusive range of page counts. Default = None.
+    - **sort**: `uuid`, `title`, `published` or `pages`, prefixed with `-` for descending order. Default = uuid.
+    - **fields**: Comma separated fields to return, dotted for the fields of a nested object (`title,author.name`). Default = None (every field).
+
+    A genre, author or publisher filter is only sorted by uuid, and without one a range filter
+    needs the sort of its own column, so every combination is served by an index; the other
+    combinations are rejected with 400.
     """
-    return book_controller.get_all_books(
-        session=session,
-        skip=skip,
-        limit=limit
+    return await respond(
+        request,
+        tags=BOOK_CACHE_TAGS,
+        response_model=fieldset.model(schemas.BookPageSchema),
+        producer=lambda: book_controller.get_all_books(
+            session=session,
+            cursor=cursor,
+            limit=limit,
+            skip=skip,
+            filters=filters,
+            fieldset=fieldset
+            ),
+        etag=lambda: book_controller.get_all_books_etag(
+            session=session,
+            cursor=cursor,
+            limit=limit,
+            skip=skip,
+            filters=filters,
+            fieldset=fieldset
+            )
+        )
+
+# NOTE: for response_model argument, use schemas!
+@router.get("/api/search/books", 
+         response_model=schemas.BookPageSchema, 
+         tags=["books"],
+         deprecated=False,
+         summary="Search books by title, synopsis, publisher or author name.",
+         status_code=status.HTTP_200_OK
+         )
+async def search_books(
+    request: Request,
+    q: str = Query(min_length=1, max_length=200),
+    session: DatabaseSession = Depends(get_session), 
+    cursor: str | None = None, 
+    limit: int = Query(default=20, ge=1, le=100),
+    fieldset: Fieldset = Depends(book_fields),
+    ):
+    """
+    Full-text search of books, best matches first. Every word of the query must match
+    the title, synopsis, publisher or author name, as a word or a word prefix.
+
+    **Parameters**:
+    - **q**: Words to search for.
+    - **cursor**: Opaque cursor from the previous page `next_cursor`. Default = None (first page).
+    - **limit**: Maximum number of items to be returned. Default = 20.
+    - **fields**: Comma separated fields to return, dotted for the fields of a nested object (`title,author.name`). Default = None (every field).
+    """
+    return await respond(
+        request,
+        tags=BOOK_CACHE_TAGS,
+        response_model=fieldset.model(schemas.BookPageSchema),
+        producer=lambda: search_controller.search_books(
+            q=q,
+            session=session,
+            cursor=cursor,
+            limit=limit,
+            fieldset=fieldset
+            )
         )
 
 # NOTE: for response_model argument, use schemas!
@@ -59,19 +222,46 @@ def read_books(session: Session = Depends(get_database), skip: int = 0, limit: i
           summary="Create relationship between book and author, plus create one book data.",
           status_code=status.HTTP_201_CREATED
           )
-def create_book(author_id: str, book: schemas.BookSchemaCreate, session: Session = Depends(get_database)):
+async def create_book(author_id: str, book: schemas.BookSchemaCreate, session: DatabaseSession = Depends(get_session)):
     """
     Create one book data and create relationship with author.
 
     **Parameter**:
     - **author_id**: Identifier of author to be connected.
     """
-    return book_controller.create_book(
+    return await call(
+        book_controller.create_book,
         author_id=author_id,
         book=book,
         session=session
         )
 
+# NOTE: for response_model argument, use schemas!
+@router.post("/api/books/bulk", 
+          response_model=schemas.BookBulkSchema, 
+          tags=["books"],
+          deprecated=False,
+          summary="Create many books in one transaction.",
+          status_code=status.HTTP_200_OK,
+          openapi_extra=BULK_BOOKS_REQUEST_BODY
+          )
+async def create_books_bulk(request: Request, session: DatabaseSession = Depends(get_session)):
+    """
+    Create many books at once from a JSON array, or from a NDJSON body
+    (`Content-Type: application/x-ndjson`) with one book per line. Every item also
+    has the `author_id` of its author.
+
+    Items are inserted in chunks of `BULK_CHUNK_SIZE` rows in a single transaction. The
+    response has one result per item: `created`, `conflict` when the ISBN or title
+    already exists, or `invalid` with the reason.
+    """
+    items = book_controller.parse_bulk_body(await request.body(), request.headers.get("content-type"))
+    return await call(
+        book_controller.create_books_bulk,
+        items=items,
+        session=session
+        )
+
 # NOTE: for response_model argument, use schemas!
 @router.get("/api/book/{title}", 
          response_model=schemas.BookSchema, 
@@ -80,16 +270,34 @@ def create_book(author_id: str, book: schemas.BookSchemaCreate, session: Session
          summary="Read or get one book data base on book title.",
          status_code=status.HTTP_200_OK
          )
-def read_book(title: str, session: Session = Depends(get_database)):
+async def read_book(
+    request: Request,
+    title: str,
+    session: DatabaseSession = Depends(get_session),
+    fieldset: Fieldset = Depends(book_fields),
+    ):
     """
     Read or get one book base on book title.
 
-    **Parameter**:
+    **Parameters**:
     - **title**: The title name of the book to be returned.
+    - **fields**: Comma separated fields to return, dotted for the fields of a nested object (`title,author.name`). Default = None (every field).
     """
-    return book_controller.get_book(
-        title=title, 
-        session=session
+    suggestions.hit("book", title)
+    return await respond(
+        request,
+        tags=BOOK_CACHE_TAGS,
+        response_model=fieldset.model(),
+        producer=lambda: book_controller.get_book(
+            title=title, 
+            session=session,
+            fieldset=fieldset
+            ),
+        etag=lambda: book_controller.get_book_etag(
+            title=title, 
+            session=session,
+            fieldset=fieldset
+            )
         )
 
 # NOTE: for response_model argument, use schemas!
@@ -100,17 +308,25 @@ def read_book(title: str, session: Session = Depends(get_database)):
            summary="Update book data base on book title.",
            status_code=status.HTTP_200_OK
            )
-def update_book(title: str, book: schemas.BookSchemaUpdate, session: Session = Depends(get_database)):
+async def update_book(
+    title: str, 
+    book: schemas.BookSchemaUpdate, 
+    session: DatabaseSession = Depends(get_session),
+    if_match: str | None = Header(default=None),
+    ):
     """
     Update one book data base on book title.
 
-    **Parameter**:
+    **Parameters**:
     - **title**: The title name of the book to be returned.
+    - **If-Match**: ETag from a previous read, the update fails with 412 when the data was changed since. Default = None.
     """
-    return book_controller.update_book(
+    return await call(
+        book_controller.update_book,
         title=title, 
         book=book,
-        session=session
+        session=session,
+        if_match=if_match
         )
 
 @router.delete("/api/book/{title}",
@@ -120,14 +336,15 @@ def update_book(title: str, book: schemas.BookSchemaUpdate, session: Session = D
             summary="Delete one book data base on book title.",
             status_code=status.HTTP_200_OK
             )
-def delete_book(title: str, session: Session = Depends(get_database)):
+async def delete_book(title: str, session: DatabaseSession = Depends(get_session)):
     """
     Delete one book data base on book title.
 
     **Parameter**:
     - **title**: The title name of the book to be deleted.
     """
-    return book_controller.delete_book(
+    return await call(
+        book_controller.delete_book,
         title=title,
         session=session
         )
@@ -139,7 +356,7 @@ def delete_book(title: str, session: Session = Depends(get_database)):
               summary="Change author by book title",
               status_code=status.HTTP_200_OK
               )
-def update_author_by_book(title: str, book: schemas.BookAuthorSchemaUpdate, session: Session = Depends(get_database)):
+async def update_author_by_book(title: str, book: schemas.BookAuthorSchemaUpdate, session: DatabaseSession = Depends(get_session)):
     """
     Change author by book title.
 
@@ -152,7 +369,8 @@ def update_author_by_book(title: str, book: schemas.BookAuthorSchemaUpdate, sess
     jump directly to the endpoint **/api/book/{title}**, \
     there you can get the author UUID and also the title of the book
     """
-    return book_controller.update_author_by_title(
+    return await call(
+        book_controller.update_author_by_title,
         title=title,
         book=book,
         session=session
@@ -163,23 +381,43 @@ AUTHORS ROUTES!
 """
 # NOTE: for response_model argument, use schemas!
 @router.get("/api/authors", 
-         response_model=list[schemas.AuthorSchema], 
+         response_model=schemas.AuthorPageSchema, 
          tags=["authors"],
          deprecated=False,
          summary="Read or get all authors data."
          )
-def read_authors(session: Session = Depends(get_database), skip: int = 0, limit: int = 100):
+async def read_authors(
+    request: Request,
+    session: DatabaseSession = Depends(get_session), 
+    cursor: str | None = None, 
+    limit: int = Query(default=100, ge=1, le=1000),
+    skip: int = Query(default=0, ge=0, deprecated=True),
+    books_limit: int = Query(default=10, ge=1, le=100),
+    fieldset: Fieldset = Depends(author_fields),
+    ):
     """
-    Read or get all authors data and paginate the data's with skip and limit query.
+    Read or get all authors data and paginate the data's with cursor and limit query.
 
     **Parameters**:
-    - **skip**: Skip certain number of item before returning the items. Default = 0.
+    - **cursor**: Opaque cursor from the previous page `next_cursor`. Default = None (first page).
     - **limit**: Maximum number of items to be returned. Default = 100.
+    - **skip**: Deprecated, number of items skipped before the page, use **cursor** instead. Default = 0.
+    - **books_limit**: Maximum number of books returned per author, the next ones are read from **/api/author/{name}/books** with `books_next_cursor`. Default = 10.
+    - **fields**: Comma separated fields to return, dotted for the fields of a nested object (`name,books.title`). Default = None (every field).
     """
-    return author_controller.get_all_authors(
-        session=session, 
-        skip=skip,
-        limit=limit)
+    return await respond(
+        request,
+        tags=AUTHOR_CACHE_TAGS,
+        response_model=fieldset.model(schemas.AuthorPageSchema),
+        producer=lambda: author_controller.get_all_authors(
+            session=session, 
+            cursor=cursor,
+            limit=limit,
+            skip=skip,
+            books_limit=books_limit,
+            fieldset=fieldset
+            )
+        )
 
 # NOTE: for response_model argument, use schemas!
 @router.post("/api/author", 
@@ -188,11 +426,12 @@ def read_authors(session: Session = Depends(get_database), skip: int = 0, limit:
           deprecated=False,
           summary="Create one author data."
           )
-def create_author(author: schemas.AuthorSchemaCreate, session: Session = Depends(get_database)):
+async def create_author(author: schemas.AuthorSchemaCreate, session: DatabaseSession = Depends(get_session)):
     """
     Create one author data.
     """
-    return author_controller.create_author(
+    return await call(
+        author_controller.create_author,
         author=author,
         session=session
         )
@@ -204,16 +443,77 @@ def create_author(author: schemas.AuthorSchemaCreate, session: Session = Depends
          deprecated=False,
          summary="Read or get one author data base on author name."
          )
-def read_author(name: str, session: Session = Depends(get_database)):
+async def read_author(
+    request: Request,
+    name: str, 
+    session: DatabaseSession = Depends(get_session),
+    books_cursor: str | None = None,
+    books_limit: int = Query(default=100, ge=1, le=1000),
+    fieldset: Fieldset = Depends(author_fields),
+    ):
     """
-    Read or get one author data base on author name.
+    Read or get one author data base on author name, with one page of the author's books.
 
-    **Parameter**:
+    **Parameters**:
     - **name**: The name of author to be returned.
+    - **books_cursor**: Opaque cursor from the previous `books_next_cursor`. Default = None (first page).
+    - **books_limit**: Maximum number of books to be returned. Default = 100.
+    - **fields**: Comma separated fields to return, dotted for the fields of a nested object (`name,books.title`). Default = None (every field).
     """
-    return author_controller.get_author(
-        name=name,
-        session=session
+    suggestions.hit("author", name)
+    return await respond(
+        request,
+        tags=AUTHOR_CACHE_TAGS,
+        response_model=fieldset.model(),
+        producer=lambda: author_controller.get_author(
+            name=name,
+            session=session,
+            books_cursor=books_cursor,
+            books_limit=books_limit,
+            fieldset=fieldset
+            ),
+        etag=lambda: author_controller.get_author_etag(
+            name=name,
+            session=session,
+            books_cursor=books_cursor,
+            books_limit=books_limit,
+            fieldset=fieldset
+            )
+        )
+
+@router.get("/api/author/{name}/books", 
+         response_model=schemas.BookBasePageSchema, 
+         tags=["authors"],
+         deprecated=False,
+         summary="Read or get books of one author base on author name.",
+         status_code=status.HTTP_200_OK
+         )
+async def read_author_books(
+    name: str, 
+    session: DatabaseSession = Depends(get_session),
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    fieldset: Fieldset = Depends(book_base_fields),
+    ):
+    """
+    Read or get books of one author and paginate the data's with cursor and limit query.
+
+    **Parameters**:
+    - **name**: The name of author.
+    - **cursor**: Opaque cursor from the previous page `next_cursor`. Default = None (first page).
+    - **limit**: Maximum number of items to be returned. Default = 100.
+    - **fields**: Comma separated fields to return, dotted for the fields of a nested object (`title,pages`). Default = None (every field).
+    """
+    return fieldset.response(
+        await call(
+            author_controller.get_author_books,
+            name=name,
+            session=session,
+            cursor=cursor,
+            limit=limit,
+            fieldset=fieldset
+            ),
+        page=schemas.BookBasePageSchema
         )
 
 # NOTE: for response_model argument, use schemas!
@@ -223,17 +523,25 @@ def read_author(name: str, session: Session = Depends(get_database)):
            deprecated=False,
            summary="Update one author data base on author name."
            )
-def update_author(name: str, author: schemas.AuthorSchemaUpdate, session: Session = Depends(get_database)):
+async def update_author(
+    name: str, 
+    author: schemas.AuthorSchemaUpdate, 
+    session: DatabaseSession = Depends(get_session),
+    if_match: str | None = Header(default=None),
+    ):
     """
     Update or change one author data base on author name.
 
-    **Parameter**:
+    **Parameters**:
     - **name**: The name of author to be returned.
+    - **If-Match**: ETag from a previous read, the update fails with 412 when the data was changed since. Default = None.
     """
-    return author_controller.update_author(
+    return await call(
+        author_controller.update_author,
         name=name,
         author=author,
-        session=session
+        session=session,
+        if_match=if_match
         )
 
 @router.delete("/api/author/{name}", 
@@ -243,14 +551,15 @@ def update_author(name: str, author: schemas.AuthorSchemaUpdate, session: Sessio
             summary="Delete one author data base on author name.",
             status_code=status.HTTP_200_OK
             )
-def delete_author(name: str, session: Session = Depends(get_database)):
+async def delete_author(name: str, session: DatabaseSession = Depends(get_session)):
     """
     Delete on author data base on author name.
 
     **Parameter**:
     - **name**: The name of author to be deleted.
     """
-    return author_controller.delete_author(
+    return await call(
+        author_controller.delete_author,
         name=name, 
         session=session
         )
@@ -260,23 +569,42 @@ GENRES ROUTES!
 """
 # NOTE: for response_model argument, use schemas!
 @router.get("/api/genres", 
-         response_model=list[schemas.GenreSchema],
+         response_model=schemas.GenrePageSchema,
          tags=["genres"],
          deprecated=False,
          summary="Read or get all genres book data."
          )
-def read_genres(session: Session = Depends(get_database), skip: int = 0, limit: int = 100):
+async def read_genres(
+    request: Request,
+    session: DatabaseSession = Depends(get_session), 
+    cursor: str | None = None, 
+    limit: int = Query(default=100, ge=1, le=1000),
+    skip: int = Query(default=0, ge=0, deprecated=True),
+    books_limit: int = Query(default=10, ge=1, le=100),
+    fieldset: Fieldset = Depends(genre_fields),
+    ):
     """
-    Read or get all genres data and paginate the data's with skip and limit query.
+    Read or get all genres data and paginate the data's with cursor and limit query.
 
     **Parameters**:
-    - **skip**: Skip certain number of item before returning the items. Default = 0.
+    - **cursor**: Opaque cursor from the previous page `next_cursor`. Default = None (first page).
     - **limit**: Maximum number of items to be returned. Default = 100.
+    - **skip**: Deprecated, number of items skipped before the page, use **cursor** instead. Default = 0.
+    - **books_limit**: Maximum number of books returned per genre, the next ones are read from **/api/genre/{name}/books** with `books_next_cursor`. Default = 10.
+    - **fields**: Comma separated fields to return, dotted for the fields of a nested object (`name,books.title`). Default = None (every field).
     """
-    return genre_controller.get_genres(
-        session=session,
-        skip=skip,
-        limit=limit
+    return await respond(
+        request,
+        tags=GENRE_CACHE_TAGS,
+        response_model=fieldset.model(schemas.GenrePageSchema),
+        producer=lambda: genre_controller.get_genres(
+            session=session,
+            cursor=cursor,
+            limit=limit,
+            skip=skip,
+            books_limit=books_limit,
+            fieldset=fieldset
+            )
         )
 
 # NOTE: for response_model argument, use schemas!
@@ -285,11 +613,12 @@ def read_genres(session: Session = Depends(get_database), skip: int = 0, limit:
           tags=["genres"],
           deprecated=False,
           summary="Create one genre data.")
-def create_genre(genre: schemas.GenreSchemaCreate, session: Session = Depends(get_database)):
+async def create_genre(genre: schemas.GenreSchemaCreate, session: DatabaseSession = Depends(get_session)):
     """
     Create one genre data.
     """
-    return genre_controller.create_genre(
+    return await call(
+        genre_controller.create_genre,
         genre=genre, 
         session=session
         )
@@ -302,16 +631,77 @@ def create_genre(genre: schemas.GenreSchemaCreate, session: Session = Depends(ge
             summary="Read or get one genre data.",
             status_code=status.HTTP_200_OK
             )
-def read_genre(name: str, session: Session = Depends(get_database)):
+async def read_genre(
+    request: Request,
+    name: str, 
+    session: DatabaseSession = Depends(get_session),
+    books_cursor: str | None = None,
+    books_limit: int = Query(default=100, ge=1, le=1000),
+    fieldset: Fieldset = Depends(genre_fields),
+    ):
     """
-    Read or get one genre data.
+    Read or get one genre data, with one page of the genre's books.
 
-    **Parameter**:
+    **Parameters**:
     - **name**: The name of genre to be returned.
+    - **books_cursor**: Opaque cursor from the previous `books_next_cursor`. Default = None (first page).
+    - **books_limit**: Maximum number of books to be returned. Default = 100.
+    - **fields**: Comma separated fields to return, dotted for the fields of a nested object (`name,books.title`). Default = None (every field).
     """
-    return genre_controller.get_genre(
-        name=name, 
-        session=session
+    suggestions.hit("genre", name)
+    return await respond(
+        request,
+        tags=GENRE_CACHE_TAGS,
+        response_model=fieldset.model(),
+        producer=lambda: genre_controller.get_genre(
+            name=name, 
+            session=session,
+            books_cursor=books_cursor,
+            books_limit=books_limit,
+            fieldset=fieldset
+            ),
+        etag=lambda: genre_controller.get_genre_etag(
+            name=name, 
+            session=session,
+            books_cursor=books_cursor,
+            books_limit=books_limit,
+            fieldset=fieldset
+            )
+        )
+
+@router.get("/api/genre/{name}/books",
+            response_model=schemas.BookBasePageSchema,
+            tags=["genres"],
+            deprecated=False,
+            summary="Read or get books of one genre.",
+            status_code=status.HTTP_200_OK
+            )
+async def read_genre_books(
+    name: str, 
+    session: DatabaseSession = Depends(get_session),
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    fieldset: Fieldset = Depends(book_base_fields),
+    ):
+    """
+    Read or get books of one genre and paginate the data's with cursor and limit query.
+
+    **Parameters**:
+    - **name**: The name of genre.
+    - **cursor**: Opaque cursor from the previous page `next_cursor`. Default = None (first page).
+    - **limit**: Maximum number of items to be returned. Default = 100.
+    - **fields**: Comma separated fields to return, dotted for the fields of a nested object (`title,pages`). Default = None (every field).
+    """
+    return fieldset.response(
+        await call(
+            genre_controller.get_genre_books,
+            name=name,
+            session=session,
+            cursor=cursor,
+            limit=limit,
+            fieldset=fieldset
+            ),
+        page=schemas.BookBasePageSchema
         )
 
 # NOTE: for response_model argument, use schemas!
@@ -322,17 +712,25 @@ def read_genre(name: str, session: Session = Depends(get_database)):
               summary="Update one genre data.",
               status_code=status.HTTP_200_OK
               )
-def update_genre(name: str, genre: schemas.GenreSchemaUpdate, session: Session = Depends(get_database)):
+async def update_genre(
+    name: str, 
+    genre: schemas.GenreSchemaUpdate, 
+    session: DatabaseSession = Depends(get_session),
+    if_match: str | None = Header(default=None),
+    ):
     """
     Update or change one genre data.
 
-    **Parameter**:
+    **Parameters**:
     - **name**: The name of genre to be returned.
+    - **If-Match**: ETag from a previous read, the update fails with 412 when the data was changed since. Default = None.
     """
-    return genre_controller.update_genre(
+    return await call(
+        genre_controller.update_genre,
         name=name, 
         genre=genre, 
-        session=session
+        session=session,
+        if_match=if_match
         )
 
 @router.delete("/api/genre/{name}",
@@ -342,14 +740,15 @@ def update_genre(name: str, genre: schemas.GenreSchemaUpdate, session: Session =
                summary="Delete one genre data.",
                status_code=status.HTTP_200_OK
                )
-def delete_genre(name: str, session: Session = Depends(get_database)):
+async def delete_genre(name: str, session: DatabaseSession = Depends(get_session)):
     """
     Delete one genre data.
 
     **Parameter**:
     - **name**: The name of genre to be deleted.
     """
-    return genre_controller.delete_genre(
+    return await call(
+        genre_controller.delete_genre,
         name=name, 
         session=session
         )
@@ -365,9 +764,9 @@ BOOK GENRES ROUTES!
           summary="Create relationship between Books and Genres.",
           status_code=status.HTTP_201_CREATED
           )
-def create_book_genres(
+async def create_book_genres(
     book_genre: schemas.BookGenreSchema, 
-    session: Session = Depends(get_database),
+    session: DatabaseSession = Depends(get_session),
     auth: schemas.UserSchema = Depends(get_current_user)
     ):
     """
@@ -377,7 +776,8 @@ def create_book_genres(
 
     **NOTE**: Use this if book data and genre data have already been filled in or created.
     """
-    return book_genre_controller.create_book_genres(
+    return await call(
+        book_genre_controller.create_book_genres,
         auth=auth,
         book_genre=book_genre,
         session=session
@@ -385,32 +785,42 @@ def create_book_genres(
 
 # NOTE: for response_model argument, use schemas!
 @router.get("/api/book_genres",
-            response_model=list[schemas.BookGenreSchema],
+            response_model=schemas.BookGenrePageSchema,
             tags=["book_genres"],
             deprecated=False,
             summary="Read or get all book genres data.",
             status_code=status.HTTP_200_OK
             )
-def read_book_genres(
+async def read_book_genres(
     auth: schemas.UserSchema = Depends(get_current_user),
-    session: Session = Depends(get_database), 
-    skip: int = 0, 
-    limit: int = 100, 
+    session: DatabaseSession = Depends(get_session), 
+    cursor: str | None = None, 
+    limit: int = Query(default=100, ge=1, le=1000),
+    skip: int = Query(default=0, ge=0, deprecated=True),
+    fieldset: Fieldset = Depends(book_genre_fields),
     ):
     """
     **WARNING**: This endpoint needs access token, make sure you have an access token.
 
-    Read or get all book genres data and paginate the data's with skip and limit query.
+    Read or get all book genres data and paginate the data's with cursor and limit query.
 
     **Parameters**:
-    - **skip**: Skip certain number of item before returning the items. Default = 0.
+    - **cursor**: Opaque cursor from the previous page `next_cursor`. Default = None (first page).
     - **limit**: Maximum number of items to be returned. Default = 100.
+    - **skip**: Deprecated, number of items skipped before the page, use **cursor** instead. Default = 0.
+    - **fields**: Comma separated fields to return, dotted for the fields of a nested object (`book_id,genre_id`). Default = None (every field).
     """
-    return book_genre_controller.get_all_book_genres(
-        auth=auth,
-        session=session,
-        skip=skip,
-        limit=limit
+    return fieldset.response(
+        await call(
+            book_genre_controller.get_all_book_genres,
+            auth=auth,
+            session=session,
+            cursor=cursor,
+            limit=limit,
+            skip=skip,
+            fieldset=fieldset
+            ),
+        page=schemas.BookGenrePageSchema
         )
 
 @router.patch("/api/book_genres/{book_genre_id}", 
@@ -420,11 +830,11 @@ def read_book_genres(
             summary="Update one book genre data.",
             status_code=status.HTTP_200_OK
             )
-def update_book_genre(
+async def update_book_genre(
     book_genre_id: str,
     book_genre: schemas.BookGenreUpdateSchema,
     auth: schemas.UserSchema = Depends(get_current_user), 
-    session: Session = Depends(get_database),
+    session: DatabaseSession = Depends(get_session),
     ):
     """
     **WARNING**: This endpoint needs access token, make sure you have an access token.
@@ -434,7 +844,8 @@ def update_book_genre(
     **Parameters**:
     - **book_genre_id**: Identifier of the book genres or it called UUID.
     """
-    return book_genre_controller.update_book_genre(
+    return await call(
+        book_genre_controller.update_book_genre,
         book_genre_id=book_genre_id, 
         book_genre=book_genre, 
         session=session, 
@@ -448,9 +859,9 @@ def update_book_genre(
                 summary="Delete one book genre data",
                 status_code=status.HTTP_200_OK
                 )
-def delete_book_genre(
+async def delete_book_genre(
     book_genre_id: str, 
-    session: Session = Depends(get_database),
+    session: DatabaseSession = Depends(get_session),
     auth: schemas.UserSchema = Depends(get_current_user),
     ):
     """
@@ -461,38 +872,172 @@ def delete_book_genre(
     **Parameters**:
     - **book_genre_id**: Identifier of the book genres or it called UUID.
     """
-    return book_genre_controller.delete_book_genre(
+    return await call(
+        book_genre_controller.delete_book_genre,
         book_genre_id=book_genre_id, 
         session=session, 
         auth=auth
         )
 
+"""
+SUGGEST ROUTES!
+"""
+# NOTE: for response_model argument, use schemas!
+@router.get("/api/suggest", 
+         response_model=schemas.SuggestSchema, 
+         tags=["suggest"],
+         deprecated=False,
+         summary="Suggest book titles, author names or genre names starting with a prefix.",
+         status_code=status.HTTP_200_OK
+         )
+async def suggest(
+    prefix: str = Query(default="", max_length=255),
+    kind: Literal["book", "author", "genre"] = "book",
+    limit: int = Query(default=10, ge=1, le=20),
+    ):
+    """
+    Suggest names starting with a prefix, most popular first, for autocomplete. Served
+    from memory, case and accents are ignored.
+
+    **Parameters**:
+    - **prefix**: Beginning of the name, an empty prefix returns the most popular names.
+    - **kind**: `book` (titles), `author` or `genre`. Default = book.
+    - **limit**: Maximum number of names to be returned. Default = 10.
+    """
+    return {
+        "kind": kind,
+        "prefix": prefix,
+        "suggestions": suggestions.suggest(kind, prefix, limit=limit)
+    }
+
+"""
+EXPORT ROUTES!
+"""
+@router.get("/api/export/{resource}",
+         tags=["export"],
+         deprecated=False,
+         summary="Stream every books, authors or genres data as NDJSON or CSV.",
+         status_code=status.HTTP_200_OK,
+         response_class=StreamingResponse
+         )
+async def export_catalog(
+    resource: str,
+    format: str = Query(default="ndjson"),
+    auth: schemas.UserSchema = Depends(get_current_user),
+    ):
+    """
+    **WARNING**: This endpoint needs access token, make sure you have an access token.
+
+    Stream the whole `books`, `authors` or `genres` table with constant memory. Books
+    rows have the author name and the genre names (a list in NDJSON, separated by `|`
+    in CSV).
+
+    **Parameters**:
+    - **resource**: `books`, `authors` or `genres`.
+    - **format**: `ndjson` or `csv`. Default = ndjson.
+    """
+    export_controller.check_export(resource=resource, format=format)
+    return StreamingResponse(
+        export_controller.export_rows(resource=resource, format=format),
+        media_type=export_controller.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{resource}.{format}"'}
+        )
+
+"""
+IMPORT ROUTES!
+"""
+# NOTE: for response_model argument, use schemas!
+@router.post("/api/import/{resource}",
+          response_model=schemas.ImportJobSchema,
+          tags=["import"],
+          deprecated=False,
+          summary="Import a JSONL or CSV dump of books, authors or genres.",
+          status_code=status.HTTP_202_ACCEPTED
+          )
+async def import_catalog(
+    resource: str,
+    dump: UploadFile,
+    background_tasks: BackgroundTasks,
+    auth: schemas.UserSchema = Depends(get_current_user),
+    ):
+    """
+    **WARNING**: This endpoint needs access token, make sure you have an access token.
+
+    Upload a `.jsonl`, `.ndjson` or `.csv` dump, in the format of **GET /api/export/{resource}**,
+    and import it in the background. Book authors and genres are matched by name and
+    created when they do not exist, books with an existing ISBN or title and rows with an
+    existing uuid are skipped.
+
+    **Parameters**:
+    - **resource**: `books`, `authors` or `genres`.
+    - **dump**: The dump file.
+    """
+    return await call(
+        import_controller.start_import,
+        resource=resource,
+        dump=dump,
+        background_tasks=background_tasks
+        )
+
+# NOTE: for response_model argument, use schemas!
+@router.get("/api/import/{job}",
+         response_model=schemas.ImportJobSchema,
+         tags=["import"],
+         deprecated=False,
+         summary="Read the progress of an import.",
+         status_code=status.HTTP_200_OK
+         )
+async def read_import(job: str, auth: schemas.UserSchema = Depends(get_current_user)):
+    """
+    **WARNING**: This endpoint needs access token, make sure you have an access token.
+
+    Read the progress of an import: records processed, rows inserted or skipped,
+    validation errors and rows per second.
+
+    **Parameter**:
+    - **job**: The job returned by **POST /api/import/{resource}**.
+    """
+    return await call(
+        import_controller.get_import,
+        job=job
+        )
+
 """
 USER ROUTES!
 """
 @router.get("/api/users", 
-            response_model=list[schemas.UserSchema],
+            response_model=schemas.UserPageSchema,
             tags=["users"],
             deprecated=False,
             summary="Read or get users data.",
             status_code=status.HTTP_200_OK
             )
-def read_users(
-    session: Session = Depends(get_database), 
-    skip: int = 0, 
-    limit: int = 100
+async def read_users(
+    session: DatabaseSession = Depends(get_session), 
+    cursor: str | None = None, 
+    limit: int = Query(default=100, ge=1, le=1000),
+    skip: int = Query(default=0, ge=0, deprecated=True),
+    fieldset: Fieldset = Depends(user_fields),
     ):
     """
-    Read or get users data from database.
+    Read or get users data from database and paginate the data's with cursor and limit query.
 
-    **Parameters**
-    - **skip**: Skip certain number of item before returning the items. Default = 0.
+    **Parameters**:
+    - **cursor**: Opaque cursor from the previous page `next_cursor`. Default = None (first page).
     - **limit**: Maximum number of items to be returned. Default = 100.
+    - **skip**: Deprecated, number of items skipped before the page, use **cursor** instead. Default = 0.
+    - **fields**: Comma separated fields to return, dotted for the fields of a nested object (`username`). Default = None (every field).
     """
-    return user_controller.get_all_users(
-        session=session, 
-        skip=skip, 
-        limit=limit
+    return fieldset.response(
+        await call(
+            user_controller.get_all_users,
+            session=session,
+            cursor=cursor,
+            limit=limit,
+            skip=skip,
+            fieldset=fieldset
+            ),
+        page=schemas.UserPageSchema
         )
 
 @router.post("/api/user", 
@@ -502,14 +1047,15 @@ def read_users(
              summary="Create one user data.", 
              status_code=status.HTTP_201_CREATED
              )
-def create_user(
+async def create_user(
     user: schemas.UserSchemaCreate, 
-    session: Session = Depends(get_database)
+    session: DatabaseSession = Depends(get_session)
     ):
     """
     Create one user data.
     """
-    return user_controller.create_user(
+    return await call(
+        user_controller.create_user,
         user=user, 
         session=session
         )
@@ -521,16 +1067,25 @@ def create_user(
             summary="Read or get one user data base on username.",
             status_code=status.HTTP_200_OK
             )
-def read_user(username: str, session: Session = Depends(get_database)):
+async def read_user(
+    username: str,
+    session: DatabaseSession = Depends(get_session),
+    fieldset: Fieldset = Depends(user_fields),
+    ):
     """
     Read or get one user data from database.
 
-    **Parameter**:
+    **Parameters**:
     - **username**: The name of author to be returned.
+    - **fields**: Comma separated fields to return, dotted for the fields of a nested object (`username,description`). Default = None (every field).
     """
-    return user_controller.get_user(
-        username=username, 
-        session=session
+    return fieldset.response(
+        await call(
+            user_controller.get_user,
+            username=username,
+            session=session,
+            fieldset=fieldset
+            )
         )
 
 @router.patch("/api/user/{username}", 
@@ -540,10 +1095,10 @@ def read_user(username: str, session: Session = Depends(get_database)):
               summary="Update one user data base on username.", 
               status_code=status.HTTP_200_OK
               )
-def update_user(
+async def update_user(
     username: str, 
     user: schemas.UserSchemaUpdate, 
-    session: Session = Depends(get_database)
+    session: DatabaseSession = Depends(get_session)
     ):
     """
     Update or change one user data from database.
@@ -551,7 +1106,8 @@ def update_user(
     **Parameter**:
     - **username**: The name of user to be returned.
     """
-    return user_controller.update_user(
+    return await call(
+        user_controller.update_user,
         username=username, 
         user=user, 
         session=session
@@ -564,14 +1120,15 @@ def update_user(
             summary="Delete one user data.",
             status_code=status.HTTP_200_OK
             )
-def delete_user(username: str, session: Session = Depends(get_database)):
+async def delete_user(username: str, session: DatabaseSession = Depends(get_session)):
     """
     Delete one user data from database.
 
     **Parameter**:
     - **username**: The name of genre to be deleted.
     """
-    return user_controller.delete_user(
+    return await call(
+        user_controller.delete_user,
         username=username, 
         session=session
         )
@@ -586,17 +1143,107 @@ AUTH ROUTES!
              status_code=status.HTTP_200_OK,
              summary="Create one access token."
              )
-def access_token(
+async def access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()], 
-    session: Session = Depends(get_database)
+    session: DatabaseSession = Depends(get_session)
     ):
     """
     Create access token for execute protected routes.
 
     **NOTE**: Make sure to input registered username and password.
     """
-    return authentication_controller.get_access_token(
+    return await call(
+        authentication_controller.get_access_token,
         form_data=form_data, 
         session=session
         )
 
+@router.post("/api/token/refresh", 
+             response_model=schemas.TokenBase, 
+             tags=["authentications"], 
+             deprecated=False,
+             status_code=status.HTTP_200_OK,
+             summary="Create one access token from a refresh token."
+             )
+async def refresh_access_token(refresh: schemas.RefreshTokenSchema, session: DatabaseSession = Depends(get_session)):
+    """
+    Create a new access token from the refresh token returned by **POST /api/token**, \
+    without sending the username and password again.
+    """
+    return await call(
+        authentication_controller.refresh_access_token,
+        refresh=refresh,
+        session=session
+        )
+
+@router.post("/api/logout", 
+             response_model=schemas.LogoutSchema, 
+             tags=["authentications"], 
+             deprecated=False,
+             status_code=status.HTTP_200_OK,
+             summary="Revoke the access token."
+             )
+async def logout(
+    token: str = Depends(oauth2_schema),
+    refresh: schemas.RefreshTokenSchema | None = None
+    ):
+    """
+    **WARNING**: This endpoint needs access token, make sure you have an access token.
+
+    Revoke the access token, so it can not be used anymore even before it expires.
+
+    **NOTE**: Send the refresh token in the body to revoke it too.
+    """
+    return await call(
+        authentication_controller.logout,
+        token=token,
+        refresh=refresh
+        )
+
+"""
+ADMIN ROUTES!
+"""
+@router.get("/api/admin/slow_queries",
+         response_model=schemas.SlowQueriesSchema,
+         tags=["admin"],
+         deprecated=False,
+         summary="Read the slowest SQL statements.",
+         status_code=status.HTTP_200_OK
+         )
+async def read_slow_queries(
+    limit: int = Query(default=20, ge=1, le=1000),
+    order: Literal["total", "max", "mean", "count"] = "total",
+    auth: schemas.UserSchema = Depends(get_current_admin)
+    ):
+    """
+    **WARNING**: This endpoint needs the access token of a user listed in **ADMIN_USERNAMES**, other users get 403.
+
+    Read the statements slower than **SLOW_QUERY_THRESHOLD_MS** since this process
+    started, with the controller functions that ran them and their query plan. A plan
+    that scans a whole table usually means a missing index.
+
+    **Parameters**:
+    - **limit**: Maximum number of statements to be returned. Default = 20.
+    - **order**: `total` (default), `max` or `mean` time, or `count`.
+    """
+    return {
+        "threshold_ms": slow_queries.threshold * 1000,
+        "data": slow_queries.top(limit=limit, order=order)
+    }
+
+"""
+METRICS ROUTES!
+"""
+@router.get("/metrics",
+         include_in_schema=False,
+         status_code=status.HTTP_200_OK
+         )
+async def read_metrics():
+    """
+    Requests, SQL statements, connection pool, caches and password hashing metrics
+    of this process, in the Prometheus text exposition format.
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
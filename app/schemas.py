@@ -12,8 +12,9 @@ from pydantic import (
     Field, 
     PrivateAttr, 
     ConfigDict,
+    field_validator,
     )
-from typing import List
+from typing import Dict, List
 
 
 """
@@ -62,6 +63,39 @@ class BookBase(BaseModel):
 class BookSchemaCreate(BookBase):
     pass
 
+class BookBulkCreateSchema(BookSchemaCreate):
+    # defaults are validated too, so `published` is always a date.
+    model_config = ConfigDict(from_attributes=True, validate_default=True)
+
+    author_id: str = Field(
+        title="Author UUID",
+        description="Identifier of the author to be connected."
+        )
+
+class BookImportSchema(BookSchemaCreate):
+    # defaults are validated too, so `published` is always a date.
+    model_config = ConfigDict(from_attributes=True, validate_default=True)
+
+    author: str | None = Field(
+        default=None,
+        title="Author",
+        description="Name of the author, created when it does not exist yet."
+        )
+    genres: List[str] = Field(
+        default=[],
+        title="Genres",
+        description="Names of the genres, created when they do not exist yet."
+        )
+
+    # CSV dumps separate the genre names with "|".
+    @field_validator("genres", mode="before")
+    @classmethod
+    def split_genres(cls, value):
+        if isinstance(value, str):
+            return [name for name in value.split("|") if name]
+
+        return value
+
 class BookSchemaUpdate(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -328,9 +362,19 @@ class BookAuthorSchema(BookBase):
 
 class AuthorSchema(AuthorBase):
     books: List[BookBase]
+    books_next_cursor: str | None = Field(
+        default=None,
+        title="Books next cursor",
+        description="Cursor of the next page of books, null when there is no more books."
+        )
 
 class GenreSchema(GenreBase):
     books: List[BookBase]
+    books_next_cursor: str | None = Field(
+        default=None,
+        title="Books next cursor",
+        description="Cursor of the next page of books, null when there is no more books."
+        )
 
 class BookGenreSchema(BookGenreBase):
     uuid: str = Field(
@@ -374,6 +418,257 @@ class BookGenreUpdateSchema(BaseModel):
 class UserSchema(UserBase):
     pass
 
+"""
+Filters and sort order of the books list endpoint.
+"""
+class BookFilterSchema(BaseModel):
+    genre: str | None = Field(
+        default=None,
+        title="Genre",
+        description="Only the books of the genre with this name."
+        )
+    author: str | None = Field(
+        default=None,
+        title="Author",
+        description="Only the books of the author with this name."
+        )
+    publisher: str | None = Field(
+        default=None,
+        title="Publisher",
+        description="Only the books of this publisher."
+        )
+    published_from: date | None = Field(
+        default=None,
+        title="Published from",
+        description="Only the books published on or after this date."
+        )
+    published_to: date | None = Field(
+        default=None,
+        title="Published to",
+        description="Only the books published on or before this date."
+        )
+    pages_min: int | None = Field(
+        default=None,
+        ge=0,
+        title="Minimum pages",
+        description="Only the books with at least this many pages."
+        )
+    pages_max: int | None = Field(
+        default=None,
+        ge=0,
+        title="Maximum pages",
+        description="Only the books with at most this many pages."
+        )
+    sort: str = Field(
+        default="uuid",
+        pattern=r"^-?(uuid|title|published|pages)$",
+        title="Sort",
+        description="`uuid`, `title`, `published` or `pages`, prefixed with `-` for descending order."
+        )
+
+"""
+Page schemas for the cursor paginated list endpoints.
+"""
+class BookPageSchema(BaseModel):
+    data: List[BookSchema]
+    next_cursor: str | None = Field(
+        default=None,
+        title="Next cursor",
+        description="Cursor of the next page, null when this is the last page."
+        )
+
+class BookBasePageSchema(BaseModel):
+    data: List[BookBase]
+    next_cursor: str | None = Field(
+        default=None,
+        title="Next cursor",
+        description="Cursor of the next page, null when this is the last page."
+        )
+
+class AuthorPageSchema(BaseModel):
+    data: List[AuthorSchema]
+    next_cursor: str | None = Field(
+        default=None,
+        title="Next cursor",
+        description="Cursor of the next page, null when this is the last page."
+        )
+
+class GenrePageSchema(BaseModel):
+    data: List[GenreSchema]
+    next_cursor: str | None = Field(
+        default=None,
+        title="Next cursor",
+        description="Cursor of the next page, null when this is the last page."
+        )
+
+class BookGenrePageSchema(BaseModel):
+    data: List[BookGenreSchema]
+    next_cursor: str | None = Field(
+        default=None,
+        title="Next cursor",
+        description="Cursor of the next page, null when this is the last page."
+        )
+
+class UserPageSchema(BaseModel):
+    data: List[UserSchema]
+    next_cursor: str | None = Field(
+        default=None,
+        title="Next cursor",
+        description="Cursor of the next page, null when this is the last page."
+        )
+
+"""
+Suggestions of the autocomplete endpoint.
+"""
+class SuggestSchema(BaseModel):
+    kind: str = Field(
+        title="Kind",
+        description="`book`, `author` or `genre`."
+        )
+    prefix: str = Field(
+        title="Prefix",
+        description="Prefix the suggestions start with."
+        )
+    suggestions: List[str] = Field(
+        title="Suggestions",
+        description="Titles or names, most popular first."
+        )
+
+"""
+Result schemas for the bulk creation endpoint.
+"""
+class BookBulkItemSchema(BaseModel):
+    index: int = Field(
+        title="Index",
+        description="Position of the item in the request body."
+        )
+    status: str = Field(
+        title="Status",
+        description="`created`, `conflict` (ISBN or title already exists) or `invalid`."
+        )
+    uuid: str | None = Field(
+        default=None,
+        title="UUID",
+        description="Identifier of the created book."
+        )
+    detail: str | None = Field(
+        default=None,
+        title="Detail",
+        description="Why the item was not created."
+        )
+
+class BookBulkSchema(BaseModel):
+    created: int = Field(
+        title="Created",
+        description="Number of books created."
+        )
+    conflicts: int = Field(
+        title="Conflicts",
+        description="Number of items skipped because of an existing ISBN or title."
+        )
+    invalid: int = Field(
+        title="Invalid",
+        description="Number of items skipped because they failed validation."
+        )
+    results: List[BookBulkItemSchema]
+
+class ImportJobSchema(BaseModel):
+    job: str = Field(
+        title="Job",
+        description="Identifier of the import, used to read its progress."
+        )
+    resource: str = Field(
+        title="Resource",
+        description="`books`, `authors` or `genres`."
+        )
+    records: int = Field(
+        default=0,
+        title="Records",
+        description="Number of records of the dump processed so far."
+        )
+    inserted: int = Field(
+        default=0,
+        title="Inserted",
+        description="Number of rows inserted."
+        )
+    skipped: int = Field(
+        default=0,
+        title="Skipped",
+        description="Number of records skipped because they already exist."
+        )
+    invalid: int = Field(
+        default=0,
+        title="Invalid",
+        description="Number of records that failed validation."
+        )
+    rows_per_second: float = Field(
+        default=0,
+        title="Rows per second",
+        description="Records processed per second."
+        )
+    done: bool = Field(
+        default=False,
+        title="Done",
+        description="Whether the whole dump was imported."
+        )
+    errors: List[str] = Field(
+        default=[],
+        title="Errors",
+        description="First validation errors, with the record number."
+        )
+
+class SlowQuerySchema(BaseModel):
+    statement: str = Field(
+        title="Statement",
+        description="SQL statement, expanded IN lists shown as `(...)`."
+        )
+    count: int = Field(
+        title="Count",
+        description="Number of times the statement was slower than the threshold."
+        )
+    total_ms: float = Field(
+        title="Total",
+        description="Total time of the slow executions, in milliseconds."
+        )
+    max_ms: float = Field(
+        title="Max",
+        description="Slowest execution, in milliseconds."
+        )
+    mean_ms: float = Field(
+        title="Mean",
+        description="Mean time of the slow executions, in milliseconds."
+        )
+    controllers: List[str] = Field(
+        title="Controllers",
+        description="Route handlers or background jobs that ran the statement, such as `routes.read_genre`."
+        )
+    parameters: List[str] | Dict[str, str] = Field(
+        title="Parameters",
+        description="Type names of the bound parameters of the last execution, never their values."
+        )
+    plan: List[str] = Field(
+        title="Plan",
+        description="`EXPLAIN QUERY PLAN` (SQLite) or `EXPLAIN` (PostgreSQL) of the statement."
+        )
+    last_seen: datetime = Field(
+        title="Last seen",
+        description="Time of the last slow execution."
+        )
+
+class SlowQueriesSchema(BaseModel):
+    threshold_ms: float = Field(
+        title="Threshold",
+        description="Statements slower than this are logged, 0 when the log is disabled."
+        )
+    data: List[SlowQuerySchema]
+
+class LogoutSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    message: str = Field(
+        default="Logged out successfully!"
+        )
+
 class DeleteSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -381,12 +676,31 @@ class DeleteSchema(BaseModel):
         default="Data deleted successfully!"
         )
 
+class UserPrincipal(BaseModel):
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+    uuid: str = Field(
+        title="UUID",
+        description="Identifier of the authenticated user."
+        )
+    username: str = Field(
+        title="Username",
+        description="Name of the authenticated user."
+        )
+
 class TokenBase(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     access_token: str
+    refresh_token: str | None = None
     token_type: str
 
+class RefreshTokenSchema(BaseModel):
+    refresh_token: str = Field(
+        title="Refresh token",
+        description="Refresh token returned by **POST /api/token**."
+        )
+
 class TokenData(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
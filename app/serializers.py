@@ -0,0 +1,88 @@
+# app/serializers.py
+
+"""JSON serializers of the response schemas, for the fast response path."""
+
+import json
+
+from datetime import date, datetime
+from functools import lru_cache
+from typing import get_args, get_origin
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+"""
+With `FAST_RESPONSES` the list and detail routes do not build pydantic models from
+the rows. Each response schema is compiled once into a function that reads its
+fields straight from the ORM objects, Core rows or page dicts into plain dicts and
+lists, which orjson (or the stdlib json module without it) writes as bytes. The rows
+are trusted to match their schema: nothing is validated or coerced on the way, in
+exchange for a several times faster serialization of large pages.
+"""
+MISSING = object()
+
+
+def nested_schema(annotation) -> tuple:
+    """`(schema, many)` of a nested schema field, `(None, False)` for a plain field."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+
+    if get_origin(annotation) is list:
+        item = get_args(annotation)[0]
+
+        if isinstance(item, type) and issubclass(item, BaseModel):
+            return item, True
+
+    return None, False
+
+@lru_cache(maxsize=512)
+def encoder(response_model):
+    """The compiled `row -> dict` function of a response schema, the same one for the same schema."""
+    fields = []
+
+    for name, info in response_model.model_fields.items():
+        nested, many = nested_schema(info.annotation)
+        fields.append((name, encoder(nested) if nested is not None else None, many, info))
+
+    def encode(row) -> dict:
+        # the loaded columns of an ORM object are in its __dict__, the rest goes through getattr.
+        values = row if isinstance(row, dict) else getattr(row, "__dict__", {})
+        result = {}
+
+        for name, nested, many, info in fields:
+            value = values[name] if name in values else MISSING
+
+            if value is MISSING and not isinstance(row, dict):
+                value = getattr(row, name, MISSING)
+
+            if value is MISSING:
+                value = info.get_default(call_default_factory=True)
+
+            if nested is not None and value is not None:
+                value = [nested(item) for item in value] if many else nested(value)
+
+            result[name] = value
+
+        return result
+
+    return encode
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+
+    raise TypeError(f"{type(value).__name__} is not JSON serializable.")
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+def serialize(response_model, content) -> bytes:
+    return dumps(encoder(response_model)(content))
+
@@ -0,0 +1,182 @@
+# app/signals.py
+
+"""Commit signals, so in-process caches know which tables a commit changed."""
+
+import logging
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# functions called with the set of changed table names after each commit.
+_commit_listeners = []
+# functions called with the changed rows of one table after each commit, by table name.
+_row_listeners = {}
+
+
+def on_commit(listener):
+    """Register `listener(tables: set[str])`, can be used as a decorator."""
+    _commit_listeners.append(listener)
+    return listener
+
+def send_commit(tables: set[str]):
+    for listener in _commit_listeners:
+        try:
+            listener(tables)
+        except Exception:
+            logger.exception("Commit listener %r failed.", listener)
+
+def on_commit_rows(table: str, listener):
+    """
+    Register `listener(rows)` for the rows of `table` changed by each commit.
+
+    `rows` is a list of `(old, new)` dicts of column values, `old` is None for an
+    inserted row and `new` for a deleted one. It is None when a statement changed
+    rows that are not known, a bulk UPDATE or DELETE.
+    """
+    _row_listeners.setdefault(table, []).append(listener)
+    return listener
+
+def send_commit_rows(changes: dict):
+    for table, rows in changes.items():
+        for listener in _row_listeners.get(table, ()):
+            try:
+                listener(rows)
+            except Exception:
+                logger.exception("Commit rows listener %r failed.", listener)
+
+def _changed_tables(session: Session) -> set:
+    return session.info.setdefault("changed_tables", set())
+
+def _changed_rows(session: Session, table: str) -> list:
+    rows = session.info.setdefault("changed_rows", {}).setdefault(table, [])
+    # the rows of the table are already unknown, the new ones are not kept.
+    return rows if rows is not None else []
+
+def _row_values(instance, old: bool = False) -> dict:
+    # read from the attribute history, an unloaded attribute is never loaded here.
+    state = inspect(instance)
+    values = {}
+
+    for attribute in state.mapper.column_attrs:
+        added, unchanged, deleted = state.attrs[attribute.key].history
+        current = (deleted or unchanged) if old else (added or unchanged)
+        values[attribute.key] = current[0] if current else None
+
+    return values
+
+def _link_values(relationship, instance, related) -> dict:
+    # the secondary columns of one many-to-many link, copied from the keys of both sides.
+    values = {}
+
+    for mapper, item, pairs in (
+            (relationship.parent, instance, relationship.synchronize_pairs),
+            (relationship.mapper, related, relationship.secondary_synchronize_pairs)
+            ):
+        for column, secondary_column in pairs:
+            values[secondary_column.key] = getattr(item, mapper.get_property_by_column(column).key)
+
+    return values
+
+def _secondary_rows(instance, deleted: bool = False):
+    """
+    `(table, (old, new))` of the secondary rows a flush writes for the many-to-many
+    collections of `instance`, they are not instances of the session. The links of a
+    deleted instance are all deleted with it.
+    """
+    state = inspect(instance)
+
+    for relationship in state.mapper.relationships:
+        if relationship.secondary is None or relationship.viewonly:
+            continue
+
+        history = state.attrs[relationship.key].history
+        table = relationship.secondary.name
+
+        for related in (*history.deleted, *history.unchanged) if deleted else history.deleted:
+            yield table, (_link_values(relationship, instance, related), None)
+
+        if not deleted:
+            for related in history.added:
+                yield table, (None, _link_values(relationship, instance, related))
+
+
+"""
+The listeners are installed on the Session class, so they cover every session
+of the sync stack and the sync session wrapped by every AsyncSession.
+"""
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session, flush_context):
+    tables = _changed_tables(session)
+
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        tables.add(instance.__table__.name)
+
+        # many-to-many collections are written to their secondary table.
+        for relationship in instance.__mapper__.relationships:
+            if relationship.secondary is not None:
+                tables.add(relationship.secondary.name)
+
+    # rows are only kept for the tables someone listens to.
+    for instance in session.new:
+        if instance.__table__.name in _row_listeners:
+            _changed_rows(session, instance.__table__.name).append((None, _row_values(instance)))
+
+    for instance in session.dirty:
+        if instance.__table__.name in _row_listeners and session.is_modified(instance):
+            _changed_rows(session, instance.__table__.name).append(
+                (_row_values(instance, old=True), _row_values(instance))
+                )
+
+    for instance in session.deleted:
+        if instance.__table__.name in _row_listeners:
+            _changed_rows(session, instance.__table__.name).append((_row_values(instance, old=True), None))
+
+    # both sides of a many-to-many can hold the same link, it is kept once.
+    links = set()
+
+    for deleted, instances in ((False, (*session.new, *session.dirty)), (True, session.deleted)):
+        for instance in instances:
+            for table, (old, new) in _secondary_rows(instance, deleted=deleted):
+                link = (table, old is None, tuple(sorted((old or new).items())))
+
+                if table in _row_listeners and link not in links:
+                    links.add(link)
+                    _changed_rows(session, table).append((old, new))
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_executed(orm_execute_state):
+    # bulk INSERT/UPDATE/DELETE statements run through session.execute().
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        session = orm_execute_state.session
+        table = orm_execute_state.statement.table.name
+        _changed_tables(session).add(table)
+
+        if table not in _row_listeners:
+            return
+
+        parameters = orm_execute_state.parameters
+
+        if orm_execute_state.is_insert and parameters:
+            # executemany of the bulk creation and the importer, the rows are the parameters.
+            rows = parameters if isinstance(parameters, list) else [parameters]
+            _changed_rows(session, table).extend((None, dict(row)) for row in rows)
+        else:
+            session.info.setdefault("changed_rows", {})[table] = None
+
+@event.listens_for(Session, "after_commit")
+def _send_committed(session):
+    tables = session.info.pop("changed_tables", None)
+    changes = session.info.pop("changed_rows", None)
+
+    if tables:
+        send_commit(tables)
+
+    if changes:
+        send_commit_rows(changes)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop("changed_tables", None)
+    session.info.pop("changed_rows", None)
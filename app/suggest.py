@@ -0,0 +1,409 @@
+# app/suggest.py
+
+"""In-memory prefix index of the book titles, author names and genre names."""
+
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+
+from bisect import bisect_left, insort
+from collections import Counter, deque
+from sqlalchemy import select, func
+from app import metrics, models, signals
+from app.config import SessionLocal, SUGGEST_REFRESH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+# a key is the folded name, this separator and the name itself.
+KEY_SEPARATOR = "\x00"
+# sorts after every character, the end of a prefix range.
+KEY_END = "\U0010ffff"
+# ranges up to this many names are ranked on each request, larger ones are cached.
+SCAN_LIMIT = 128
+# names kept per cached prefix, the largest limit of the endpoint.
+TOP_SIZE = 20
+# more names than this in one commit are merged with a sort instead of one insort each.
+INSORT_LIMIT = 64
+# seconds between two applications of the buffered reads.
+HITS_FLUSH_INTERVAL = 1.0
+
+
+def fold(text: str) -> str:
+    # case and diacritic folding, "Émile" and "emile" have the same key.
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(character for character in decomposed if not unicodedata.combining(character)).casefold()
+
+def make_key(name: str) -> str:
+    return fold(name) + KEY_SEPARATOR + name
+
+def key_name(key: str) -> str:
+    return key.partition(KEY_SEPARATOR)[2]
+
+
+class PrefixIndex:
+    """
+    Sorted keys of the names of one kind, a prefix is a `bisect` range of them.
+
+    Small ranges are ranked by popularity on each request. The top keys of the
+    ranges larger than `SCAN_LIMIT` are cached per prefix, computed from the cached
+    tops of the longer prefixes, so neither loading nor a change ranks a large range
+    twice. A change patches the cached prefixes of its name, longest first. Requests
+    do not lock: writers replace the cached lists instead of mutating them, and a
+    list ranked by a request while a writer ran is not cached.
+    """
+    def __init__(self):
+        self._keys = []
+        self._popularity = {}
+        self._views = {}
+        self._top = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def score(self, name: str) -> int:
+        return self._popularity.get(name, 0) + self._views.get(name, 0)
+
+    def _rank_key(self, key: str) -> tuple:
+        # most popular first, then in key order.
+        return -self.score(key_name(key)), key
+
+    def _range(self, keys: list, prefix: str) -> tuple:
+        return bisect_left(keys, prefix), bisect_left(keys, prefix + KEY_END)
+
+    def _children(self, keys: list, prefix: str, low: int, high: int):
+        """`(child prefix, low, high)` of each next character, None for the names equal to the prefix."""
+        start = low
+
+        while start < high:
+            character = keys[start][len(prefix)]
+
+            if character == KEY_SEPARATOR:
+                yield None, start, start + 1
+                start += 1
+                continue
+
+            child = prefix + character
+            end = bisect_left(keys, child + KEY_END, start, high)
+            yield child, start, end
+            start = end
+
+    def _rank(self, keys: list, prefix: str, low: int, high: int) -> list:
+        if high - low <= SCAN_LIMIT:
+            return heapq.nsmallest(TOP_SIZE, keys[low:high], key=self._rank_key)
+
+        candidates = []
+
+        for child, start, end in self._children(keys, prefix, low, high):
+            top = self._top.get(child) if end - start > SCAN_LIMIT else None
+            candidates.extend(keys[start:end] if top is None else top)
+
+        return heapq.nsmallest(TOP_SIZE, candidates, key=self._rank_key)
+
+    def _warm(self, keys: list):
+        """Cache the top keys of every prefix whose range is larger than `SCAN_LIMIT`."""
+        large = []
+        pending = [("", 0, len(keys))]
+
+        while pending:
+            prefix, low, high = pending.pop()
+
+            if prefix is None or high - low <= SCAN_LIMIT:
+                continue
+
+            large.append((prefix, low, high))
+            pending.extend(self._children(keys, prefix, low, high))
+
+        # the longer prefixes first, each top is ranked from the tops of its children.
+        for prefix, low, high in sorted(large, key=lambda item: -len(item[0])):
+            self._top[prefix] = self._rank(keys, prefix, low, high)
+
+    def load(self, popularity: dict):
+        """Replace the names, `popularity` maps each name to its popularity in the database."""
+        keys = sorted(make_key(name) for name in popularity)
+
+        with self._lock:
+            self._generation += 1
+            self._keys = keys
+            self._popularity = popularity
+            self._views = {name: views for name, views in self._views.items() if name in popularity}
+            self._top = {}
+            self._warm(keys)
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        folded = fold(prefix)
+        keys = self._keys
+        low, high = self._range(keys, folded)
+        top = self._top.get(folded) if high - low > SCAN_LIMIT else None
+
+        if top is None:
+            generation = self._generation
+            top = self._rank(keys, folded, low, high)
+
+            # a range that grew past SCAN_LIMIT since the index was loaded.
+            if high - low > SCAN_LIMIT and generation == self._generation:
+                self._top[folded] = top
+
+        return [key_name(key) for key in top[:limit]]
+
+    def _touch(self, name: str, lowered: bool = False):
+        """Patch the cached prefixes of `name` after its key or popularity changed."""
+        key = make_key(name)
+        folded = key.partition(KEY_SEPARATOR)[0]
+        present = name in self._popularity
+
+        for length in range(len(folded), -1, -1):
+            prefix = folded[:length]
+            top = self._top.get(prefix)
+
+            if top is None:
+                continue
+
+            if key in top and (lowered or not present):
+                # the name may move out of the list, rank the range again.
+                low, high = self._range(self._keys, prefix)
+                self._top[prefix] = self._rank(self._keys, prefix, low, high)
+            elif key in top:
+                self._top[prefix] = sorted(top, key=self._rank_key)
+            elif present and (len(top) < TOP_SIZE or self._rank_key(key) < self._rank_key(top[-1])):
+                self._top[prefix] = sorted((*top, key), key=self._rank_key)[:TOP_SIZE]
+
+    def add(self, names: list):
+        with self._lock:
+            self._generation += 1
+            names = [name for name in dict.fromkeys(names) if name not in self._popularity]
+
+            for name in names:
+                self._popularity[name] = 0
+
+            if len(names) > INSORT_LIMIT:
+                # two sorted runs, merged in one pass by the sort.
+                keys = self._keys + sorted(make_key(name) for name in names)
+                keys.sort()
+                self._keys = keys
+            else:
+                for name in names:
+                    insort(self._keys, make_key(name))
+
+            for name in names:
+                self._touch(name)
+
+    def remove(self, name: str):
+        with self._lock:
+            if name not in self._popularity:
+                return
+
+            self._generation += 1
+            key = make_key(name)
+            index = bisect_left(self._keys, key)
+
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+
+            del self._popularity[name]
+            self._views.pop(name, None)
+            self._touch(name)
+
+    def rename(self, old: str, new: str):
+        popularity = self._popularity.get(old, 0)
+        views = self._views.get(old, 0)
+        self.remove(old)
+        self.add([new])
+        self.adjust(new, popularity, views=views)
+
+    def adjust(self, name: str, popularity: int = 0, views: int = 0):
+        with self._lock:
+            if name not in self._popularity or not (popularity or views):
+                return
+
+            self._generation += 1
+            self._popularity[name] += popularity
+            self._views[name] = self._views.get(name, 0) + views
+            self._touch(name, lowered=popularity + views < 0)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class Suggestions:
+    """
+    Prefix indexes of the unique `Books.title`, `Authors.name` and `Genres.name`
+    columns, for the suggestions sent on each keystroke without a database query.
+
+    The popularity of an author or genre is its number of books, plus the reads of
+    its detail route in this process, the popularity of a book is its reads. The
+    reads are appended to a buffer without a lock and added to the indexes by the
+    refresh thread every `HITS_FLUSH_INTERVAL` seconds. The indexes follow the rows
+    committed by this process, and are loaded again every `refresh_interval` seconds,
+    or as soon as a bulk UPDATE or DELETE changed rows that are not known, which also
+    picks up the writes of the other workers.
+    """
+    def __init__(self, refresh_interval: float = 300):
+        self.refresh_interval = refresh_interval
+        self.indexes = {
+            "book": PrefixIndex(),
+            "author": PrefixIndex(),
+            "genre": PrefixIndex(),
+        }
+        # uuid to name, the books and their genres refer to authors and genres by uuid.
+        self._authors = {}
+        self._genres = {}
+        # (kind, name) of each read, deque appends are atomic.
+        self._hits = deque()
+        self._stop = threading.Event()
+        self._refresh = threading.Event()
+        self._thread = None
+
+    def suggest(self, kind: str, prefix: str, limit: int = 10) -> list:
+        return self.indexes[kind].suggest(prefix, limit=limit)
+
+    def hit(self, kind: str, name: str):
+        """Count one read of `name`, unknown names are ignored when the reads are applied."""
+        self._hits.append((kind, name))
+
+    def flush_hits(self):
+        """Add the buffered reads to the indexes, one adjustment per name."""
+        views = Counter()
+
+        while True:
+            try:
+                views[self._hits.popleft()] += 1
+            except IndexError:
+                break
+
+        for (kind, name), count in views.items():
+            self.indexes[kind].adjust(name, views=count)
+
+    @metrics.labelled("suggestions.load")
+    def load(self):
+        with SessionLocal() as session:
+            titles = session.scalars(select(models.Book.title)).all()
+            authors = session.execute(
+                select(models.Author.uuid, models.Author.name, func.count(models.Book.uuid))
+                .outerjoin(models.Book, models.Book.author_id == models.Author.uuid)
+                .group_by(models.Author.uuid, models.Author.name)
+                ).all()
+            genres = session.execute(
+                select(models.Genre.uuid, models.Genre.name, func.count(models.BookGenre.uuid))
+                .outerjoin(models.BookGenre, models.BookGenre.genre_id == models.Genre.uuid)
+                .group_by(models.Genre.uuid, models.Genre.name)
+                ).all()
+
+        self._authors = {uuid: name for uuid, name, _ in authors}
+        self._genres = {uuid: name for uuid, name, _ in genres}
+        self.indexes["book"].load(dict.fromkeys(titles, 0))
+        self.indexes["author"].load({name: books for _, name, books in authors})
+        self.indexes["genre"].load({name: books for _, name, books in genres})
+        self.flush_hits()
+
+    def _names_changed(self, kind: str, names: dict, rows: list, column: str = "name"):
+        index = self.indexes[kind]
+        added = []
+
+        for old, new in rows:
+            if old is not None and old.get("uuid") is not None:
+                names.pop(old["uuid"], None)
+
+            if new is not None and new.get("uuid") is not None and new.get(column) is not None:
+                names[new["uuid"]] = new[column]
+
+            old_name = old.get(column) if old is not None else None
+            new_name = new.get(column) if new is not None else None
+
+            if old_name == new_name:
+                continue
+
+            if old_name is not None and new_name is not None:
+                index.rename(old_name, new_name)
+            elif old_name is not None:
+                index.remove(old_name)
+            elif new_name is not None:
+                added.append(new_name)
+
+        index.add(added)
+
+    def _references_changed(self, kind: str, names: dict, rows: list, column: str):
+        index = self.indexes[kind]
+
+        for old, new in rows:
+            old_reference = old.get(column) if old is not None else None
+            new_reference = new.get(column) if new is not None else None
+
+            if old_reference == new_reference:
+                continue
+
+            if old_reference in names:
+                index.adjust(names[old_reference], popularity=-1)
+
+            if new_reference in names:
+                index.adjust(names[new_reference], popularity=1)
+
+    def _on_books(self, rows):
+        if rows is None:
+            return self._refresh.set()
+
+        self._names_changed("book", {}, rows, column="title")
+        self._references_changed("author", self._authors, rows, column="author_id")
+
+    def _on_authors(self, rows):
+        if rows is None:
+            return self._refresh.set()
+
+        self._names_changed("author", self._authors, rows)
+
+    def _on_genres(self, rows):
+        if rows is None:
+            return self._refresh.set()
+
+        self._names_changed("genre", self._genres, rows)
+
+    def _on_book_genres(self, rows):
+        if rows is None:
+            return self._refresh.set()
+
+        self._references_changed("genre", self._genres, rows, column="genre_id")
+
+    def _run(self):
+        next_load = time.monotonic() + self.refresh_interval
+
+        while not self._stop.is_set():
+            refresh = self._refresh.wait(min(HITS_FLUSH_INTERVAL, max(next_load - time.monotonic(), 0)))
+
+            if self._stop.is_set():
+                break
+
+            if not refresh and time.monotonic() < next_load:
+                self.flush_hits()
+                continue
+
+            self._refresh.clear()
+            next_load = time.monotonic() + self.refresh_interval
+
+            try:
+                self.load()
+            except Exception:
+                logger.exception("Could not refresh the suggestions.")
+
+    def start(self):
+        self.load()
+
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="suggestions-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._refresh.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+suggestions = Suggestions(refresh_interval=SUGGEST_REFRESH_INTERVAL)
+signals.on_commit_rows("Books", suggestions._on_books)
+signals.on_commit_rows("Authors", suggestions._on_authors)
+signals.on_commit_rows("Genres", suggestions._on_genres)
+signals.on_commit_rows("BookGenres", suggestions._on_book_genres)
@@ -0,0 +1,20 @@
+# benchmarks/__init__.py
+
+"""
+Benchmarks of the API on a synthetic catalog.
+
+Usage:
+    python -m benchmarks.generate --size 100k --database /tmp/books-100k.db
+    python -m benchmarks.run --database /tmp/books-100k.db --output result.json [--baseline baseline.json]
+"""
+
+import os
+
+
+def use_database(path: str):
+    """
+    Points the app at the SQLite database `path`. `app.config` builds its engines when
+    it is imported, so this runs before anything of `app` is imported.
+    """
+    os.environ["DATABASE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_DATABASE_PATH"] = os.path.abspath(path)
@@ -0,0 +1,168 @@
+# benchmarks/generate.py
+
+"""
+Synthetic catalog generator: authors, genres, books and their genres, the same rows
+for the same size and seed.
+
+Usage:
+    python -m benchmarks.generate --size 10k|100k|1m [--database PATH] [--seed 42] [--force]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from datetime import date, timedelta
+
+import rich
+
+from benchmarks import use_database
+
+
+# books of each named size, the other tables grow with it.
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+GENRES = 60
+BOOKS_PER_AUTHOR = 20
+PUBLISHERS = 200
+# genres of each book, picked between these bounds.
+GENRES_PER_BOOK = (1, 3)
+# rows per executemany.
+CHUNK_SIZE = 10_000
+
+WORDS = (
+    "river stone night garden silver winter empire shadow light city sea crown "
+    "forest memory storm glass letter island road fire house dream iron mountain "
+    "secret voice moon summer war journey kingdom song bridge wolf harbor star "
+    "silence paper clock orchard mirror desert lantern tide hunter sister ghost"
+    ).split()
+FIRST_NAMES = "Ana Budi Clara Dewi Elias Farah Gita Hugo Ines Joko Kara Lukas Maya Nina Omar Putri Rafael Sari Tomas Wulan".split()
+LAST_NAMES = "Adams Baker Castillo Dubois Evans Fischer Gunawan Haddad Ito Jensen Kowalski Lopez Moreau Novak Okafor Pratama Rossi Santoso Tanaka Weber".split()
+NATIONALITIES = "Indonesian French Japanese German Brazilian Nigerian Italian Polish American Danish".split()
+
+
+def default_database(size: str) -> str:
+    return os.path.join(tempfile.gettempdir(), f"books-bench-{size}.db")
+
+def counts(books: int) -> dict:
+    return {
+        "books": books,
+        "authors": max(books // BOOKS_PER_AUTHOR, 10),
+        "genres": GENRES,
+    }
+
+def _uuid(rng: random.Random) -> str:
+    return f"{rng.getrandbits(128):032x}"
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def authors(rng: random.Random, count: int):
+    for index in range(count):
+        yield {
+            "uuid": _uuid(rng),
+            # unique, and still searchable by its first letters.
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index}",
+            "birth_date": date(1920, 1, 1) + timedelta(days=rng.randrange(30000)),
+            "nationality": rng.choice(NATIONALITIES),
+            "biography": _words(rng, rng.randint(20, 60)),
+        }
+
+def genres(rng: random.Random, count: int):
+    for index in range(count):
+        yield {
+            "uuid": _uuid(rng),
+            "name": f"{rng.choice(WORDS).title()} {index}",
+            "description": _words(rng, rng.randint(10, 30)),
+        }
+
+def books(rng: random.Random, count: int, author_ids: list):
+    for index in range(count):
+        yield {
+            "uuid": _uuid(rng),
+            "isbn": f"978{index:010d}",
+            "title": f"{_words(rng, rng.randint(2, 4)).title()} {index}",
+            "author_id": rng.choice(author_ids),
+            "pages": rng.randint(50, 1200),
+            "synopsis": _words(rng, rng.randint(40, 120)),
+            "publisher": f"Publisher {rng.randrange(PUBLISHERS)}",
+            "published": date(1950, 1, 1) + timedelta(days=rng.randrange(27000)),
+        }
+
+def book_genres(rng: random.Random, book_ids: list, genre_ids: list):
+    for book_id in book_ids:
+        for genre_id in rng.sample(genre_ids, rng.randint(*GENRES_PER_BOOK)):
+            yield {"uuid": _uuid(rng), "book_id": book_id, "genre_id": genre_id}
+
+def insert(connection, table, rows) -> list:
+    """Insert `rows` in executemany chunks, return their uuids."""
+    ids, chunk = [], []
+
+    for row in rows:
+        chunk.append(row)
+        ids.append(row["uuid"])
+
+        if len(chunk) >= CHUNK_SIZE:
+            connection.execute(table.insert(), chunk)
+            chunk = []
+
+    if chunk:
+        connection.execute(table.insert(), chunk)
+
+    return ids
+
+
+def generate(books_count: int, seed: int = 42) -> dict:
+    """Create the tables and fill them, in the database `app.config` points at."""
+    from app import models
+    from app.config import Base, engine
+    from app.database.search_index import search_index
+
+    rng = random.Random(seed)
+    sizes = counts(books_count)
+    Base.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        author_ids = insert(connection, models.Author.__table__, authors(rng, sizes["authors"]))
+        genre_ids = insert(connection, models.Genre.__table__, genres(rng, sizes["genres"]))
+        book_ids = insert(connection, models.Book.__table__, books(rng, sizes["books"], author_ids))
+        sizes["book_genres"] = len(insert(connection, models.BookGenre.__table__, book_genres(rng, book_ids, genre_ids)))
+
+    # the full-text index is filled once here, not on the first startup of the app.
+    search_index.create()
+    engine.dispose()
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic catalog for the benchmarks.")
+    parser.add_argument("--size", choices=SIZES, default="10k", help="Number of books. Default = 10k.")
+    parser.add_argument("--books", type=int, help="Exact number of books, instead of --size.")
+    parser.add_argument("--database", help="SQLite database file. Default = books-bench-<size>.db in the temp directory.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the generated rows. Default = 42.")
+    parser.add_argument("--force", action="store_true", help="Replace the database file when it exists.")
+    arguments = parser.parse_args(argv)
+
+    database = arguments.database or default_database(arguments.size)
+
+    if os.path.exists(database):
+        if not arguments.force:
+            parser.error(f"{database} exists, use --force to replace it.")
+
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(database + suffix):
+                os.remove(database + suffix)
+
+    use_database(database)
+    started = time.perf_counter()
+    sizes = generate(arguments.books or SIZES[arguments.size], seed=arguments.seed)
+
+    rich.print(f"[bold green]Generated[/bold green] :white_check_mark: {database} in {time.perf_counter() - started:.1f}s")
+
+    for table, count in sizes.items():
+        rich.print(f"    {table}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# benchmarks/run.py
+
+"""
+Runs the benchmark scenarios in-process through an ASGI client, on a copy of a
+generated catalog, and reports the throughput and latency of each one.
+
+Usage:
+    python -m benchmarks.run --database PATH [--requests 200] [--concurrency 8]
+        [--output result.json] [--baseline baseline.json] [--threshold 0.1]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from datetime import datetime, timezone
+
+import rich
+
+from rich.table import Table
+from benchmarks import use_database
+
+
+# env settings that change the results, recorded with them.
+SETTINGS = (
+    "DATABASE_ASYNC",
+    "RESPONSE_CACHE_ENABLED",
+    "FAST_RESPONSES",
+    "PROFILING_SAMPLE_RATE",
+    "METRICS_ENABLED",
+    "SLOW_QUERY_THRESHOLD_MS",
+    "PASSWORD_HASH_WORKERS",
+)
+# latency differences under this are noise whatever the threshold.
+MIN_DELTA_MS = 1.0
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    # nearest rank.
+    index = min(max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def summary(latencies: list, errors: int, seconds: float) -> dict:
+    values = sorted(latencies)
+
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "seconds": seconds,
+        "throughput": len(values) / seconds if seconds else 0.0,
+        "mean_ms": statistics.fmean(values) * 1000 if values else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000 if values else 0.0,
+        "p95_ms": percentile(values, 0.95) * 1000 if values else 0.0,
+        "p99_ms": percentile(values, 0.99) * 1000 if values else 0.0,
+        "max_ms": values[-1] * 1000 if values else 0.0,
+    }
+
+
+async def measure(client, context, scenario, start: int, count: int, concurrency: int) -> tuple:
+    """Sends requests `start` to `start + count` of the scenario from `concurrency` workers."""
+    indexes = iter(range(start, start + count))
+    latencies, failures = [], []
+
+    async def worker():
+        for index in indexes:
+            arguments = scenario.request(context, index)
+            started = time.perf_counter()
+            response = await client.request(scenario.method, **arguments)
+            latencies.append(time.perf_counter() - started)
+
+            if response.status_code >= 400:
+                # the last line of a body or a traceback names the error.
+                lines = response.text.strip().splitlines() or [""]
+                failures.append(f"{response.status_code} {arguments['url']}: {lines[-1][:200]}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(min(concurrency, count), 1))))
+    return latencies, failures, time.perf_counter() - started
+
+async def login(client, context):
+    from benchmarks.scenarios import Context
+
+    await client.post("/api/user", json={"username": Context.USERNAME, "password": Context.PASSWORD})
+    response = await client.post("/api/token", data={"username": Context.USERNAME, "password": Context.PASSWORD})
+    response.raise_for_status()
+    context.token = response.json()["access_token"]
+    context.refresh_token = response.json()["refresh_token"]
+
+async def run(arguments) -> dict:
+    import httpx
+
+    from app.config import async_engine, engine
+    from benchmarks.scenarios import Context, SCENARIOS
+    from main import app
+
+    uncovered = missing_routes(app, SCENARIOS)
+
+    if uncovered:
+        rich.print(f"[bold yellow]Routes without a scenario[/bold yellow]: {', '.join(uncovered)}")
+
+    selected = select(SCENARIOS, arguments.only)
+    results = {}
+
+    # ASGITransport does not send the lifespan events, the startup handlers run here.
+    await app.router.startup()
+
+    try:
+        # a failing request is counted as an error, it does not stop the run.
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmarks", timeout=None) as client:
+            context = Context(engine)
+            await login(client, context)
+
+            for scenario in selected:
+                count = min(arguments.requests, scenario.requests or arguments.requests)
+                concurrency = scenario.concurrency or arguments.concurrency
+                warmup = min(arguments.warmup, count) if scenario.warmup else 0
+
+                if scenario.prepare is not None:
+                    await scenario.prepare(context, client, warmup + count)
+
+                if warmup:
+                    await measure(client, context, scenario, 0, warmup, concurrency)
+
+                latencies, failures, seconds = await measure(client, context, scenario, warmup, count, concurrency)
+                results[scenario.name] = {
+                    "method": scenario.method,
+                    "route": scenario.route,
+                    "concurrency": concurrency,
+                    **summary(latencies, len(failures), seconds),
+                }
+
+                for failure in failures[:3]:
+                    rich.print(f"[red]{scenario.name}[/red] {failure}")
+
+                print_result(scenario.name, results[scenario.name])
+    finally:
+        await app.router.shutdown()
+
+        # the aiosqlite connection threads would keep the interpreter from exiting.
+        if async_engine is not None:
+            await async_engine.dispose()
+
+    return results
+
+def select(scenarios, only: list | None) -> list:
+    """The scenarios whose name contains one of `only`, with the ones they require, in order."""
+    if not only:
+        return list(scenarios)
+
+    names = {scenario.name for scenario in scenarios if any(name in scenario.name for name in only)}
+    by_name = {scenario.name: scenario for scenario in scenarios}
+    pending = list(names)
+
+    while pending:
+        for required in by_name[pending.pop()].requires:
+            if required not in names:
+                names.add(required)
+                pending.append(required)
+
+    return [scenario for scenario in scenarios if scenario.name in names]
+
+def missing_routes(app, scenarios) -> list:
+    from fastapi.routing import APIRoute
+
+    covered = {(scenario.method, scenario.route) for scenario in scenarios}
+    return [
+        f"{method} {route.path}" for route in app.routes if isinstance(route, APIRoute)
+        for method in sorted(route.methods) if (method, route.path) not in covered
+        ]
+
+
+def database_counts(path: str) -> dict:
+    from sqlalchemy import func, select
+    from app import models
+    from app.config import engine
+
+    with engine.connect() as connection:
+        return {
+            model.__tablename__: connection.execute(select(func.count()).select_from(model)).scalar()
+            for model in (models.Book, models.Author, models.Genre, models.BookGenre)
+            }
+
+def commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_result(name: str, result: dict):
+    rich.print(
+        f"[bold yellow]{name}[/bold yellow] {result['requests']} requests, "
+        f"{result['throughput']:.1f}/s, p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+        f"p99 {result['p99_ms']:.2f} ms" + (f", [red]{result['errors']} errors[/red]" if result["errors"] else "")
+        )
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    The regressions of `results` against `baseline`: a p50 or p95 more than `threshold`
+    (and `MIN_DELTA_MS`) slower, or a throughput more than `threshold` lower.
+    """
+    regressions = []
+
+    for name, result in results.items():
+        base = baseline.get(name)
+
+        if base is None:
+            continue
+
+        for metric in ("p50_ms", "p95_ms"):
+            delta = result[metric] - base[metric]
+
+            if delta > MIN_DELTA_MS and delta > base[metric] * threshold:
+                regressions.append((name, metric, base[metric], result[metric]))
+
+        if result["throughput"] < base["throughput"] * (1 - threshold):
+            regressions.append((name, "throughput", base["throughput"], result["throughput"]))
+
+    return regressions
+
+def print_comparison(results: dict, baseline: dict, regressions: list):
+    table = Table(title="Against the baseline")
+    table.add_column("Scenario")
+
+    for metric in ("throughput", "p50_ms", "p95_ms", "p99_ms"):
+        table.add_column(metric, justify="right")
+
+    regressed = {(name, metric) for name, metric, _, _ in regressions}
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        cells = []
+
+        for metric in ("throughput", "p50_ms", "p95_ms", "p99_ms"):
+            base = baseline[name][metric]
+            change = (result[metric] - base) / base * 100 if base else 0.0
+            cell = f"{result[metric]:.2f} ({change:+.1f}%)"
+            cells.append(f"[red]{cell}[/red]" if (name, metric) in regressed else cell)
+
+        table.add_row(name, *cells)
+
+    rich.print(table)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every route of the API on a generated catalog.")
+    parser.add_argument("--database", required=True, help="Catalog made by `python -m benchmarks.generate`, it is copied first.")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario. Default = 200.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight per scenario. Default = 8.")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests before each read scenario. Default = 10.")
+    parser.add_argument("--only", nargs="*", help="Run only the scenarios whose name contains one of these.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Results JSON file to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Regression threshold, a fraction. Default = 0.10.")
+    arguments = parser.parse_args(argv)
+
+    if not os.path.exists(arguments.database):
+        parser.error(f"{arguments.database} does not exist, run `python -m benchmarks.generate` first.")
+
+    # the write scenarios change the catalog, every run starts from the same copy.
+    workspace = tempfile.mkdtemp(prefix="books-bench-")
+    database = os.path.join(workspace, "books.db")
+    shutil.copyfile(arguments.database, database)
+    use_database(database)
+    os.environ.setdefault("IMPORT_DIRECTORY", os.path.join(workspace, "imports"))
+    os.environ.setdefault("SLOW_QUERY_LOG_PATH", os.path.join(workspace, "slow_queries.log"))
+
+    try:
+        counts = database_counts(database)
+        results = asyncio.run(run(arguments))
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "commit": commit(),
+        "python": platform.python_version(),
+        "database": {"path": os.path.abspath(arguments.database), **counts},
+        "requests": arguments.requests,
+        "concurrency": arguments.concurrency,
+        "settings": {name: os.environ.get(name) for name in SETTINGS},
+        "scenarios": results,
+    }
+
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+        rich.print(f"[bold green]Results written[/bold green] :white_check_mark: {arguments.output}")
+
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            baseline_report = json.load(baseline_file)
+
+        # the same catalog may live at another path, its counts are what matter.
+        if {**baseline_report.get("database", {}), "path": None} != {**report["database"], "path": None}:
+            rich.print("[bold yellow]The baseline ran on another catalog[/bold yellow], the comparison may not hold.")
+
+        for key in ("concurrency", "settings"):
+            if baseline_report.get(key) != report[key]:
+                rich.print(f"[bold yellow]The baseline ran with other {key}[/bold yellow], the comparison may not hold.")
+
+        baseline = baseline_report["scenarios"]
+        regressions = compare(results, baseline, arguments.threshold)
+        print_comparison(results, baseline, regressions)
+
+        for name, metric, base, value in regressions:
+            rich.print(f":red_circle: [bold red]Regression[/bold red] {name} {metric}: {base:.2f} -> {value:.2f}")
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
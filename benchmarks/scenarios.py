@@ -0,0 +1,267 @@
+# benchmarks/scenarios.py
+
+"""
+The requests of the benchmark, at least one scenario for every route of the app.
+
+Scenarios run in this order. The reads come first, on the generated rows only. The
+writes then create their own `bench` rows, update them and delete them, so a delete
+scenario removes exactly what its create scenario added. Write scenarios have no
+warmup, and the paired ones share their request cap, so both run the same indexes.
+"""
+
+import json
+
+from sqlalchemy import select
+from app import models
+
+
+class Scenario:
+    """
+    `request(context, index)` returns the `httpx` request arguments of the `index`th
+    request, `prepare(context, client, count)` runs untimed before the first one. The
+    scenarios named in `requires` make the rows it works on, they run with it.
+    """
+    def __init__(
+            self,
+            name: str,
+            method: str,
+            route: str,
+            request,
+            requests: int | None = None,
+            concurrency: int | None = None,
+            warmup: bool = True,
+            prepare=None,
+            requires: tuple = ()
+            ):
+        self.name = name
+        self.method = method
+        self.route = route
+        self.request = request
+        self.requests = requests
+        self.concurrency = concurrency
+        self.warmup = warmup
+        self.prepare = prepare
+        self.requires = requires
+
+
+class Context:
+    """Samples of the generated rows, and the state the scenarios share."""
+    # rows sampled from each table, the reads cycle through them.
+    SAMPLE_SIZE = 1000
+    USERNAME = "bench-admin"
+    PASSWORD = "bench-password"
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.titles = self._sample(models.Book.title)
+        self.authors = self._sample(models.Author.uuid, models.Author.name)
+        self.genres = self._sample(models.Genre.uuid, models.Genre.name)
+        self.book_genres = self._sample(models.BookGenre.uuid)
+        self.token = None
+        self.refresh_token = None
+        self.state = {}
+
+    def _sample(self, *columns) -> list:
+        # the uuids are random, their order is a random sample of the rows.
+        statement = select(*columns).order_by(columns[0].table.c.uuid).limit(self.SAMPLE_SIZE)
+
+        with self.engine.connect() as connection:
+            rows = connection.execute(statement).all()
+
+        return [row[0] for row in rows] if len(columns) == 1 else [tuple(row) for row in rows]
+
+    def rows(self, statement) -> list:
+        with self.engine.connect() as connection:
+            return connection.execute(statement).all()
+
+    def headers(self, token: str | None = None) -> dict:
+        return {"Authorization": f"Bearer {token or self.token}"}
+
+    def pick(self, values: list, index: int):
+        return values[index % len(values)]
+
+
+def book(index: int) -> dict:
+    return {
+        "isbn": f"999{index:010d}",
+        "title": f"bench book {index}",
+        "pages": 100 + index % 500,
+        "synopsis": "A book written by the benchmarks.",
+        "publisher": "bench",
+        "published": "2001-01-01",
+    }
+
+def _bench_indexes(rows, prefix: str) -> dict:
+    # `bench book 12` -> 12, the rows of a create scenario by request index.
+    return {int(name[len(prefix):]): uuid for uuid, name in rows}
+
+async def prepare_book_genres(context: Context, client, count: int):
+    rows = context.rows(select(models.Book.uuid, models.Book.title).where(models.Book.title.like("bench book %")))
+    context.state["bench_books"] = _bench_indexes(rows, "bench book ")
+
+async def prepare_bench_book_genres(context: Context, client, count: int):
+    statement = (
+        select(models.BookGenre.uuid, models.Book.title)
+        .join(models.Book, models.Book.uuid == models.BookGenre.book_id)
+        .where(models.Book.title.like("bench book %"))
+        )
+    context.state["bench_book_genres"] = _bench_indexes(context.rows(statement), "bench book ")
+
+async def prepare_logout(context: Context, client, count: int):
+    # every logout revokes its own access token.
+    tokens = []
+
+    for _ in range(count):
+        response = await client.post("/api/token/refresh", json={"refresh_token": context.refresh_token})
+        tokens.append(response.json()["access_token"])
+
+    context.state["logout_tokens"] = tokens
+
+def import_dump(index: int) -> bytes:
+    # the first import inserts these genres, the next ones skip them.
+    lines = (json.dumps({"name": f"bench import {line}", "description": "Imported."}) for line in range(100))
+    return "\n".join(lines).encode()
+
+async def prepare_read_import(context: Context, client, count: int):
+    response = await client.post(
+        "/api/import/genres",
+        files={"dump": ("genres.jsonl", import_dump(0))},
+        headers=context.headers()
+        )
+    context.state["import_job"] = response.json()["job"]
+
+
+# bcrypt runs on each of these requests, the caps keep the run short.
+PASSWORD_REQUESTS = 20
+# whole table streams.
+EXPORT_REQUESTS = 3
+
+SCENARIOS = [
+    # books.
+    Scenario("books page", "GET", "/api/books", lambda context, index: {"url": "/api/books", "params": {"limit": 100}}),
+    Scenario("books by genre", "GET", "/api/books", lambda context, index: {
+        "url": "/api/books", "params": {"genre": context.pick(context.genres, index)[1], "limit": 100}
+        }),
+    Scenario("books by title desc", "GET", "/api/books", lambda context, index: {
+        "url": "/api/books", "params": {"sort": "-title", "limit": 100}
+        }),
+    Scenario("books sparse fields", "GET", "/api/books", lambda context, index: {
+        "url": "/api/books", "params": {"fields": "title,author.name", "limit": 100}
+        }),
+    Scenario("search books", "GET", "/api/search/books", lambda context, index: {
+        "url": "/api/search/books", "params": {"q": context.pick(context.titles, index).split()[0]}
+        }),
+    Scenario("book", "GET", "/api/book/{title}", lambda context, index: {
+        "url": f"/api/book/{context.pick(context.titles, index)}"
+        }),
+    # authors.
+    Scenario("authors page", "GET", "/api/authors", lambda context, index: {"url": "/api/authors", "params": {"limit": 100}}),
+    Scenario("author", "GET", "/api/author/{name}", lambda context, index: {
+        "url": f"/api/author/{context.pick(context.authors, index)[1]}"
+        }),
+    Scenario("author books", "GET", "/api/author/{name}/books", lambda context, index: {
+        "url": f"/api/author/{context.pick(context.authors, index)[1]}/books"
+        }),
+    # genres.
+    Scenario("genres page", "GET", "/api/genres", lambda context, index: {"url": "/api/genres"}),
+    Scenario("genre", "GET", "/api/genre/{name}", lambda context, index: {
+        "url": f"/api/genre/{context.pick(context.genres, index)[1]}"
+        }),
+    Scenario("genre books", "GET", "/api/genre/{name}/books", lambda context, index: {
+        "url": f"/api/genre/{context.pick(context.genres, index)[1]}/books"
+        }),
+    Scenario("book genres page", "GET", "/api/book_genres", lambda context, index: {
+        "url": "/api/book_genres", "headers": context.headers()
+        }),
+    Scenario("suggest", "GET", "/api/suggest", lambda context, index: {
+        "url": "/api/suggest", "params": {"prefix": context.pick(context.titles, index)[:3]}
+        }),
+    # users and authentication.
+    Scenario("users page", "GET", "/api/users", lambda context, index: {"url": "/api/users"}),
+    Scenario("user", "GET", "/api/user/{username}", lambda context, index: {"url": f"/api/user/{Context.USERNAME}"}),
+    Scenario("token", "POST", "/api/token", lambda context, index: {
+        "url": "/api/token", "data": {"username": Context.USERNAME, "password": Context.PASSWORD}
+        }, requests=PASSWORD_REQUESTS),
+    Scenario("token refresh", "POST", "/api/token/refresh", lambda context, index: {
+        "url": "/api/token/refresh", "json": {"refresh_token": context.refresh_token}
+        }),
+    # exports, imports and diagnostics.
+    Scenario("export books", "GET", "/api/export/{resource}", lambda context, index: {
+        "url": "/api/export/books", "headers": context.headers()
+        }, requests=EXPORT_REQUESTS, concurrency=1, warmup=False),
+    Scenario("import genres", "POST", "/api/import/{resource}", lambda context, index: {
+        "url": "/api/import/genres", "files": {"dump": ("genres.jsonl", import_dump(index))}, "headers": context.headers()
+        }, requests=5, concurrency=1, warmup=False),
+    Scenario("import progress", "GET", "/api/import/{job}", lambda context, index: {
+        "url": f"/api/import/{context.state['import_job']}", "headers": context.headers()
+        }, prepare=prepare_read_import),
+    Scenario("slow queries", "GET", "/api/admin/slow_queries", lambda context, index: {
+        "url": "/api/admin/slow_queries", "headers": context.headers()
+        }),
+    Scenario("metrics", "GET", "/metrics", lambda context, index: {"url": "/metrics"}),
+    # writes, each on its own bench rows.
+    Scenario("create author", "POST", "/api/author", lambda context, index: {
+        "url": "/api/author", "json": {"name": f"bench author {index}", "nationality": "bench", "biography": "Benchmarks."}
+        }, warmup=False),
+    Scenario("update author", "PATCH", "/api/author/{name}", lambda context, index: {
+        "url": f"/api/author/bench author {index}", "json": {"biography": "Updated by the benchmarks."}
+        }, warmup=False, requires=("create author",)),
+    Scenario("create genre", "POST", "/api/genre", lambda context, index: {
+        "url": "/api/genre", "json": {"name": f"bench genre {index}", "description": "Benchmarks."}
+        }, warmup=False),
+    Scenario("update genre", "PATCH", "/api/genre/{name}", lambda context, index: {
+        "url": f"/api/genre/bench genre {index}", "json": {"description": "Updated by the benchmarks."}
+        }, warmup=False, requires=("create genre",)),
+    Scenario("create book", "POST", "/api/book", lambda context, index: {
+        "url": "/api/book", "params": {"author_id": context.pick(context.authors, index)[0]}, "json": book(index)
+        }, warmup=False),
+    Scenario("update book", "PATCH", "/api/book/{title}", lambda context, index: {
+        "url": f"/api/book/bench book {index}", "json": {"pages": 200 + index % 500}
+        }, warmup=False, requires=("create book",)),
+    Scenario("update book author", "PUT", "/api/book/{title}/author", lambda context, index: {
+        "url": f"/api/book/bench book {index}/author", "json": {"author_id": context.pick(context.authors, index + 1)[0]}
+        }, warmup=False, requires=("create book",)),
+    Scenario("create books bulk", "POST", "/api/books/bulk", lambda context, index: {
+        "url": "/api/books/bulk",
+        "json": [
+            {**book(1_000_000 + index * 100 + item), "author_id": context.pick(context.authors, item)[0]}
+            for item in range(100)
+            ]
+        }, requests=20, warmup=False),
+    Scenario("create book genre", "POST", "/api/book_genres", lambda context, index: {
+        "url": "/api/book_genres",
+        "json": {"book_id": context.state["bench_books"][index], "genre_id": context.pick(context.genres, index)[0]},
+        "headers": context.headers()
+        }, warmup=False, prepare=prepare_book_genres, requires=("create book",)),
+    Scenario("update book genre", "PATCH", "/api/book_genres/{book_genre_id}", lambda context, index: {
+        "url": f"/api/book_genres/{context.state['bench_book_genres'][index]}",
+        "json": {"genre_id": context.pick(context.genres, index + 1)[0]},
+        "headers": context.headers()
+        }, warmup=False, prepare=prepare_bench_book_genres, requires=("create book genre",)),
+    Scenario("delete book genre", "DELETE", "/api/book_genres/{book_genre_id}", lambda context, index: {
+        "url": f"/api/book_genres/{context.state['bench_book_genres'][index]}", "headers": context.headers()
+        }, warmup=False, requires=("create book genre",)),
+    Scenario("delete book", "DELETE", "/api/book/{title}", lambda context, index: {
+        "url": f"/api/book/bench book {index}"
+        }, warmup=False, requires=("create book",)),
+    Scenario("delete author", "DELETE", "/api/author/{name}", lambda context, index: {
+        "url": f"/api/author/bench author {index}"
+        }, warmup=False, requires=("create author",)),
+    Scenario("delete genre", "DELETE", "/api/genre/{name}", lambda context, index: {
+        "url": f"/api/genre/bench genre {index}"
+        }, warmup=False, requires=("create genre",)),
+    Scenario("create user", "POST", "/api/user", lambda context, index: {
+        "url": "/api/user", "json": {"username": f"bench user {index}", "password": "bench-password"}
+        }, requests=PASSWORD_REQUESTS, warmup=False),
+    Scenario("update user", "PATCH", "/api/user/{username}", lambda context, index: {
+        # the route replaces every field and hashes the password again.
+        "url": f"/api/user/bench user {index}",
+        "json": {"username": f"bench user {index}", "password": Context.PASSWORD, "description": "Updated by the benchmarks."}
+        }, requests=PASSWORD_REQUESTS, warmup=False, requires=("create user",)),
+    Scenario("delete user", "DELETE", "/api/user/{username}", lambda context, index: {
+        "url": f"/api/user/bench user {index}"
+        }, requests=PASSWORD_REQUESTS, warmup=False, requires=("create user",)),
+    Scenario("logout", "POST", "/api/logout", lambda context, index: {
+        "url": "/api/logout", "headers": context.headers(context.state["logout_tokens"][index])
+        }, warmup=False, prepare=prepare_logout),
+]
@@ -6,14 +6,26 @@ import os
 import uvicorn
 
 from fastapi import FastAPI
-from app.routes import router
 from dotenv import load_dotenv
 from app.config import (
     app_description,
     tags_metadata,
+    async_engine,
+    engine,
+    METRICS_ENABLED,
+    PROFILING_SAMPLE_RATE,
+    PROFILING_SERVER_TIMING,
     DEV_HOST, 
     DEV_PORT
     )
+from app.database import index_check, migrations
+from app.database.search_index import search_index
+from app.database.slow_queries import slow_queries
+from app import metrics, profiling
+from app.hashing import password_hasher
+from app.revocation import revocation_store
+from app.suggest import suggestions
+from app.routes import router
 
 # define the app.
 app = FastAPI(
@@ -31,6 +43,59 @@ app = FastAPI(
     )
 app.include_router(router)
 
+# count and time every request, and the statements of each controller.
+if METRICS_ENABLED:
+    metrics.install(engine, async_engine)
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# log the slow statements with their plan.
+slow_queries.install(engine, async_engine)
+
+# profile a sample of the requests.
+if PROFILING_SAMPLE_RATE > 0:
+    profiling.install()
+    app.add_middleware(
+        profiling.ProfilingMiddleware, 
+        sample_rate=PROFILING_SAMPLE_RATE, 
+        server_timing=PROFILING_SERVER_TIMING
+        )
+
+@app.on_event("startup")
+def upgrade_database():
+    migrations.upgrade()
+
+@app.on_event("startup")
+def start_revocation_store():
+    revocation_store.start()
+
+@app.on_event("startup")
+def check_indexes():
+    index_check.report()
+
+@app.on_event("startup")
+def create_search_index():
+    search_index.create()
+
+@app.on_event("startup")
+def start_suggestions():
+    suggestions.start()
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
+
+@app.on_event("shutdown")
+def stop_revocation_store():
+    revocation_store.stop()
+
+@app.on_event("shutdown")
+def stop_suggestions():
+    suggestions.stop()
+
+@app.on_event("shutdown")
+def close_slow_query_log():
+    slow_queries.close()
+
 # run the program.
 if __name__ == "__main__":
     uvicorn.run("__main__:app", host=DEV_HOST, port=DEV_PORT, use_colors=True, reload=True)
@@ -0,0 +1,120 @@
+# tests/conftest.py
+
+"""
+Shared fixtures: the app on a seeded SQLite database in a temporary directory.
+The routes run on the sync stack, or on the async one with `DATABASE_ASYNC=true`.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+from sqlalchemy import event
+
+
+# app.config reads its settings and builds the engines when it is imported.
+DIRECTORY = tempfile.mkdtemp(prefix="books-tests-")
+os.environ.update({
+    "DATABASE_BACKEND": "sqlite",
+    "SQLITE_DATABASE_PATH": os.path.join(DIRECTORY, "books.db"),
+    "IMPORT_DIRECTORY": os.path.join(DIRECTORY, "imports"),
+    "SLOW_QUERY_LOG_PATH": "",
+    "ADMIN_USERNAMES": "reader",
+    # statements are counted, cached responses would not run any.
+    "RESPONSE_CACHE_ENABLED": "false",
+    "PASSWORD_HASH_WORKERS": "0",
+    "SUGGEST_REFRESH_INTERVAL": "3600",
+})
+
+for name, value in {
+        "SECRET_KEY": "secret",
+        "REFRESH_KEY": "refresh",
+        "ALGORITHM": "HS256",
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+        "APP_DEV_HOST": "127.0.0.1",
+        "APP_DEV_PORT": "8000",
+        }.items():
+    os.environ.setdefault(name, value)
+
+USERNAME = "reader"
+PASSWORD = "reader-password"
+# rows of each table, more than the largest page of the tests.
+AUTHORS = 25
+GENRES = 25
+BOOKS = 60
+USERS = 25
+
+
+def seed(session):
+    from app import models
+    from app.config import pwd_context
+
+    authors = [models.Author(uuid=f"author-{index:03d}", name=f"Author {index}", nationality="Indonesian", biography="Biography.") for index in range(AUTHORS)]
+    genres = [models.Genre(uuid=f"genre-{index:03d}", name=f"Genre {index}", description="Description.") for index in range(GENRES)]
+    session.add_all(authors + genres)
+
+    book_genres = []
+
+    for index in range(BOOKS):
+        session.add(models.Book(
+            uuid=f"book-{index:03d}",
+            isbn=f"{index:013d}",
+            title=f"Book {index}",
+            author_id=authors[index % AUTHORS].uuid,
+            pages=100 + index,
+            synopsis="Synopsis.",
+            publisher=f"Publisher {index % 3}",
+            ))
+
+        for offset in range(2):
+            genre = genres[(index + offset) % GENRES]
+            book_genres.append(models.BookGenre(uuid=f"book-genre-{index:03d}-{offset}", book_id=f"book-{index:03d}", genre_id=genre.uuid))
+
+    # BookGenres has no relationship, the books are inserted first by hand.
+    session.flush()
+    session.add_all(book_genres)
+    password = pwd_context.hash(PASSWORD)
+    session.add(models.User(uuid="user-000", username=USERNAME, password=password, description="Reader."))
+    session.add_all(
+        models.User(uuid=f"user-{index:03d}", username=f"user {index}", password=password, description="User.") for index in range(1, USERS)
+        )
+    session.commit()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app import models  # noqa: F401, registers the tables.
+    from app.config import Base, SessionLocal, engine
+
+    Base.metadata.create_all(engine)
+
+    with SessionLocal() as session:
+        seed(session)
+
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture(scope="session")
+def token(client) -> str:
+    response = client.post("/api/token", data={"username": USERNAME, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return response.json()["access_token"]
+
+@pytest.fixture
+def statements():
+    """The SQL statements the routes run while the test runs, on either database stack."""
+    from app.config import async_engine, engine
+
+    executed = []
+    target = engine if async_engine is None else async_engine.sync_engine
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(target, "before_cursor_execute", count)
+    yield executed
+    event.remove(target, "before_cursor_execute", count)
@@ -0,0 +1,48 @@
+# tests/test_hashing.py
+
+"""The bcrypt process pool, and the 429 once every slot of it is taken."""
+
+import pytest
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    from app.controllers import authentication_controller
+    from app.controllers.asynchronous import authentication_controller as async_authentication_controller
+    from app.hashing import PasswordHasher
+
+    # one worker and no queue: a single operation in progress takes the only slot.
+    hasher = PasswordHasher(workers=1, queue_size=0)
+    monkeypatch.setattr(authentication_controller, "password_hasher", hasher)
+    monkeypatch.setattr(async_authentication_controller, "password_hasher", hasher)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_from_the_pool_verifies(hasher):
+    hashed = hasher.hash("secret-password")
+
+    assert hasher._executor is not None
+    assert hasher.verify("secret-password", hashed)
+    assert not hasher.verify("wrong-password", hashed)
+    assert hasher.stats()["latency"]["hash"]["count"] == 1
+
+def test_token_while_the_pool_is_busy(client, hasher):
+    credentials = {"username": "reader", "password": "reader-password"}
+
+    # stands for an operation still running in the worker.
+    assert hasher._slots.acquire(blocking=False)
+
+    try:
+        response = client.post("/api/token", data=credentials)
+    finally:
+        hasher._slots.release()
+
+    assert response.status_code == 429, response.text
+    assert response.headers["Retry-After"] == "1"
+    assert hasher.stats()["rejected"] == 1
+
+    response = client.post("/api/token", data=credentials)
+
+    assert response.status_code == 200, response.text
+    assert hasher.stats()["latency"]["verify"]["count"] == 1
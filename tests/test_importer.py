@@ -0,0 +1,64 @@
+# tests/test_importer.py
+
+"""Dump rows that collide with existing rows are skipped, the import goes on."""
+
+import json
+
+
+def write_dump(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+    return str(path)
+
+def test_import_skips_taken_uuids(client, tmp_path):
+    from app.database.importer import Importer
+
+    dump = write_dump(tmp_path / "authors.jsonl", [
+        # the uuid of a seeded author.
+        {"uuid": "author-000", "name": "Imported 0", "nationality": "Indonesian", "biography": "Biography."},
+        {"uuid": "imported-author-1", "name": "Imported 1", "nationality": "Indonesian", "biography": "Biography."},
+        # the uuid of the previous record.
+        {"uuid": "imported-author-1", "name": "Imported 2", "nationality": "Indonesian", "biography": "Biography."},
+        ])
+    state = Importer("authors", dump, workers=0).run()
+
+    assert state["done"]
+    assert (state["inserted"], state["skipped"], state["invalid"]) == (1, 2, 0), state["errors"]
+
+def test_import_skips_taken_book_uuids(client, tmp_path):
+    from app.database.importer import Importer
+
+    dump = write_dump(tmp_path / "books.jsonl", [
+        {"uuid": "book-000", "title": "Imported book 0", "isbn": "9990000000000", "pages": 10, "synopsis": "Synopsis.", "publisher": "Publisher", "author": "Author 1"},
+        {"uuid": "imported-book-1", "title": "Imported book 1", "isbn": "9990000000001", "pages": 10, "synopsis": "Synopsis.", "publisher": "Publisher", "author": "Author 1"},
+        ])
+    state = Importer("books", dump, workers=0).run()
+
+    assert (state["inserted"], state["skipped"], state["invalid"]) == (1, 1, 0), state["errors"]
+
+def test_import_books_with_and_without_an_author(client, tmp_path):
+    from sqlalchemy import create_engine, select
+    from app import models
+    from app.config import engine
+    from app.database.importer import Importer
+
+    # one executemany batch, the book without an author in between.
+    dump = write_dump(tmp_path / "books.jsonl", [
+        {"uuid": "mixed-book-0", "title": "Mixed book 0", "isbn": "9990000000010", "pages": 10, "synopsis": "Synopsis.", "publisher": "Publisher", "author": "Author 2"},
+        {"uuid": "mixed-book-1", "title": "Mixed book 1", "isbn": "9990000000011", "pages": 10, "synopsis": "Synopsis.", "publisher": "Publisher", "author": None},
+        {"uuid": "mixed-book-2", "title": "Mixed book 2", "isbn": "9990000000012", "pages": 10, "synopsis": "Synopsis.", "publisher": "Publisher", "author": "Author 3"},
+        ])
+    state = Importer("books", dump, workers=0).run()
+
+    assert (state["inserted"], state["skipped"], state["invalid"]) == (3, 0, 0), state["errors"]
+
+    # an engine of its own, the app's one counts every statement for /metrics.
+    reader = create_engine(engine.url)
+
+    with reader.connect() as connection:
+        authors = dict(connection.execute(
+            select(models.Book.uuid, models.Book.author_id).where(models.Book.uuid.like("mixed-book-%"))
+            ).all())
+
+    reader.dispose()
+
+    assert authors == {"mixed-book-0": "author-002", "mixed-book-1": None, "mixed-book-2": "author-003"}
@@ -0,0 +1,30 @@
+# tests/test_metrics.py
+
+"""SQL statements are counted under the controller function or the job that ran them."""
+
+
+def statement_labels(client) -> set:
+    response = client.get("/metrics")
+    assert response.status_code == 200, response.text
+
+    return {
+        line.split('controller="', 1)[1].split('"', 1)[0]
+        for line in response.text.splitlines() if line.startswith("db_statements_total{")
+        }
+
+def test_statements_are_labelled(client, token):
+    assert client.get("/api/genres", params={"limit": 2}).status_code == 200
+    assert client.get("/api/genre/Genre 1").status_code == 200
+    # the body is streamed by a generator, after the route handler returned.
+    assert client.get("/api/export/genres", params={"format": "csv"}, headers={"Authorization": f"Bearer {token}"}).status_code == 200
+
+    labels = statement_labels(client)
+
+    assert {
+        "genre_controller.get_genres",
+        "genre_controller.get_genre",
+        "export_controller.export_rows",
+        "suggestions.load",
+        "index_check.report",
+        } <= labels
+    assert "other" not in labels
@@ -0,0 +1,26 @@
+# tests/test_migrations.py
+
+"""The version columns are added at startup to a database created before them."""
+
+from sqlalchemy import create_engine, inspect
+
+
+def test_upgrade_adds_the_missing_version_columns(tmp_path):
+    from app.database import migrations
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE Books (uuid VARCHAR(36) NOT NULL, title VARCHAR(255) NOT NULL)")
+        connection.exec_driver_sql("INSERT INTO Books (uuid, title) VALUES ('book-000', 'Book 0')")
+        connection.exec_driver_sql("CREATE TABLE Authors (uuid VARCHAR(36) NOT NULL, version INTEGER NOT NULL DEFAULT 1)")
+
+    # Genres does not exist, and Authors already has its column.
+    assert migrations.upgrade(engine) == [("Books", "version")]
+    assert migrations.upgrade(engine) == []
+
+    with engine.connect() as connection:
+        assert "version" in {column["name"] for column in inspect(connection).get_columns("Books")}
+        assert connection.exec_driver_sql("SELECT version FROM Books").scalar_one() == 1
+
+    engine.dispose()
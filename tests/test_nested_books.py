@@ -0,0 +1,45 @@
+# tests/test_nested_books.py
+
+"""The list routes: one bounded page of books per author or genre, and sparse fieldsets."""
+
+import pytest
+
+
+@pytest.mark.parametrize("kind", ["author", "genre"])
+def test_list_nested_books_are_paged(client, kind):
+    response = client.get(f"/api/{kind}s", params={"limit": 50, "books_limit": 1})
+    assert response.status_code == 200, response.text
+
+    for row in response.json()["data"]:
+        assert len(row["books"]) <= 1
+
+        if row["books_next_cursor"] is None:
+            continue
+
+        # the cursor continues on the books route of the row.
+        rest = client.get(f"/api/{kind}/{row['name']}/books", params={"cursor": row["books_next_cursor"]})
+        assert rest.status_code == 200, rest.text
+
+        detail = client.get(f"/api/{kind}/{row['name']}")
+        titles = [book["title"] for book in detail.json()["books"]]
+        assert titles == [row["books"][0]["title"], *(book["title"] for book in rest.json()["data"])]
+
+@pytest.mark.parametrize("kind", ["author", "genre"])
+def test_list_nested_books_with_fields(client, kind):
+    response = client.get(f"/api/{kind}s", params={"books_limit": 2, "fields": "name,books.title"})
+    assert response.status_code == 200, response.text
+
+    for row in response.json()["data"]:
+        assert set(row) == {"name", "books"}
+        assert len(row["books"]) <= 2
+        assert all(set(book) == {"title"} for book in row["books"])
+
+def test_fields_keep_the_schema_order(client):
+    response = client.get("/api/books", params={"limit": 1, "fields": "title,isbn,author.name,author.uuid"})
+    assert response.status_code == 200, response.text
+
+    full = client.get("/api/books", params={"limit": 1}).json()["data"][0]
+    book = response.json()["data"][0]
+
+    assert list(book) == [name for name in full if name in book]
+    assert list(book["author"]) == [name for name in full["author"] if name in book["author"]]
@@ -0,0 +1,35 @@
+# tests/test_profiling.py
+
+"""The profiler only wraps the FastAPI serializer when FastAPI still calls it."""
+
+import logging
+
+
+def test_serialize_response_is_wrapped(client, monkeypatch):
+    from fastapi import routing
+    from app import profiling
+
+    monkeypatch.setattr(routing, "serialize_response", routing.serialize_response)
+    profiling.install()
+
+    assert routing.serialize_response is profiling.serialize_response
+
+def test_unknown_request_handler_is_left_alone(client, monkeypatch, caplog):
+    from fastapi import routing
+    from app import profiling
+
+    def get_request_handler(dependant):
+        async def app(request):
+            return None
+
+        return app
+
+    original = routing.serialize_response
+    monkeypatch.setattr(routing, "serialize_response", original)
+    monkeypatch.setattr(routing, "get_request_handler", get_request_handler)
+
+    with caplog.at_level(logging.WARNING, logger="app.profiling"):
+        profiling.install()
+
+    assert routing.serialize_response is original
+    assert "serialize time is not profiled" in caplog.text
@@ -0,0 +1,37 @@
+# tests/test_query_counts.py
+
+"""Every list route serves a page in a fixed number of statements, whatever its size."""
+
+import pytest
+
+
+# route, statements of one page: the rows, then one query per relationship.
+LIST_ROUTES = [
+    # the versions of the page for its ETag, the books -> author, genres.
+    ("/api/books", 4),
+    # authors, then one page of books of every author in one query.
+    ("/api/authors", 2),
+    # genres, then one page of books of every genre in one query.
+    ("/api/genres", 2),
+    ("/api/users", 1),
+    ("/api/book_genres", 1),
+]
+
+
+@pytest.mark.parametrize("route, expected", LIST_ROUTES)
+def test_list_route_statement_count(client, token, statements, route, expected):
+    headers = {"Authorization": f"Bearer {token}"}
+    # the first call also looks up the user of the token, it is cached after.
+    assert client.get(route, params={"limit": 1}, headers=headers).status_code == 200
+
+    counts = {}
+
+    for limit in (1, 5, 20):
+        statements.clear()
+        response = client.get(route, params={"limit": limit}, headers=headers)
+
+        assert response.status_code == 200, response.text
+        assert len(response.json()["data"]) == limit
+        counts[limit] = len(statements)
+
+    assert counts == {1: expected, 5: expected, 20: expected}, statements
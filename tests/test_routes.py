@@ -0,0 +1,110 @@
+# tests/test_routes.py
+
+"""Write and authentication routes, with the same behaviour on both database stacks."""
+
+import pytest
+
+
+def test_token_with_a_wrong_password(client):
+    response = client.post("/api/token", data={"username": "reader", "password": "wrong"})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Username or password incorrect."}
+
+def test_admin_route_needs_an_administrator(client, token):
+    # "user 1" is a valid user, not listed in ADMIN_USERNAMES.
+    response = client.post("/api/token", data={"username": "user 1", "password": "reader-password"})
+    assert response.status_code == 200, response.text
+    user_token = response.json()["access_token"]
+
+    assert client.get("/api/admin/slow_queries").status_code == 401
+    assert client.get("/api/admin/slow_queries", headers={"Authorization": f"Bearer {user_token}"}).status_code == 403
+
+    response = client.get("/api/admin/slow_queries", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200, response.text
+    assert "data" in response.json()
+
+def test_update_book_genre(client, token):
+    response = client.patch(
+        "/api/book_genres/book-genre-059-1",
+        json={"genre_id": "genre-020"},
+        headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["book_id"] == "book-059"
+    assert response.json()["genre_id"] == "genre-020"
+
+def test_update_book_genre_to_a_genre_of_the_book(client, token):
+    # book-000 already has genre-000 through book-genre-000-0.
+    response = client.patch(
+        "/api/book_genres/book-genre-000-1",
+        json={"genre_id": "genre-000"},
+        headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert response.status_code == 409, response.text
+    assert response.json() == {"detail": "The book already has this genre."}
+
+def test_update_book_genre_not_found(client, token):
+    response = client.patch(
+        "/api/book_genres/missing",
+        json={"genre_id": "genre-020"},
+        headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert response.status_code == 404
+
+def test_update_book_author(client):
+    response = client.put("/api/book/Book 58/author", json={"author_id": "author-024"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["title"] == "Book 58"
+    assert response.json()["author"]["name"] == "Author 24"
+
+def test_refresh_token(client):
+    tokens = client.post("/api/token", data={"username": "user 2", "password": "reader-password"}).json()
+    response = client.post("/api/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+    assert response.status_code == 200, response.text
+    assert client.get("/api/book_genres", headers={"Authorization": f"Bearer {response.json()['access_token']}"}).status_code == 200
+
+def test_refresh_token_of_a_deleted_user(client):
+    tokens = client.post("/api/token", data={"username": "user 3", "password": "reader-password"}).json()
+    assert client.delete("/api/user/user 3").status_code == 200
+
+    response = client.post("/api/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+def test_token_without_the_access_type(client):
+    from jose import jwt
+    from app.config import ALGORITHM, SECRET_KEY
+
+    token = jwt.encode({"sub": "reader", "exp": 4102444800}, SECRET_KEY, algorithm=ALGORITHM)
+    response = client.get("/api/book_genres", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 401
+
+def test_book_filters(client):
+    response = client.get("/api/books", params={"sort": "-pages", "pages_min": 150, "limit": 5})
+
+    assert response.status_code == 200, response.text
+    pages = [book["pages"] for book in response.json()["data"]]
+    assert len(pages) == 5 and pages == sorted(pages, reverse=True) and min(pages) >= 150
+
+def test_book_filters_are_validated_by_the_schema(client):
+    for params, name in (({"sort": "isbn"}, "sort"), ({"pages_min": -1, "sort": "pages"}, "pages_min")):
+        response = client.get("/api/books", params=params)
+
+        assert response.status_code == 422, response.text
+        assert response.json()["detail"][0]["loc"] == ["query", name]
+
+@pytest.mark.parametrize("route", ["/api/books", "/api/authors", "/api/genres", "/api/users", "/api/book_genres"])
+def test_list_route_deprecated_skip(client, token, route):
+    headers = {"Authorization": f"Bearer {token}"}
+    first = client.get(route, params={"limit": 4}, headers=headers).json()["data"]
+    skipped = client.get(route, params={"limit": 2, "skip": 2}, headers=headers)
+
+    assert skipped.status_code == 200, skipped.text
+    assert skipped.json()["data"] == first[2:]
@@ -0,0 +1,27 @@
+# tests/test_suggest.py
+
+"""The suggestion index follows the reads and the commits of the process."""
+
+
+def test_reads_are_buffered(client):
+    from app.suggest import suggestions
+
+    index = suggestions.indexes["author"]
+    suggestions.flush_hits()
+    before = index.score("Author 10")
+
+    for _ in range(3):
+        assert client.get("/api/author/Author 10").status_code == 200
+
+    suggestions.flush_hits()
+    assert index.score("Author 10") == before + 3
+
+def test_book_delete_lowers_its_genres(client):
+    from app.suggest import suggestions
+
+    # Book 57 is linked to Genre 7 and Genre 8, the links are deleted with the book.
+    index = suggestions.indexes["genre"]
+    before = {name: index.score(name) for name in ("Genre 7", "Genre 8")}
+
+    assert client.delete("/api/book/Book 57").status_code == 200
+    assert {name: index.score(name) for name in before} == {name: score - 1 for name, score in before.items()}